@@ -0,0 +1,118 @@
+"""
+Синтетические данные в формате Huntflow/hh.ru: резюме (unified resume из externals) и вакансии с HTML-полями.
+Генерация детерминирована по seed, чтобы замеры разных версий кода были сравнимы.
+"""
+import random
+from typing import Dict, List
+
+POSITIONS = [
+    "Python-разработчик", "Backend-разработчик", "Data Engineer", "DevOps-инженер",
+    "Инженер по тестированию", "Аналитик данных", "Team Lead", "Frontend-разработчик",
+]
+COMPANIES = [
+    "ООО «Ромашка»", "АО «Уралтехсервис»", "Яндекс", "Сбер", "Тинькофф", "ООО «Пермские системы»",
+    "Контур", "ИП Иванов", "ПАО «Ростелеком»", "ООО «Северсталь-инфоком»",
+]
+SKILLS = [
+    "Python", "Django", "FastAPI", "Flask", "PostgreSQL", "Redis", "Docker", "Kubernetes", "Linux", "Git",
+    "Celery", "RabbitMQ", "Kafka", "SQL", "asyncio", "REST", "gRPC", "CI/CD", "Ansible", "ClickHouse",
+]
+UNIVERSITIES = [
+    ("Пермский государственный национальный исследовательский университет", "Механико-математический"),
+    ("Пермский национальный исследовательский политехнический университет", "Электротехнический"),
+    ("Уральский федеральный университет", "Институт радиоэлектроники и информационных технологий"),
+    ("НИУ ВШЭ", "Факультет компьютерных наук"),
+]
+WORDS = (
+    "разработка поддержка сервисов микросервисной архитектуры оптимизация запросов базы данных внедрение "
+    "мониторинга автоматизация деплоя проектирование API интеграция с внешними системами рефакторинг "
+    "легаси кода наставничество младших разработчиков код-ревью покрытие тестами снижение времени ответа "
+    "обработка очередей сообщений миграция на новую версию участие в планировании спринтов"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(6, 14)) for _ in range(sentences))
+
+
+def make_resume(seed: int, experience: int = 8) -> Dict:
+    """
+    Резюме с experience местами работы (от старых к текущему) и многострочными описаниями обязанностей.
+    """
+    rng = random.Random(seed)
+    year = 2024 - experience * 2
+    jobs = []
+    for index in range(experience):
+        date_from = {"year": year, "month": rng.randint(1, 12), "precision": "month"}
+        year += rng.randint(1, 3)
+        current = index == experience - 1
+        duties = "\n".join(f"— {_sentence(rng, rng.randint(5, 12))}" for _ in range(rng.randint(3, 8)))
+        jobs.append({
+            "company": rng.choice(COMPANIES),
+            "position": rng.choice(POSITIONS),
+            "date_from": date_from,
+            "date_to": None if current else {"year": year, "month": rng.randint(1, 12), "precision": "month"},
+            "description": f"{_paragraph(rng, rng.randint(1, 3))}\n{duties}",
+        })
+    university, faculty = rng.choice(UNIVERSITIES)
+    return {
+        "position": rng.choice(POSITIONS),
+        "wanted_salary": {"amount": rng.randrange(80000, 220000, 10000), "currency": "RUB"},
+        "skill_set": rng.sample(SKILLS, rng.randint(5, 12)),
+        "area": {"city": {"name": "Пермь"}},
+        "relocation": {"type": {"name": "не могу переехать"}},
+        "total_experience": {"months": experience * 24},
+        "experience": list(reversed(jobs)),
+        "education": {"higher": [{
+            "name": university,
+            "faculty": faculty,
+            "date_from": {"year": year - experience * 2 - 5, "precision": "year"},
+            "date_to": {"year": year - experience * 2 - 1, "precision": "year"},
+        }]},
+    }
+
+
+def _html_list(rng: random.Random, items: int) -> str:
+    return "<ul>\n" + "".join(f"  <li>{_sentence(rng, rng.randint(4, 10))}</li>\n" for _ in range(items)) + "</ul>"
+
+
+def make_vacancy(seed: int, paragraphs: int = 6) -> Dict:
+    """
+    Вакансия с HTML-разметкой как в редакторе Huntflow: абзацы, списки, переносы, сущности (&nbsp;, &laquo;).
+    """
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, 5)
+    body = "\n".join(
+        f"<p><strong>{rng.choice(COMPANIES).replace('«', '&laquo;').replace('»', '&raquo;')}</strong>&nbsp;— "
+        f"{_paragraph(rng, rng.randint(2, 4))}</p>"
+        for _ in range(paragraphs)
+    )
+    body += "\n<p>Чем предстоит заниматься:</p>\n" + _html_list(rng, rng.randint(4, 8))
+    requirements = (
+        f"<p>Опыт коммерческой разработки от {rng.randint(1, 5)} лет.</p>\n"
+        f"<ul>\n" + "".join(f"  <li>Уверенное знание {skill};</li>\n" for skill in skills) + "</ul>\n"
+        f"<p>Будет плюсом:<br/>\n{_sentence(rng, 8)}</p>"
+    )
+    conditions = (
+        f"<p>Офис в&nbsp;Перми или удалённо &mdash; на&nbsp;выбор.</p>\n{_html_list(rng, rng.randint(3, 6))}"
+    )
+    return {
+        "position": rng.choice(POSITIONS),
+        "money": f"{rng.randrange(120000, 250000, 10000)} RUB",
+        "body": body,
+        "requirements": requirements,
+        "conditions": conditions,
+    }
+
+
+def make_resumes(count: int, experience: int = 8, seed: int = 0) -> List[Dict]:
+    return [make_resume(seed + index, experience) for index in range(count)]
+
+
+def make_vacancies(count: int, paragraphs: int = 6, seed: int = 0) -> List[Dict]:
+    return [make_vacancy(seed + index, paragraphs) for index in range(count)]
@@ -0,0 +1,188 @@
+"""
+Локальные заглушки Huntflow и OpenAI-совместимого API для нагрузочного тестирования.
+Задержка, доля ошибок 5xx и ответов 429 задаются профилем FaultProfile.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from benchmarks.corpus import make_resume, make_vacancy
+from tests.stubs.openai_stub import OpenAIStub
+
+STATUSES = ["Отклики", "новые", "резерв", "Интервью", "Отказ"]
+
+
+@dataclass
+class FaultProfile:
+    """
+    latency ± jitter — задержка ответа в секундах; error_rate и throttle_rate — доли ответов 500 и 429.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+
+    def __post_init__(self):
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+
+    def next_fault(self) -> tuple:
+        """
+        Задержка и код ответа (None — обычный ответ) для очередного запроса.
+        """
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+
+class FakeHuntflow:
+    """
+    Заглушка Huntflow API v2 с маршрутами, которые использует обработка кандидата. Кандидаты и вакансии
+    генерируются по ID (см. benchmarks.corpus), поэтому любой ID из вебхука существует.
+    Время первого перевода кандидата на этап записывается в moved — по нему считается сквозная задержка.
+    """
+
+    def __init__(self, profile: Optional[FaultProfile] = None, experience: int = 8, paragraphs: int = 6):
+        self.profile = profile or FaultProfile()
+        self.experience = experience
+        self.paragraphs = paragraphs
+        self.calls: Counter = Counter()
+        self.faults: Counter = Counter()
+        self.moved: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self) -> "FakeHuntflow":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake._dispatch(self, "GET")
+
+            def do_POST(self):
+                fake._dispatch(self, "POST")
+
+            def do_PUT(self):
+                fake._dispatch(self, "PUT")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw = handler.rfile.read(length) if length else b""
+        path = handler.path.split("?")[0]
+        route = re.sub(r"/\d+", "/{id}", path.removeprefix("/v2"))
+        endpoint = f"{method} {route}"
+        with self._lock:
+            self.calls[endpoint] += 1
+
+        delay, status = self.profile.next_fault()
+        time.sleep(delay)
+        if status is not None:
+            with self._lock:
+                self.faults[status] += 1
+            headers = {"Retry-After": str(self.profile.retry_after)} if status == 429 else {}
+            return self._send_json(handler, {"errors": [{"type": "fake_fault"}]}, status, headers)
+
+        ids = [int(part) for part in re.findall(r"/(\d+)", path)]
+        if method == "GET" and route == "/accounts/{id}/vacancies/statuses":
+            return self._send_json(handler, {"items": [
+                {"id": index + 1, "name": name, "removed": None} for index, name in enumerate(STATUSES)
+            ]})
+        if method == "GET" and route == "/accounts/{id}/vacancies/{id}":
+            return self._send_json(handler, make_vacancy(ids[1], self.paragraphs))
+        if method == "GET" and route == "/accounts/{id}/applicants/{id}":
+            return self._send_json(handler, {"id": ids[1], "external": [{"id": ids[1], "updated": "2024-01-01"}]})
+        if method == "GET" and route == "/accounts/{id}/applicants/{id}/externals/{id}":
+            return self._send_json(handler, {"id": ids[2], "resume": make_resume(ids[1], self.experience)})
+        if method == "PUT" and route == "/accounts/{id}/applicants/{id}/vacancy":
+            with self._lock:
+                self.moved.setdefault(ids[1], time.perf_counter())
+            body = json.loads(raw or b"{}")
+            return self._send_json(handler, {"applicant": ids[1], "status": body.get("status")})
+        if method == "POST" and route == "/token/refresh":
+            return self._send_json(handler, {"access_token": "fake-access", "refresh_token": "fake-refresh",
+                                             "expires_in": 86400})
+        self._send_json(handler, {"errors": [{"type": "not_found", "title": endpoint}]}, 404)
+
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, payload: dict, status: int = 200,
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class FakeOpenAI(OpenAIStub):
+    """
+    OpenAIStub с профилем задержек и отказов для chat.completions.
+    """
+
+    def __init__(self, profile: Optional[FaultProfile] = None):
+        super().__init__()
+        self.profile = profile or FaultProfile()
+        self.faults: Counter = Counter()
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        if method == "POST" and handler.path.split("?")[0].endswith("/chat/completions"):
+            delay, status = self.profile.next_fault()
+            time.sleep(delay)
+            if status is not None:
+                handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+                self.requests.append((method, handler.path))
+                self.faults[status] += 1
+                headers = {"Retry-After": str(self.profile.retry_after)} if status == 429 else {}
+                return self._send_error(handler, status, headers)
+        super()._dispatch(handler, method)
+
+    @staticmethod
+    def _send_error(handler: BaseHTTPRequestHandler, status: int, headers: Dict[str, str]) -> None:
+        kind = "rate_limit_exceeded" if status == 429 else "server_error"
+        body = json.dumps({"error": {"message": "Fake fault", "type": kind, "code": kind}}).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
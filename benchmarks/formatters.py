@@ -0,0 +1,133 @@
+"""
+Микробенчмарк форматтеров резюме и вакансий на синтетическом корпусе (см. benchmarks.corpus).
+
+Для каждой функции сравниваются исходная реализация (benchmarks.reference_formatters) и текущая
+из src.service.formatting: сначала проверяется, что вывод совпадает байт в байт, затем замеряются
+операции в секунду (лучший из repeat прогонов) и пиковый объём памяти, выделяемой за один вызов (tracemalloc).
+Декораторы метрик и трейсинга с текущих функций снимаются, чтобы сравнивать только форматирование.
+Вывод clean_html намеренно отличается от исходного (сущности, абзацы, списки) и не сверяется, а исходный
+format_vacancy сверяется с текущим при той же очистке HTML. Подробнее о конвертере — benchmarks.html_to_text.
+
+    python -m benchmarks.formatters --resumes 50 --experience 12 --vacancies 50 --paragraphs 20
+"""
+import argparse
+import inspect
+import json
+import logging
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List
+
+from benchmarks import reference_formatters
+from benchmarks.corpus import make_resumes, make_vacancies
+from src.service.formatting import html_cleaner, resume_formatter, vacancy_formatter
+
+
+@dataclass
+class Case:
+    name: str
+    reference: Callable[[Any], str]
+    current: Callable[[Any], str]
+    inputs: List[Any]
+    # False — вывод отличается от исходного намеренно, сравнивается только скорость
+    identical: bool = True
+
+
+def build_cases(resumes: List[dict], vacancies: List[dict]) -> List[Case]:
+    format_resume = inspect.unwrap(resume_formatter.format_resume)
+    format_vacancy = inspect.unwrap(vacancy_formatter.format_vacancy)
+    html_fields = [vacancy[field] for vacancy in vacancies for field in ("body", "requirements", "conditions")]
+    return [
+        Case("format_resume", reference_formatters.format_resume, format_resume, resumes),
+        Case("format_experience", reference_formatters.format_experience, resume_formatter.format_experience,
+             [resume["experience"] for resume in resumes]),
+        Case("format_education", reference_formatters.format_education, resume_formatter.format_education,
+             [resume["education"] for resume in resumes]),
+        Case("format_vacancy", partial(reference_formatters.format_vacancy, clean=html_cleaner.clean_html),
+             format_vacancy, vacancies),
+        Case("clean_html", reference_formatters.clean_html, html_cleaner.clean_html, html_fields, identical=False),
+    ]
+
+
+def verify(case: Case) -> None:
+    for index, value in enumerate(case.inputs):
+        expected, actual = case.reference(value), case.current(value)
+        if expected != actual:
+            raise AssertionError(f"{case.name}: вывод отличается от исходной реализации на входе #{index}")
+
+
+def ops_per_second(func: Callable[[Any], str], inputs: List[Any], number: int, repeat: int) -> float:
+    def run():
+        for value in inputs:
+            func(value)
+
+    best = min(timeit.repeat(run, number=number, repeat=repeat))
+    return len(inputs) * number / best
+
+
+def peak_bytes_per_call(func: Callable[[Any], str], inputs: List[Any]) -> float:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for value in inputs:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            func(value)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+def run(cases: List[Case], number: int = 10, repeat: int = 5) -> Dict[str, dict]:
+    results = {}
+    for case in cases:
+        if case.identical:
+            verify(case)
+        result = {}
+        for version in ("reference", "current"):
+            func = getattr(case, version)
+            result[version] = {
+                "ops_per_sec": round(ops_per_second(func, case.inputs, number, repeat), 1),
+                "peak_kib_per_call": round(peak_bytes_per_call(func, case.inputs) / 1024, 2),
+            }
+        result["speedup"] = round(result["current"]["ops_per_sec"] / result["reference"]["ops_per_sec"], 2)
+        results[case.name] = result
+    return results
+
+
+def print_results(results: Dict[str, dict]) -> None:
+    print(f"{'функция':<20}{'исходная, оп/с':>16}{'текущая, оп/с':>16}{'ускорение':>11}"
+          f"{'память, КиБ':>14}{'было, КиБ':>12}")
+    for name, result in results.items():
+        reference, current = result["reference"], result["current"]
+        print(f"{name:<20}{reference['ops_per_sec']:>16}{current['ops_per_sec']:>16}{result['speedup']:>10}x"
+              f"{current['peak_kib_per_call']:>14}{reference['peak_kib_per_call']:>12}")
+
+
+def main(argv=None) -> Dict[str, dict]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--experience", type=int, default=12, help="мест работы в резюме")
+    parser.add_argument("--vacancies", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=20, help="абзацев в описании вакансии")
+    parser.add_argument("--number", type=int, default=10, help="проходов по корпусу в одном замере")
+    parser.add_argument("--repeat", type=int, default=5, help="замеров, из которых берётся лучший")
+    parser.add_argument("--json", help="сохранить результаты в файл JSON")
+    args = parser.parse_args(argv)
+
+    # Логирование форматтеров не должно попадать в замер
+    logging.disable(logging.INFO)
+    cases = build_cases(make_resumes(args.resumes, args.experience), make_vacancies(args.vacancies, args.paragraphs))
+    results = run(cases, args.number, args.repeat)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
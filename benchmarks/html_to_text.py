@@ -0,0 +1,93 @@
+"""
+Бенчмарк конвертера HTML в текст для промпта (src.service.formatting.html_cleaner.clean_html) против исходной
+очистки регулярным выражением '<.*?>' (benchmarks.reference_formatters.clean_html) на полях вакансий
+из benchmarks.corpus разного размера.
+
+Для каждого размера описания замеряются операции в секунду на одно поле вакансии (лучший из repeat прогонов)
+и сравнивается вывод: символы, токены (count_tokens; без tiktoken — приблизительная оценка по длине)
+и оставшиеся в тексте HTML-сущности.
+
+    python -m benchmarks.html_to_text --vacancies 20 --paragraphs 6 30 300 --show
+"""
+import argparse
+import json
+import logging
+import re
+from typing import Dict, List
+
+from benchmarks import reference_formatters
+from benchmarks.corpus import make_vacancies, make_vacancy
+from benchmarks.formatters import ops_per_second
+from src.service.formatting import html_cleaner
+from src.service.formatting.token_budget import _get_encoding, count_tokens
+
+FIELDS = ("body", "requirements", "conditions")
+VERSIONS = {"regex": reference_formatters.clean_html, "converter": html_cleaner.clean_html}
+
+_ENTITY = re.compile(r"&(?:[a-zA-Z][a-zA-Z0-9]*|#[0-9]+|#[xX][0-9a-fA-F]+);")
+
+
+def measure(vacancies: List[dict], number: int = 10, repeat: int = 5) -> dict:
+    fields = [vacancy[field] for vacancy in vacancies for field in FIELDS]
+    result = {"input_kib_per_field": round(sum(map(len, fields)) / len(fields) / 1024, 2)}
+    for version, clean in VERSIONS.items():
+        texts = [clean(html) for html in fields]
+        result[version] = {
+            "ops_per_sec": round(ops_per_second(clean, fields, number, repeat), 1),
+            "chars": sum(map(len, texts)),
+            "tokens": sum(map(count_tokens, texts)),
+            "entities": sum(len(_ENTITY.findall(text)) for text in texts),
+        }
+    regex, converter = result["regex"], result["converter"]
+    result["speedup"] = round(converter["ops_per_sec"] / regex["ops_per_sec"], 2)
+    result["tokens_saved"] = round(1 - converter["tokens"] / regex["tokens"], 3)
+    return result
+
+
+def run(vacancies: int, paragraphs: List[int], number: int = 10, repeat: int = 5) -> Dict[int, dict]:
+    return {size: measure(make_vacancies(vacancies, size), number, repeat) for size in paragraphs}
+
+
+def print_results(results: Dict[int, dict]) -> None:
+    tokenizer = "tiktoken" if _get_encoding() is not None else "приблизительно, без tiktoken"
+    print(f"{'абзацев':<9}{'КиБ на поле':>12}{'regex, оп/с':>14}{'конвертер, оп/с':>17}{'ускорение':>11}"
+          f"{'токены regex':>14}{'конвертер':>11}{'экономия':>10}{'сущности':>10}")
+    for size, result in results.items():
+        regex, converter = result["regex"], result["converter"]
+        print(f"{size:<9}{result['input_kib_per_field']:>12}{regex['ops_per_sec']:>14}"
+              f"{converter['ops_per_sec']:>17}{result['speedup']:>10}x{regex['tokens']:>14}{converter['tokens']:>11}"
+              f"{result['tokens_saved']:>10.1%}{regex['entities']:>10}")
+    print(f"Токены: {tokenizer}; «сущности» — сколько &nbsp;, &laquo; и т. п. оставляет regex")
+
+
+def print_sample(vacancy: dict) -> None:
+    for version, clean in VERSIONS.items():
+        print(f"--- {version}")
+        for field in FIELDS:
+            print(clean(vacancy[field]))
+
+
+def main(argv=None) -> Dict[int, dict]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vacancies", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[6, 30, 300], help="абзацев в описании")
+    parser.add_argument("--number", type=int, default=10, help="проходов по корпусу в одном замере")
+    parser.add_argument("--repeat", type=int, default=5, help="замеров, из которых берётся лучший")
+    parser.add_argument("--show", action="store_true", help="напечатать вывод обоих вариантов для одной вакансии")
+    parser.add_argument("--json", help="сохранить результаты в файл JSON")
+    args = parser.parse_args(argv)
+
+    # Логирование очистки HTML не должно попадать в замер
+    logging.disable(logging.INFO)
+    results = run(args.vacancies, args.paragraphs, args.number, args.repeat)
+    print_results(results)
+    if args.show:
+        print_sample(make_vacancy(0, paragraphs=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Нагрузочный тест обработки вебхуков без внешних сервисов.
+
+Поднимает заглушки Huntflow и OpenAI с заданными задержками и долями ошибок, запускает приложение
+на uvicorn и отправляет подписанные вебхуки APPLICANT/STATUS с заданной частотой. По итогам выводит
+пропускную способность, перцентили задержки ответа на вебхук и сквозной задержки (от вебхука до перевода
+кандидата на этап) и число запросов к Huntflow и OpenAI на одну оценку.
+
+    python -m benchmarks.load_test --rate 20 --duration 30 --openai-latency 1.5 --huntflow-throttle-rate 0.05
+
+Настройки самого приложения (JOB_WORKERS, HUNTFLOW_RATE_LIMIT, WEBHOOK_EVALUATION_MODE и т. д.) берутся
+из окружения, как при обычном запуске. Очередь, кэши и хранилища работают в памяти.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_servers import FakeHuntflow, FakeOpenAI, FaultProfile
+from benchmarks.webhooks import applicant_status_webhook
+
+SECRET_KEY = "load-test-secret"
+FROM_STAGE = "Отклики"
+WEBHOOK_PATH = "/huntflow/webhook/applicant"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        name: None if value is None else round(value * 1000, 1)
+        for name, value in (("p50_ms", percentile(values, 0.5)), ("p95_ms", percentile(values, 0.95)),
+                            ("p99_ms", percentile(values, 0.99)), ("max_ms", max(values, default=None)))
+    }
+
+
+def configure_environment(huntflow: FakeHuntflow, openai: FakeOpenAI) -> None:
+    """
+    Направляет приложение на заглушки. Вызывается до импорта src.app: настройки читаются при импорте модулей.
+    """
+    os.environ.update({
+        "HUNTFLOW_BASE_URL": huntflow.url,
+        "HUNTFLOW_API_TOKEN": "fake-access",
+        "HUNTFLOW_REFRESH_TOKEN": "fake-refresh",
+        "HUNTFLOW_ACCOUNT_ID": "1",
+        "HUNTFLOW_FROM_STAGE": FROM_STAGE,
+        "SECRET_KEY": SECRET_KEY,
+        "OPENAI_BASE_URL": openai.url,
+        "CHATGPT_API_TOKEN": "fake",
+        "OPENAI_BACKEND": "openai",
+        "JOB_QUEUE_PATH": ":memory:",
+        "EVALUATION_CACHE_PATH": ":memory:",
+        "BATCH_STORE_PATH": ":memory:",
+    })
+    for name in ("DEDUP_STORE_PATH", "PRESCREEN_MODEL", "FALLBACK_MODEL", "TRACE_EXPORT_PATH"):
+        os.environ.pop(name, None)
+
+
+def start_app(port: int):
+    import uvicorn
+    from src.app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Приложение не запустилось")
+        time.sleep(0.05)
+    return server, thread
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def send_webhooks(app_url: str, rate: float, count: int, vacancies: int) -> Dict[int, dict]:
+    """
+    Отправляет count вебхуков с постоянной частотой rate (открытая модель нагрузки: следующий вебхук
+    не ждёт ответа на предыдущий). Возвращает результаты по ID кандидата.
+    """
+    results: Dict[int, dict] = {}
+
+    async def send(client: httpx.AsyncClient, applicant_id: int) -> None:
+        body, headers = applicant_status_webhook(
+            SECRET_KEY, applicant_id, vacancy_id=applicant_id % vacancies + 1, status_name=FROM_STAGE,
+            log_id=applicant_id,
+        )
+        started = time.perf_counter()
+        try:
+            response = await client.post(WEBHOOK_PATH, content=body, headers=headers)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        results[applicant_id] = {"sent": started, "latency": time.perf_counter() - started, "status": status}
+
+    limits = httpx.Limits(max_connections=256, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        tasks = []
+        for index in range(count):
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, index + 1)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def wait_for_evaluations(huntflow: FakeHuntflow, expected: int, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while len(huntflow.moved) < expected and time.perf_counter() < deadline:
+        time.sleep(0.05)
+
+
+def build_report(args, huntflow: FakeHuntflow, openai: FakeOpenAI, results: Dict[int, dict], elapsed: float) -> dict:
+    accepted = [applicant_id for applicant_id, result in results.items() if result["status"] == 202]
+    evaluated = [applicant_id for applicant_id in accepted if applicant_id in huntflow.moved]
+    end_to_end = [huntflow.moved[applicant_id] - results[applicant_id]["sent"] for applicant_id in evaluated]
+    finished = max((huntflow.moved[applicant_id] for applicant_id in evaluated), default=None)
+    first_sent = min((result["sent"] for result in results.values()), default=0.0)
+    evaluation_window = (finished - first_sent) if finished is not None else None
+
+    huntflow_calls = sum(huntflow.calls.values())
+    openai_calls = sum(1 for method, path in openai.requests if path.split("?")[0].endswith("/chat/completions"))
+    per_evaluation = max(1, len(evaluated))
+    statuses: Dict[str, int] = {}
+    for result in results.values():
+        statuses[str(result["status"])] = statuses.get(str(result["status"]), 0) + 1
+
+    return {
+        "config": {
+            "rate": args.rate,
+            "duration": args.duration,
+            "vacancies": args.vacancies,
+            "mode": os.getenv("WEBHOOK_EVALUATION_MODE") or "realtime",
+            "huntflow": asdict(huntflow.profile),
+            "openai": asdict(openai.profile),
+        },
+        "webhooks": {
+            "sent": len(results),
+            "statuses": statuses,
+            "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+            "latency": latency_summary([result["latency"] for result in results.values()]),
+        },
+        "evaluations": {
+            "completed": len(evaluated),
+            "pending": len(accepted) - len(evaluated),
+            "throughput_per_s": round(len(evaluated) / evaluation_window, 2) if evaluation_window else None,
+            "latency": latency_summary(end_to_end),
+        },
+        "upstream": {
+            "huntflow_calls": huntflow_calls,
+            "huntflow_calls_per_evaluation": round(huntflow_calls / per_evaluation, 2),
+            "huntflow_faults": dict(huntflow.faults),
+            "huntflow_endpoints": dict(sorted(huntflow.calls.items())),
+            "openai_calls": openai_calls,
+            "openai_calls_per_evaluation": round(openai_calls / per_evaluation, 2),
+            "openai_faults": dict(openai.faults),
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    webhooks, evaluations, upstream = report["webhooks"], report["evaluations"], report["upstream"]
+    print(f"Вебхуки:  отправлено {webhooks['sent']}, ответы {webhooks['statuses']}, "
+          f"{webhooks['throughput_rps']} в секунду")
+    print(f"          задержка ответа {webhooks['latency']}")
+    print(f"Оценки:   выполнено {evaluations['completed']}, не дождались {evaluations['pending']}, "
+          f"{evaluations['throughput_per_s']} в секунду")
+    print(f"          сквозная задержка {evaluations['latency']}")
+    print(f"Huntflow: {upstream['huntflow_calls']} запросов, {upstream['huntflow_calls_per_evaluation']} на оценку, "
+          f"отказы {upstream['huntflow_faults']}")
+    for endpoint, calls in upstream["huntflow_endpoints"].items():
+        print(f"          {endpoint}: {calls}")
+    print(f"OpenAI:   {upstream['openai_calls']} запросов, {upstream['openai_calls_per_evaluation']} на оценку, "
+          f"отказы {upstream['openai_faults']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=10, help="вебхуков в секунду")
+    parser.add_argument("--duration", type=float, default=10, help="длительность подачи нагрузки, секунд")
+    parser.add_argument("--vacancies", type=int, default=5, help="число разных вакансий в вебхуках")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="сколько ждать завершения оценок")
+    parser.add_argument("--experience", type=int, default=8, help="мест работы в каждом резюме")
+    for upstream, latency in (("huntflow", 0.05), ("openai", 1.0)):
+        parser.add_argument(f"--{upstream}-latency", type=float, default=latency)
+        parser.add_argument(f"--{upstream}-jitter", type=float, help="разброс задержки (по умолчанию — половина)")
+        parser.add_argument(f"--{upstream}-error-rate", type=float, default=0.0, help="доля ответов 500")
+        parser.add_argument(f"--{upstream}-throttle-rate", type=float, default=0.0, help="доля ответов 429")
+        parser.add_argument(f"--{upstream}-retry-after", type=float, default=1.0)
+    parser.add_argument("--json", help="сохранить отчёт в файл JSON (для сравнения прогонов в CI)")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def profile_from_args(args, upstream: str) -> FaultProfile:
+    latency = getattr(args, f"{upstream}_latency")
+    jitter = getattr(args, f"{upstream}_jitter")
+    return FaultProfile(
+        latency=latency,
+        jitter=latency / 2 if jitter is None else jitter,
+        error_rate=getattr(args, f"{upstream}_error_rate"),
+        throttle_rate=getattr(args, f"{upstream}_throttle_rate"),
+        retry_after=getattr(args, f"{upstream}_retry_after"),
+    )
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    count = max(1, int(args.rate * args.duration))
+
+    with FakeHuntflow(profile_from_args(args, "huntflow"), experience=args.experience) as huntflow, \
+            FakeOpenAI(profile_from_args(args, "openai")) as openai:
+        configure_environment(huntflow, openai)
+        port = free_port()
+        server, thread = start_app(port)
+        logging.getLogger().setLevel(args.log_level)
+        try:
+            started = time.perf_counter()
+            results = asyncio.run(send_webhooks(f"http://127.0.0.1:{port}", args.rate, count, args.vacancies))
+            elapsed = time.perf_counter() - started
+            wait_for_evaluations(huntflow, sum(1 for result in results.values() if result["status"] == 202),
+                                 args.drain_timeout)
+            report = build_report(args, huntflow, openai, results, elapsed)
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    report = main()
+    sys.exit(0 if report["evaluations"]["pending"] == 0 else 1)
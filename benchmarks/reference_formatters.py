@@ -0,0 +1,127 @@
+"""
+Исходные реализации форматтеров резюме и вакансий — эталон, с которым бенчмарк и тесты сверяют
+оптимизированные версии из src.service.formatting (вывод должен совпадать байт в байт).
+clean_html — исходная очистка HTML регулярным выражением: с ней бенчмарк benchmarks.html_to_text сравнивает
+скорость конвертера HTML в текст, а format_vacancy сверяется с текущей версией при одинаковой очистке.
+"""
+import re
+
+from src.service.formatting.resume_formatter import (
+    _omit_description,
+    _summarize_description,
+    format_date,
+    rank_experience,
+)
+from src.service.formatting.token_budget import count_tokens, truncate_to_tokens
+from src.service.formatting.vacancy_formatter import _render_vacancy
+
+
+def clean_html(raw_html: str) -> str:
+    clean_re = re.compile('<.*?>')
+    return re.sub(clean_re, '', raw_html).strip()
+
+
+def format_experience(exp_list: list) -> str:
+    result = ""
+    for exp in exp_list:
+        start = format_date(exp.get('date_from', {}))
+        end = format_date(exp.get('date_to', {}))
+        company = exp.get('company', 'Не указана')
+        position = exp.get('position', 'Не указана')
+        description = (exp.get('description') or '').strip()
+
+        result += f"{start} — {end}\n"
+        result += f"Компания: {company}\n"
+        result += f"Должность: {position}\n"
+        result += f"Описание:\n{description}\n\n"
+    return result
+
+
+def format_education(education: dict) -> str:
+    result = ""
+    higher = education.get('higher', [])
+    for edu in higher:
+        name = edu.get('name', '')
+        faculty = edu.get('faculty', '')
+        start = format_date(edu.get('date_from', {}))
+        end = format_date(edu.get('date_to', {}))
+        result += f"{name} ({faculty}, {start} - {end})\n"
+    return result
+
+
+def format_resume(unified_resume: dict, token_budget: int = 3000, relevance_terms=None) -> str:
+    if unified_resume is None:
+        return ""
+
+    formatted_resume = _render_resume(unified_resume, unified_resume.get('experience', []))
+    tokens_before = count_tokens(formatted_resume)
+    if not token_budget or tokens_before <= token_budget:
+        return formatted_resume
+
+    experience = [dict(exp) for exp in unified_resume.get('experience', [])]
+    order = rank_experience(experience, relevance_terms)
+    tokens_after = tokens_before
+    for shorten in (_summarize_description, _omit_description):
+        for index in order:
+            description = (experience[index].get('description') or '').strip()
+            shortened = shorten(description) if description else description
+            if shortened == description:
+                continue
+            experience[index]['description'] = shortened
+            formatted_resume = _render_resume(unified_resume, experience)
+            tokens_after = count_tokens(formatted_resume)
+            if tokens_after <= token_budget:
+                break
+        if tokens_after <= token_budget:
+            break
+
+    if tokens_after > token_budget:
+        formatted_resume = truncate_to_tokens(formatted_resume, token_budget)
+    return formatted_resume
+
+
+def _render_resume(unified_resume: dict, exp_list: list) -> str:
+    position = unified_resume.get('position', '')
+    wanted_salary = unified_resume.get('wanted_salary', {})
+    salary_amount = wanted_salary.get('amount', '')
+    salary_currency = wanted_salary.get('currency', '')
+    skills = unified_resume.get('skill_set', [])
+    experience_str = format_experience(exp_list)
+    education = unified_resume.get('education', {})
+    education_str = format_education(education)
+
+    formatted_resume = f"""
+        Позиция: {position}
+        Зарплатные ожидание: {salary_amount} + {salary_currency}
+
+        Навыки: {", ".join(skills)}
+
+        Опыт работы: 
+        {experience_str}
+
+        Образование:
+        {education_str}
+    """
+    return formatted_resume
+
+
+def format_vacancy(vacancy: dict, token_budget: int = 2000, clean=clean_html) -> str:
+    position = vacancy.get('position', 'Не указана должность')
+    money = vacancy.get('money') or 'Не указана'
+
+    description = clean(vacancy.get('body', ''))
+    requirements = clean(vacancy.get('requirements', ''))
+    conditions = clean(vacancy.get('conditions', ''))
+
+    formatted_description = _render_vacancy(position, money, description, requirements, conditions)
+    tokens_after = count_tokens(formatted_description)
+    if token_budget and tokens_after > token_budget:
+        sections = {"description": description, "requirements": requirements, "conditions": conditions}
+        for name in ("conditions", "description", "requirements"):
+            excess = tokens_after - token_budget
+            sections[name] = truncate_to_tokens(sections[name], max(0, count_tokens(sections[name]) - excess))
+            formatted_description = _render_vacancy(position, money, **sections)
+            tokens_after = count_tokens(formatted_description)
+            if tokens_after <= token_budget:
+                break
+    return formatted_description
@@ -0,0 +1,42 @@
+"""
+Вебхуки Huntflow с подписью X-Huntflow-Signature (HMAC-SHA256 тела запроса ключом SECRET_KEY).
+"""
+import hashlib
+import hmac
+import json
+from typing import Dict, Tuple
+
+
+def sign(secret_key: str, body: bytes) -> str:
+    return hmac.new(secret_key.encode("utf-8"), body, digestmod=hashlib.sha256).hexdigest()
+
+
+def applicant_status_webhook(
+        secret_key: str,
+        applicant_id: int,
+        vacancy_id: int,
+        status_name: str,
+        log_id: int,
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Тело и заголовки вебхука APPLICANT о переводе кандидата на этап status_name (applicant_log типа STATUS).
+    """
+    payload = {
+        "event": {
+            "applicant": {"id": applicant_id},
+            "applicant_log": {
+                "id": log_id,
+                "type": "STATUS",
+                "status": {"name": status_name},
+                "vacancy": {"id": vacancy_id},
+            },
+        },
+        "meta": {"webhook_action": "STATUS"},
+    }
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-Huntflow-Event": "APPLICANT",
+        "X-Huntflow-Signature": sign(secret_key, body),
+    }
+    return body, headers
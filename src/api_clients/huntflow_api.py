@@ -1,61 +1,144 @@
 import logging
 import os
+import time
 from typing import Optional, List, Dict, Any
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from src.config.env_updater import update_and_reload_env
+from src.api_clients.huntflow_credentials import CredentialManager, EnvPersister
+from src.api_clients.huntflow_limits import REQUEST_DURATION, RateLimiter, RequestStats, RetryPolicy, endpoint_name
+from src.observability.metrics import ERRORS, histogram
+from src.observability.tracing import start_span, traced
 
 HUNTFLOW_BASE_URL = os.getenv('HUNTFLOW_BASE_URL')
 HUNTFLOW_API_TOKEN = os.getenv('HUNTFLOW_API_TOKEN')
 HUNTFLOW_REFRESH_TOKEN = os.getenv('HUNTFLOW_REFRESH_TOKEN')
 HUNTFLOW_ACCOUNT_ID = os.getenv('HUNTFLOW_ACCOUNT_ID')
+HUNTFLOW_TOKEN_EXPIRES_AT = os.getenv('HUNTFLOW_TOKEN_EXPIRES_AT')
+HUNTFLOW_MAX_CONNECTIONS = int(os.getenv('HUNTFLOW_MAX_CONNECTIONS') or 10)
+HUNTFLOW_CONNECT_TIMEOUT = float(os.getenv('HUNTFLOW_CONNECT_TIMEOUT') or 5)
+HUNTFLOW_READ_TIMEOUT = float(os.getenv('HUNTFLOW_READ_TIMEOUT') or 30)
+
+STATUS_UPDATE_DURATION = histogram("huntflow_status_update_seconds", "Перевод кандидата на этап (update_applicant_status)")
 
 headers = {
     'Authorization': f'Bearer {HUNTFLOW_API_TOKEN}',
     'Content-Type': 'application/json'
 }
 
-session = requests.Session()
-session.headers.update(headers)
 
 
-def refresh_access_token() -> Optional[str]:
-    refresh_url = f"{HUNTFLOW_BASE_URL}/token/refresh"
-    payload = {"refresh_token": HUNTFLOW_REFRESH_TOKEN}
-    try:
-        response = session.post(
-            refresh_url,
-            json=payload,
-            headers={'Content-Type': 'application/json'}
-        )
-        response.raise_for_status()
-        data = response.json()
-        new_access_token = data.get('access_token')
-        new_refresh_token = data.get('refresh_token')
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter с таймаутами по умолчанию: requests сам по себе ждёт ответа бесконечно.
+    """
 
-        if new_access_token and new_refresh_token:
-            session.headers['Authorization'] = f'Bearer {new_access_token}'
+    def __init__(self, *args, timeout=(HUNTFLOW_CONNECT_TIMEOUT, HUNTFLOW_READ_TIMEOUT), **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
 
-            update_and_reload_env('HUNTFLOW_API_TOKEN', new_access_token)
-            update_and_reload_env('HUNTFLOW_REFRESH_TOKEN', new_refresh_token)
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
 
-            logging.info('Tokens successfully refreshed.')
-            return new_access_token
-        else:
-            logging.error('Failed to obtain new tokens from the response.')
-            return None
-    except requests.RequestException as e:
-        logging.error(f"Error refreshing tokens: {e}")
-        return None
+
+session = requests.Session()
+session.headers.update(headers)
+_adapter = TimeoutHTTPAdapter(pool_connections=1, pool_maxsize=HUNTFLOW_MAX_CONNECTIONS)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
+# Токены общие для всех потоков: обновляются одним запросом на всех
+credentials = CredentialManager(
+    HUNTFLOW_API_TOKEN,
+    HUNTFLOW_REFRESH_TOKEN,
+    expires_at=float(HUNTFLOW_TOKEN_EXPIRES_AT) if HUNTFLOW_TOKEN_EXPIRES_AT else None,
+    persister=EnvPersister(),
+)
+# Лимиты и статистика также общие: Huntflow ограничивает запросы на аккаунт, а не на соединение
+rate_limiter = RateLimiter()
+retry_policy = RetryPolicy()
+request_stats = RequestStats()
+
+
+def request_new_tokens(refresh_token: str) -> Dict[str, Any]:
+    response = session.post(
+        f"{HUNTFLOW_BASE_URL}/token/refresh",
+        json={"refresh_token": refresh_token},
+        headers={'Content-Type': 'application/json'}
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def refresh_access_token(stale_token: Optional[str] = None, proactive: bool = False) -> Optional[str]:
+    """
+    Обновляет токены. Если передан stale_token и его уже заменил другой поток, возвращает актуальный токен без запроса.
+    """
+    new_access_token = credentials.refresh(request_new_tokens, stale_token, proactive)
+    if new_access_token:
+        session.headers['Authorization'] = f'Bearer {new_access_token}'
+    return new_access_token
 
 
 def send_request(method: str, url: str, **kwargs) -> requests.Response:
     """
-    Универсальная функция отправки HTTP-запросов, которая при получении 401 с detail "token_expired"
-    пытается обновить токен и повторить запрос.
+    Универсальная функция отправки HTTP-запросов. Запросы проходят через общий rate limiter;
+    идемпотентные запросы повторяются при 429/5xx и сетевых ошибках с экспоненциальной задержкой.
     """
-    response = session.request(method, url, **kwargs)
+    endpoint = endpoint_name(method, url)
+    with start_span("huntflow", endpoint=endpoint) as span:
+        response = _send_with_retries(method, url, endpoint, **kwargs)
+        span.set_attribute("status_code", response.status_code)
+        return response
+
+
+def _send_with_retries(method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+    attempt = 0
+    while True:
+        request_stats.record(endpoint, "wait", rate_limiter.acquire())
+        request_stats.record(endpoint, "requests")
+        started = time.perf_counter()
+        try:
+            response = _send_authorized(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - started)
+            ERRORS.labels("huntflow").inc()
+            request_stats.record(endpoint, "errors")
+            if not retry_policy.should_retry(method, attempt):
+                raise
+            delay = retry_policy.delay(attempt)
+            logging.warning(f"{endpoint} failed ({e}), retrying in {delay:.2f}s.")
+        else:
+            REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - started)
+            retry_after = rate_limiter.on_response(response.status_code, response.headers)
+            if response.status_code == 429:
+                request_stats.record(endpoint, "throttled")
+            if response.status_code < 400 or not retry_policy.should_retry(method, attempt, response.status_code):
+                if response.status_code >= 400:
+                    ERRORS.labels("huntflow").inc()
+                    request_stats.record(endpoint, "errors")
+                response.raise_for_status()
+                return response
+            delay = retry_policy.delay(attempt, retry_after)
+            logging.warning(f"{endpoint} returned {response.status_code}, retrying in {delay:.2f}s.")
+
+        request_stats.record(endpoint, "retries")
+        attempt += 1
+        time.sleep(delay)
+
+
+def _send_authorized(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Отправляет запрос с актуальным токеном; при получении 401 с detail "token_expired"
+    обновляет токен и повторяет запрос.
+    """
+    if credentials.needs_refresh():
+        refresh_access_token(credentials.access_token, proactive=True)
+    used_token = credentials.access_token
+    response = session.request(method, url, **_with_token(kwargs, used_token))
     if response.status_code == 401:
         try:
             error = response.json().get("errors", [{}])[0]
@@ -63,12 +146,16 @@ def send_request(method: str, url: str, **kwargs) -> requests.Response:
             error = {}
         if error.get("detail") == "token_expired":
             logging.info("Token expired. Refreshing token...")
-            if refresh_access_token():
-                response = session.request(method, url, **kwargs)
-    response.raise_for_status()
+            new_access_token = refresh_access_token(used_token)
+            if new_access_token:
+                response = session.request(method, url, **_with_token(kwargs, new_access_token))
     return response
 
 
+def _with_token(kwargs: Dict[str, Any], token: Optional[str]) -> Dict[str, Any]:
+    return {**kwargs, 'headers': {**(kwargs.get('headers') or {}), 'Authorization': f'Bearer {token}'}}
+
+
 def create_applicant(applicant_data: Dict[str, Any]) -> Optional[int]:
     url = f"{HUNTFLOW_BASE_URL}/accounts/{HUNTFLOW_ACCOUNT_ID}/applicants"
     try:
@@ -82,15 +169,6 @@ def create_applicant(applicant_data: Dict[str, Any]) -> Optional[int]:
         return None
 
 
-def get_status_id_by_name(status_name: str):
-    statuses = get_statuses()
-    status_info = next(
-        (status for status in statuses if status.get("name", "").lower() == status_name.lower()),
-        None
-    )
-    return status_info.get('id') if status_info else None
-
-
 def get_vacancies(
         state: str = "OPEN",
         count: int = 50,
@@ -117,12 +195,14 @@ def get_vacancy(vacancy_id):
         return None
 
 
+@traced()
 def update_applicant_status(applicant_id: int, target_status_id: int, vacancy_id: int, comment: str) -> Optional[
     Dict[str, Any]]:
     params = {"status": target_status_id, "vacancy": vacancy_id, "comment": comment}
     url = f"{HUNTFLOW_BASE_URL}/accounts/{HUNTFLOW_ACCOUNT_ID}/applicants/{applicant_id}/vacancy"
     try:
-        response = send_request("PUT", url, json=params)
+        with STATUS_UPDATE_DURATION.time():
+            response = send_request("PUT", url, json=params)
         data = response.json()
         logging.info(f"Updated applicant {applicant_id} to status {target_status_id}.")
         return data
@@ -164,7 +244,7 @@ def get_vacancy_desc(vacancy_id):
         return response.json()
     except requests.RequestException as e:
         logging.error(f"Error fetching vacancy description: {e}")
-        return []
+        raise
 
 
 def get_resume(applicant_id, external_id):
@@ -174,7 +254,7 @@ def get_resume(applicant_id, external_id):
         return response.json()
     except requests.RequestException as e:
         logging.error(f"Error fetching resume: {e}")
-        return []
+        raise
 
 
 def get_applicant(applicant_id):
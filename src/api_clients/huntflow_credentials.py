@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from src.config.env_updater import ENV_PATH, write_env_atomic
+
+HUNTFLOW_TOKEN_REFRESH_MARGIN = float(os.getenv('HUNTFLOW_TOKEN_REFRESH_MARGIN') or 300)
+HUNTFLOW_TOKEN_REFRESH_RETRY_INTERVAL = float(os.getenv('HUNTFLOW_TOKEN_REFRESH_RETRY_INTERVAL') or 30)
+
+TokenRequester = Callable[[str], Dict[str, Any]]
+
+
+class EnvPersister:
+    """
+    Сохраняет обновлённые токены в .env в фоновом потоке, не задерживая запросы.
+    Файл заменяется атомарно; если за время записи токены успели обновиться ещё раз,
+    записываются только последние значения.
+    """
+
+    def __init__(self, env_path: Path = ENV_PATH):
+        self.env_path = Path(env_path)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="env-persister")
+        self._future = None
+
+    def schedule(self, values: Dict[str, str]) -> None:
+        os.environ.update(values)
+        with self._lock:
+            self._pending.update(values)
+            if self._future is None or self._future.done():
+                self._future = self._executor.submit(self._flush)
+
+    def wait(self) -> None:
+        with self._lock:
+            future = self._future
+        if future is not None:
+            future.result()
+
+    def _flush(self) -> None:
+        with self._lock:
+            values, self._pending = self._pending, {}
+        if not values:
+            return
+        if not self.env_path.exists():
+            logging.warning(f".env not found, tokens are not persisted: {self.env_path}")
+            return
+        try:
+            write_env_atomic(self.env_path, values)
+        except OSError as e:
+            logging.error(f"Error persisting tokens to {self.env_path}: {e}")
+
+
+class CredentialManager:
+    """
+    Хранит токены Huntflow в памяти и обновляет их в единственном экземпляре:
+    пока идёт обновление, остальные потоки ждут его результата, а запросы,
+    получившие 401 со старым токеном, просто берут уже обновлённый.
+    Если известен срок жизни токена, он обновляется заранее — за refresh_margin секунд до истечения.
+    После неудачного обновления следующая попытка делается не раньше чем через retry_interval секунд,
+    а до тех пор (пока токен не истёк) запросы идут с текущим токеном.
+    """
+
+    def __init__(
+            self,
+            access_token: Optional[str],
+            refresh_token: Optional[str],
+            expires_at: Optional[float] = None,
+            refresh_margin: float = HUNTFLOW_TOKEN_REFRESH_MARGIN,
+            persister: Optional[EnvPersister] = None,
+            retry_interval: float = HUNTFLOW_TOKEN_REFRESH_RETRY_INTERVAL,
+    ):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.refresh_margin = refresh_margin
+        self.persister = persister
+        self.retry_interval = retry_interval
+        self._next_attempt_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"refreshes": 0, "proactive_refreshes": 0, "coalesced": 0, "failures": 0}
+
+    def needs_refresh(self) -> bool:
+        if self.expires_at is None:
+            return False
+        now = time.time()
+        if now >= self.expires_at:
+            return True
+        return now >= self.expires_at - self.refresh_margin and now >= self._next_attempt_at
+
+    def refresh(
+            self,
+            requester: TokenRequester,
+            stale_token: Optional[str] = None,
+            proactive: bool = False,
+    ) -> Optional[str]:
+        """
+        Обновляет токены через requester(refresh_token) -> ответ /token/refresh.
+        stale_token — токен, с которым вызывающий получил отказ: если он уже заменён, повторного обновления не будет.
+        """
+        with self._lock:
+            if self._already_refreshed(stale_token) or (proactive and not self.needs_refresh()):
+                self._stats["coalesced"] += 1
+                return self.access_token
+            try:
+                data = requester(self.refresh_token)
+            except Exception as e:
+                return self._refresh_failed(e)
+            return self._apply(data, proactive)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["expires_in"] = round(self.expires_at - time.time(), 1) if self.expires_at is not None else None
+        return stats
+
+    def _already_refreshed(self, stale_token: Optional[str]) -> bool:
+        return stale_token is not None and stale_token != self.access_token and not self.needs_refresh()
+
+    def _refresh_failed(self, error: Exception) -> Optional[str]:
+        self._stats["failures"] += 1
+        self._next_attempt_at = time.time() + self.retry_interval
+        logging.error(f"Error refreshing tokens: {error}")
+        return None
+
+    def _apply(self, data: Dict[str, Any], proactive: bool) -> Optional[str]:
+        new_access_token = data.get('access_token')
+        new_refresh_token = data.get('refresh_token')
+        if not (new_access_token and new_refresh_token):
+            return self._refresh_failed(ValueError('Failed to obtain new tokens from the response.'))
+
+        self.access_token = new_access_token
+        self.refresh_token = new_refresh_token
+        expires_in = data.get('expires_in')
+        self.expires_at = time.time() + float(expires_in) if expires_in else None
+        self._next_attempt_at = 0.0
+        self._stats["refreshes"] += 1
+        if proactive:
+            self._stats["proactive_refreshes"] += 1
+
+        if self.persister is not None:
+            values = {'HUNTFLOW_API_TOKEN': new_access_token, 'HUNTFLOW_REFRESH_TOKEN': new_refresh_token}
+            if self.expires_at is not None:
+                values['HUNTFLOW_TOKEN_EXPIRES_AT'] = str(int(self.expires_at))
+            self.persister.schedule(values)
+
+        logging.info('Tokens successfully refreshed.')
+        return new_access_token
@@ -0,0 +1,192 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+from src.observability.metrics import histogram
+
+HUNTFLOW_RATE_LIMIT = float(os.getenv('HUNTFLOW_RATE_LIMIT') or 10)
+HUNTFLOW_RATE_BURST = int(os.getenv('HUNTFLOW_RATE_BURST') or HUNTFLOW_RATE_LIMIT)
+HUNTFLOW_MIN_RATE_LIMIT = float(os.getenv('HUNTFLOW_MIN_RATE_LIMIT') or 1)
+HUNTFLOW_MAX_RETRIES = int(os.getenv('HUNTFLOW_MAX_RETRIES') or 3)
+HUNTFLOW_RETRY_BACKOFF = float(os.getenv('HUNTFLOW_RETRY_BACKOFF') or 0.5)
+HUNTFLOW_RETRY_BACKOFF_MAX = float(os.getenv('HUNTFLOW_RETRY_BACKOFF_MAX') or 30)
+
+# Повторяем только запросы без побочных эффектов: PUT в Huntflow (смена этапа с комментарием)
+# при повторе добавил бы кандидату ещё одну запись в историю. Такие запросы повторит очередь задач.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Длительность одной попытки запроса по эндпоинтам
+REQUEST_DURATION = histogram("huntflow_request_duration_seconds", "Запросы к Huntflow API", ("endpoint",))
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+_EXTERNAL_SEGMENT = re.compile(r"/externals/[^/]+")
+
+
+class RateLimiter:
+    """
+    Token bucket, общий для всех запросов к Huntflow. Скорость подстраивается под ответы сервера:
+    на 429 она уменьшается вдвое (и все запросы ждут Retry-After), после успешных ответов
+    постепенно возвращается к исходной.
+    """
+
+    def __init__(
+            self,
+            rate: float = HUNTFLOW_RATE_LIMIT,
+            burst: int = HUNTFLOW_RATE_BURST,
+            min_rate: float = HUNTFLOW_MIN_RATE_LIMIT,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """
+        Забирает токен и возвращает, сколько секунд нужно подождать перед запросом (ждёт acquire).
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_response(self, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Учитывает ответ сервера. Возвращает паузу из Retry-After / X-RateLimit-Reset, если сервер её задал.
+        """
+        pause = retry_after_seconds(headers)
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        with self._lock:
+            if status_code == 429:
+                self.rate = max(self.min_rate, self.rate / 2)
+                logging.warning(f"Huntflow rate limit hit, slowing down to {self.rate:.2f} req/s.")
+            elif status_code < 400 and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+            if remaining is not None and remaining <= 0 and pause is None:
+                pause = _reset_seconds(headers)
+            if pause is not None and (status_code == 429 or remaining is not None and remaining <= 0):
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+        return pause
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 2),
+                "max_rate": self.max_rate,
+                "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            }
+
+
+class RetryPolicy:
+    def __init__(
+            self,
+            max_retries: int = HUNTFLOW_MAX_RETRIES,
+            backoff: float = HUNTFLOW_RETRY_BACKOFF,
+            backoff_max: float = HUNTFLOW_RETRY_BACKOFF_MAX,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def should_retry(self, method: str, attempt: int, status_code: Optional[int] = None) -> bool:
+        """
+        status_code=None — сетевая ошибка (соединение, таймаут).
+        """
+        if attempt >= self.max_retries or method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return status_code is None or status_code in RETRYABLE_STATUSES
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Экспоненциальная задержка с разбросом ±20%, чтобы повторы разных потоков не совпадали по времени.
+        Retry-After от сервера имеет приоритет.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return min(self.backoff_max, self.backoff * 2 ** attempt) * random.uniform(0.8, 1.2)
+
+
+class RequestStats:
+    """
+    Счётчики запросов к Huntflow по эндпоинтам: сколько было запросов, повторов, ответов 429
+    и сколько времени запросы ждали в rate limiter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(lambda: {"requests": 0, "retries": 0, "throttled": 0, "errors": 0, "wait": 0.0})
+
+    def record(self, endpoint: str, field: str, value: float = 1) -> None:
+        with self._lock:
+            self._endpoints[endpoint][field] += value
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                endpoint: {**counters, "wait": round(counters["wait"], 3)}
+                for endpoint, counters in sorted(self._endpoints.items())
+            }
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """
+    Имя эндпоинта для статистики: ID в пути заменяются на {id}.
+    """
+    path = _EXTERNAL_SEGMENT.sub("/externals/{id}", urlsplit(url).path)
+    return f"{method.upper()} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    X-RateLimit-Reset бывает как числом секунд до сброса, так и unix-временем сброса.
+    """
+    reset = _header_float(headers, "X-RateLimit-Reset")
+    if reset is None:
+        return None
+    if reset > 10 ** 9:
+        reset -= time.time()
+    return max(0.0, reset)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,394 @@
+import abc
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+import httpx
+from openai import OpenAI
+
+from src.api_clients.openai_scheduler import (
+    OPENAI_EXPECTED_COMPLETION_TOKENS,
+    PRIORITY_REALTIME,
+    QueueDeadlineExceeded,
+    estimate_tokens,
+    get_scheduler,
+)
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.llm_answer import LLMAnswer
+from src.model.target_stage import TargetStage
+from src.observability.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT") or 60)
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT") or 5)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS") or 20)
+LLM_HEALTH_CHECK_INTERVAL = float(os.getenv("LLM_HEALTH_CHECK_INTERVAL") or 60)
+LLM_HEALTH_CHECK_TIMEOUT = float(os.getenv("LLM_HEALTH_CHECK_TIMEOUT") or 5)
+# Вес последнего запроса в скользящей средней задержки
+LATENCY_EWMA_ALPHA = 0.2
+
+T = TypeVar("T")
+
+
+class BackendStats:
+    """
+    Задержка и доля успешных запросов бэкенда — по ним выбирается, куда отправлять запросы.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.latency_total = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.healthy: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+
+    def record(self, latency: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self.requests += 1
+            self.latency_total += latency
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+            if error is not None:
+                self.failures += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+
+    def record_health(self, healthy: bool) -> None:
+        with self._lock:
+            self.healthy = healthy
+            self.checked_at = time.time()
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        with self._lock:
+            return (self.requests - self.failures) / self.requests if self.requests else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        success_rate = self.success_rate
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "success_rate": round(success_rate, 3) if success_rate is not None else None,
+                "avg_latency": round(self.latency_total / self.requests, 3) if self.requests else None,
+                "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                "last_error": self.last_error,
+                "healthy": self.healthy,
+                "checked_at": self.checked_at,
+            }
+
+
+class LLMBackend(abc.ABC):
+    """
+    Модель, которой можно отправить запрос со структурированным ответом. Подклассы реализуют _parse и _ping;
+    учёт задержек, ошибок и состояния ведётся здесь.
+    """
+
+    # Проверять ли доступность бэкенда в фоне (см. HealthMonitor)
+    monitored = True
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+        self.stats = BackendStats()
+
+    def parse(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            response_format: Type[T],
+            priority: int = PRIORITY_REALTIME,
+            completion_tokens: int = OPENAI_EXPECTED_COMPLETION_TOKENS,
+            timeout: Optional[float] = None,
+            expires: Optional[float] = None,
+    ) -> T:
+        """
+        Запрос со структурированным ответом. timeout (секунды от вызова) или expires (срок по time.monotonic())
+        ограничивают время запроса вместе с ожиданием в очереди, если они короче настроенного для бэкенда.
+        """
+        started = time.monotonic()
+        if timeout is not None:
+            expires = min(expires, started + timeout) if expires is not None else started + timeout
+        try:
+            with start_span("llm.attempt", backend=self.name, model=self.model):
+                result = self._parse(system_prompt, user_prompt, response_format, priority, completion_tokens,
+                                     expires)
+        except Exception as e:
+            self.stats.record(time.monotonic() - started, e)
+            raise
+        self.stats.record(time.monotonic() - started)
+        if isinstance(result, LLMAnswer):
+            result.mark_answered_by(self.model)
+        return result
+
+    def stream(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            response_format: Type[T],
+            on_delta: Callable[[str], None],
+            priority: int = PRIORITY_REALTIME,
+            completion_tokens: int = OPENAI_EXPECTED_COMPLETION_TOKENS,
+            timeout: Optional[float] = None,
+            expires: Optional[float] = None,
+    ) -> T:
+        """
+        То же, что parse, но фрагменты ответа передаются в on_delta по мере генерации. Бэкенд без потоковой
+        выдачи передаёт весь ответ одним фрагментом.
+        """
+        started = time.monotonic()
+        if timeout is not None:
+            expires = min(expires, started + timeout) if expires is not None else started + timeout
+        try:
+            with start_span("llm.attempt", backend=self.name, model=self.model, stream=True):
+                result = self._stream(system_prompt, user_prompt, response_format, on_delta, priority,
+                                      completion_tokens, expires)
+        except Exception as e:
+            self.stats.record(time.monotonic() - started, e)
+            raise
+        self.stats.record(time.monotonic() - started)
+        if isinstance(result, LLMAnswer):
+            result.mark_answered_by(self.model)
+        return result
+
+    def health_check(self) -> bool:
+        try:
+            healthy = self._ping()
+        except Exception as e:
+            logger.warning("Бэкенд %s (%s) недоступен: %s", self.name, self.model, e)
+            healthy = False
+        self.stats.record_health(healthy)
+        return healthy
+
+    @property
+    def available(self) -> bool:
+        # Бэкенд, который ещё не проверялся, считается доступным
+        return self.stats.healthy is not False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"model": self.model, **self.stats.get_stats()}
+
+    @abc.abstractmethod
+    def _parse(self, system_prompt, user_prompt, response_format, priority, completion_tokens, expires):
+        ...
+
+    def _stream(self, system_prompt, user_prompt, response_format, on_delta, priority, completion_tokens, expires):
+        result = self._parse(system_prompt, user_prompt, response_format, priority, completion_tokens, expires)
+        on_delta(result.model_dump_json() if hasattr(result, "model_dump_json") else str(result))
+        return result
+
+    @abc.abstractmethod
+    def _ping(self) -> bool:
+        ...
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    OpenAI API или совместимый с ним сервер (llama.cpp, vLLM) по base_url. Клиент и его пул соединений
+    создаются один раз и переиспользуются. Запросы к OpenAI (scheduled=True) проходят через планировщик
+    с бюджетами RPM/TPM; у локального сервера таких лимитов нет, и запросы идут напрямую.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            model: str,
+            base_url: Optional[str] = None,
+            api_key: Optional[str] = None,
+            timeout: float = LLM_TIMEOUT,
+            scheduled: Optional[bool] = None,
+            client_factory: Optional[Callable[[], Optional[OpenAI]]] = None,
+            on_usage: Optional[Callable[[Any], None]] = None,
+    ):
+        super().__init__(name, model)
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.scheduled = (base_url is None or "api.openai.com" in base_url) if scheduled is None else scheduled
+        # Доступность OpenAI видна по результатам запросов, а лишние запросы расходуют лимит RPM
+        self.monitored = not self.scheduled
+        self.on_usage = on_usage
+        self._client_factory = client_factory or self._create_client
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> Optional[OpenAI]:
+        return self._client_factory()
+
+    def _create_client(self) -> OpenAI:
+        with self._client_lock:
+            if getattr(self, "_client", None) is None:
+                self._client = OpenAI(
+                    # Локальные серверы обычно не проверяют ключ, но SDK требует непустой
+                    api_key=self.api_key or "local",
+                    base_url=self.base_url,
+                    max_retries=0,
+                    timeout=httpx.Timeout(self.timeout, connect=LLM_CONNECT_TIMEOUT),
+                    http_client=httpx.Client(limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                    )),
+                )
+            return self._client
+
+    def _parse(self, system_prompt, user_prompt, response_format, priority, completion_tokens, expires):
+        def call(client):
+            return client.beta.chat.completions.parse(
+                model=self.model,
+                messages=_messages(system_prompt, user_prompt),
+                response_format=response_format,
+            )
+
+        return self._request(call, system_prompt, user_prompt, response_format, priority, completion_tokens, expires)
+
+    def _stream(self, system_prompt, user_prompt, response_format, on_delta, priority, completion_tokens, expires):
+        def call(client):
+            with client.beta.chat.completions.stream(
+                    model=self.model,
+                    messages=_messages(system_prompt, user_prompt),
+                    response_format=response_format,
+                    stream_options={"include_usage": True},
+            ) as stream:
+                for event in stream:
+                    if event.type == "content.delta":
+                        on_delta(event.delta)
+                return stream.get_final_completion()
+
+        return self._request(call, system_prompt, user_prompt, response_format, priority, completion_tokens, expires)
+
+    def _request(self, call, system_prompt, user_prompt, response_format, priority, completion_tokens, expires):
+        def request():
+            # Остаток срока считается после пропуска очередью, а не до постановки в неё
+            client = self.client
+            timeout = _remaining(expires)
+            if timeout is not None and timeout < self.timeout:
+                client = client.with_options(timeout=timeout)
+            return call(client)
+
+        if self.scheduled:
+            completion = get_scheduler().run(
+                request,
+                estimated_tokens=estimate_tokens(system_prompt, user_prompt, completion_tokens=completion_tokens),
+                priority=priority,
+                actual_tokens=lambda completion: getattr(getattr(completion, "usage", None), "total_tokens", None),
+                expires=expires,
+            )
+        else:
+            completion = request()
+
+        if self.on_usage is not None:
+            self.on_usage(getattr(completion, "usage", None))
+
+        parsed = completion.choices[0].message.parsed
+        if parsed is None:
+            raise ValueError(f"Модель не вернула ответ в формате {response_format.__name__}")
+        return parsed
+
+    def _ping(self) -> bool:
+        self.client.with_options(timeout=LLM_HEALTH_CHECK_TIMEOUT).models.list()
+        return True
+
+
+def fake_answer(system_prompt: str, user_prompt: str, response_format: Type[T]) -> T:
+    if response_format is not CandidateEvaluationAnswer:
+        raise ValueError(f"Фейковый бэкенд не умеет отвечать в формате {response_format.__name__}")
+    return CandidateEvaluationAnswer(target_stage=TargetStage.RESERVE, comment="Заглушка")
+
+
+class FakeBackend(LLMBackend):
+    """
+    Бэкенд без сети: ответ формирует responder(system_prompt, user_prompt, response_format).
+    Для тестов и локального запуска без ключа OpenAI; latency имитирует время ответа модели.
+    """
+
+    def __init__(
+            self,
+            name: str = "fake",
+            model: str = "fake",
+            responder: Callable[[str, str, type], Any] = fake_answer,
+            latency: float = 0.0,
+            healthy: bool = True,
+    ):
+        super().__init__(name, model)
+        self.responder = responder
+        self.latency = latency
+        self.healthy = healthy
+        self.calls = []
+
+    def _parse(self, system_prompt, user_prompt, response_format, priority, completion_tokens, expires):
+        self.calls.append((system_prompt, user_prompt))
+        timeout = _remaining(expires)
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Фейковый бэкенд {self.name} не ответил за {timeout} с")
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responder(system_prompt, user_prompt, response_format)
+
+    def _ping(self) -> bool:
+        return self.healthy
+
+
+def _messages(system_prompt: str, user_prompt: str) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _remaining(expires: Optional[float]) -> Optional[float]:
+    if expires is None:
+        return None
+    remaining = expires - time.monotonic()
+    if remaining <= 0:
+        raise QueueDeadlineExceeded("Срок запроса к модели истёк до его отправки")
+    return remaining
+
+
+class HealthMonitor:
+    """
+    Фоновая задача приложения: раз в interval проверяет доступность бэкендов.
+    Недоступный бэкенд не получает запросы, пока следующая проверка не пройдёт успешно.
+    """
+
+    def __init__(self, backends_factory: Callable[[], Dict[str, LLMBackend]], interval: float = LLM_HEALTH_CHECK_INTERVAL):
+        self.backends_factory = backends_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        if self.interval <= 0:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def check_all(self) -> Dict[str, bool]:
+        return {
+            tier: backend.health_check()
+            for tier, backend in self.backends_factory().items()
+            if backend.monitored
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            await asyncio.to_thread(self.check_all)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
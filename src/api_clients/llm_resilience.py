@@ -0,0 +1,407 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from src.api_clients.llm_backends import LLMBackend
+from src.api_clients.openai_scheduler import (
+    OPENAI_EXPECTED_COMPLETION_TOKENS,
+    PRIORITY_REALTIME,
+    DeadlineExceeded,
+    QueueDeadlineExceeded,
+    estimate_tokens,
+)
+from src.observability.tracing import bind_context
+
+logger = logging.getLogger(__name__)
+
+# Предельное время одного вызова модели, включая ожидание в очереди, повторы и дублирующий запрос
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE") or 90)
+LLM_HEDGE_ENABLED = (os.getenv("LLM_HEDGE_ENABLED") or "true").lower() == "true"
+# Дублирующий запрос отправляется, если ответа нет дольше этого квантиля задержки
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE") or 0.95)
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES") or 20)
+# Не больше такой доли последних запросов может дублироваться — ограничение лишних расходов
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO") or 0.1)
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW") or 200)
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE") or 0.5)
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW") or 20)
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS") or 5)
+LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT") or 30)
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS") or 16)
+
+# Очередь планировщика снимает запрос в тот же момент, когда истекает срок вызова: столько ждём её ответа
+_QUEUE_EXPIRY_GRACE = 0.05
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class LatencyWindow:
+    """
+    Задержки последних успешных запросов для расчёта квантилей.
+    """
+
+    def __init__(self, size: int = LLM_LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+
+class CircuitBreaker:
+    """
+    Размыкается, когда доля ошибок среди последних window вызовов достигает failure_rate.
+    Через reset_timeout пропускает один пробный вызов: успех замыкает цепь, ошибка — снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+            self,
+            failure_rate: float = LLM_BREAKER_FAILURE_RATE,
+            window: int = LLM_BREAKER_WINDOW,
+            min_calls: int = LLM_BREAKER_MIN_CALLS,
+            reset_timeout: float = LLM_BREAKER_RESET_TIMEOUT,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened = 0
+        self._results: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if success:
+                    self.state = self.CLOSED
+                    self._results.clear()
+                else:
+                    self._open()
+                return
+            self._results.append(success)
+            failures = self._results.count(False)
+            if (self.state == self.CLOSED and len(self._results) >= self.min_calls
+                    and failures / len(self._results) >= self.failure_rate):
+                self._open()
+
+    def release(self) -> None:
+        """
+        Вызов не дошёл до модели: результат не учитывается, а пробный вызов можно повторить.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        logger.warning("Цепь разомкнута: модель отвечает с ошибками, запросы идут на резервный уровень")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            results = list(self._results)
+        return {
+            "state": self.state,
+            "opened": self.opened,
+            "recent_failure_rate": round(results.count(False) / len(results), 3) if results else None,
+        }
+
+
+class ResilientBackend(LLMBackend):
+    """
+    Обёртка над бэкендом: ограничивает каждый вызов сроком deadline, дублирует запрос, если ответа нет
+    дольше квантиля hedge_quantile обычной задержки (не чаще hedge_max_ratio запросов), и при всплеске
+    ошибок переключается на резервный бэкенд (fallback) через CircuitBreaker.
+
+    Проигравший дублирующий запрос не отменяется (синхронный HTTP-запрос прервать нельзя): он завершится
+    сам не позже срока вызова, а его расход учитывается в hedge_tokens.
+
+    Вызовы выполняются в собственном пуле из workers потоков: зависшая модель одного уровня
+    не занимает потоки других.
+    """
+
+    def __init__(
+            self,
+            backend: LLMBackend,
+            fallback: Optional[Callable[[], Optional[LLMBackend]]] = None,
+            deadline: float = LLM_DEADLINE,
+            hedge: bool = LLM_HEDGE_ENABLED,
+            hedge_quantile: float = LLM_HEDGE_QUANTILE,
+            hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+            hedge_max_ratio: float = LLM_HEDGE_MAX_RATIO,
+            breaker: Optional[CircuitBreaker] = None,
+            workers: int = LLM_HEDGE_WORKERS,
+    ):
+        super().__init__(backend.name, backend.model)
+        self.backend = backend
+        self.fallback = fallback or (lambda: None)
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = hedge_max_ratio
+        self.breaker = breaker or CircuitBreaker()
+        self.monitored = backend.monitored
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"llm-{backend.name}")
+        # Задержки отдельно по формату ответа: групповая оценка заметно дольше одиночной
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._hedged: Deque[bool] = deque(maxlen=LLM_LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._counters = {
+            "hedges": 0,
+            "hedge_wins": 0,
+            "hedge_tokens": 0,
+            "deadline_exceeded": 0,
+            "fallback_calls": 0,
+        }
+
+    @property
+    def available(self) -> bool:
+        if not self.backend.available:
+            return False
+        return self.breaker.state != CircuitBreaker.OPEN or self.fallback() is not None
+
+    def parse(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            response_format,
+            priority: int = PRIORITY_REALTIME,
+            completion_tokens: int = OPENAI_EXPECTED_COMPLETION_TOKENS,
+            timeout: Optional[float] = None,
+            expires: Optional[float] = None,
+    ):
+        deadline = self._call_deadline(timeout, expires)
+        fallback = self._route_to_fallback()
+        if fallback is not None:
+            return fallback.parse(system_prompt, user_prompt, response_format, priority, completion_tokens, deadline)
+        return self._parse(system_prompt, user_prompt, response_format, priority, completion_tokens,
+                           time.monotonic() + deadline)
+
+    def _parse(self, system_prompt, user_prompt, response_format, priority, completion_tokens, expires):
+        try:
+            result = self._hedged_parse(system_prompt, user_prompt, response_format, priority, completion_tokens,
+                                        expires - time.monotonic())
+        except QueueDeadlineExceeded:
+            # Срок ушёл на ожидание в очереди: модель тут ни при чём
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return result
+
+    def stream(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            response_format,
+            on_delta: Callable[[str], None],
+            priority: int = PRIORITY_REALTIME,
+            completion_tokens: int = OPENAI_EXPECTED_COMPLETION_TOKENS,
+            timeout: Optional[float] = None,
+            expires: Optional[float] = None,
+    ):
+        """
+        Потоковый запрос с тем же сроком вызова и размыкателем цепи, что и parse. Дублирующий запрос
+        не отправляется: фрагменты двух потоков нельзя передавать в on_delta вперемешку.
+        """
+        deadline = self._call_deadline(timeout, expires)
+        fallback = self._route_to_fallback()
+        if fallback is not None:
+            return fallback.stream(system_prompt, user_prompt, response_format, on_delta, priority, completion_tokens,
+                                   deadline)
+
+        expires = time.monotonic() + deadline
+        abandoned = threading.Event()
+
+        def forward(delta: str) -> None:
+            if abandoned.is_set():
+                # Вызов уже завершился по сроку: поток прерывается, фрагменты вызывающему не передаются
+                raise DeadlineExceeded(f"Модель {self.model} не ответила за {deadline:.1f} с")
+            on_delta(delta)
+
+        future = self._executor.submit(bind_context(self.backend.stream), system_prompt, user_prompt, response_format,
+                                  forward, priority, completion_tokens, expires=expires)
+        done, _ = wait([future], timeout=max(0.0, deadline))
+        if not done:
+            abandoned.set()
+            with self._lock:
+                self._counters["deadline_exceeded"] += 1
+            if _expired_in_queue([future], []):
+                self.breaker.release()
+                raise QueueDeadlineExceeded(f"Запрос к {self.model} не дождался очереди за {deadline:.1f} с")
+            self.breaker.record(False)
+            raise DeadlineExceeded(f"Модель {self.model} не ответила за {deadline:.1f} с")
+        try:
+            result = future.result()
+        except QueueDeadlineExceeded:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return result
+
+    def _ping(self) -> bool:
+        return self.backend.health_check()
+
+    def _call_deadline(self, timeout: Optional[float], expires: Optional[float]) -> float:
+        deadline = min(self.deadline, timeout) if timeout is not None else self.deadline
+        if expires is not None:
+            deadline = min(deadline, expires - time.monotonic())
+        return deadline
+
+    def _route_to_fallback(self) -> Optional[LLMBackend]:
+        """
+        Резервный бэкенд, если цепь разомкнута; None — запрос идёт основному бэкенду.
+        """
+        if self.breaker.allow():
+            return None
+        fallback = self.fallback()
+        if fallback is None:
+            raise CircuitOpenError(f"Модель {self.model} временно отключена из-за ошибок")
+        with self._lock:
+            self._counters["fallback_calls"] += 1
+        logger.info("Запрос к %s направлен на резервную модель %s", self.model, fallback.model)
+        return fallback
+
+    def _hedged_parse(self, system_prompt, user_prompt, response_format, priority, completion_tokens, deadline):
+        started = time.monotonic()
+        expires = started + deadline
+        latencies = self._latency_window(response_format.__name__)
+
+        def attempt():
+            # Срок общий для основного и дублирующего запроса: его соблюдает и очередь планировщика
+            attempt_started = time.monotonic()
+            result = self.backend.parse(system_prompt, user_prompt, response_format, priority, completion_tokens,
+                                        expires=expires)
+            return result, time.monotonic() - attempt_started
+
+        pending = {self._executor.submit(bind_context(attempt))}
+        hedge_at = self._hedge_delay(latencies)
+        hedge_future: Optional[Future] = None
+        errors: List[Exception] = []
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= expires:
+                    break
+                timeout = expires - now
+                if hedge_at is not None:
+                    timeout = min(timeout, max(0.0, started + hedge_at - now))
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result, latency = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    latencies.add(latency)
+                    if future is hedge_future:
+                        with self._lock:
+                            self._counters["hedge_wins"] += 1
+                    return result
+                if hedge_at is not None and pending and time.monotonic() >= started + hedge_at:
+                    # Дублирующий запрос отправляется не больше одного раза
+                    hedge_delay, hedge_at = hedge_at, None
+                    if self._take_hedge():
+                        logger.info("Нет ответа от %s за %.2f с, отправлен дублирующий запрос", self.model, hedge_delay)
+                        with self._lock:
+                            self._counters["hedge_tokens"] += estimate_tokens(
+                                system_prompt, user_prompt, completion_tokens=completion_tokens)
+                        hedge_future = self._executor.submit(bind_context(attempt))
+                        pending.add(hedge_future)
+        finally:
+            with self._lock:
+                self._hedged.append(hedge_future is not None)
+
+        if not pending and errors:
+            # Ошибку модели не заслоняет то, что другой запрос не дождался очереди
+            raise next((e for e in errors if not isinstance(e, QueueDeadlineExceeded)), errors[0])
+        with self._lock:
+            self._counters["deadline_exceeded"] += 1
+        if _expired_in_queue(pending, errors):
+            raise QueueDeadlineExceeded(f"Запрос к {self.model} не дождался очереди за {deadline:.1f} с")
+        raise DeadlineExceeded(f"Модель {self.model} не ответила за {deadline:.1f} с")
+
+    def _hedge_delay(self, latencies: LatencyWindow) -> Optional[float]:
+        if not self.hedge or len(latencies) < self.hedge_min_samples:
+            return None
+        return latencies.quantile(self.hedge_quantile)
+
+    def _take_hedge(self) -> bool:
+        """
+        Разрешает дублирующий запрос, если с ним доля дублированных вызовов не превысит hedge_max_ratio.
+        """
+        with self._lock:
+            if sum(self._hedged) + 1 > self.hedge_max_ratio * (len(self._hedged) + 1):
+                return False
+            self._counters["hedges"] += 1
+            return True
+
+    def _latency_window(self, kind: str) -> LatencyWindow:
+        with self._lock:
+            return self._latencies.setdefault(kind, LatencyWindow())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = dict(self._latencies)
+        return {
+            **self.backend.get_stats(),
+            **counters,
+            "deadline": self.deadline,
+            "hedge_delay": {kind: window.quantile(self.hedge_quantile) for kind, window in latencies.items()},
+            "breaker": self.breaker.get_stats(),
+        }
+
+
+def _expired_in_queue(pending: Iterable[Future], errors: List[Exception]) -> bool:
+    """
+    Ни один запрос вызова не дошёл до модели: все сняты с очереди планировщика по сроку.
+    """
+    if any(not isinstance(e, QueueDeadlineExceeded) for e in errors):
+        return False
+    done, not_done = wait(pending, timeout=_QUEUE_EXPIRY_GRACE)
+    return not not_done and all(isinstance(future.exception(), QueueDeadlineExceeded) for future in done)
@@ -1,15 +1,65 @@
 import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
 
+import httpx
 from openai import OpenAI
 
+from src.api_clients.llm_backends import (
+    LLM_CONNECT_TIMEOUT,
+    LLM_TIMEOUT,
+    FakeBackend,
+    LLMBackend,
+    OpenAICompatibleBackend,
+)
+from src.api_clients.llm_resilience import ResilientBackend
+from src.api_clients.openai_scheduler import OPENAI_EXPECTED_COMPLETION_TOKENS, PRIORITY_REALTIME
+from src.observability.metrics import ERRORS, counter, histogram
+from src.observability.tracing import start_span
 from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.group_evaluation_answer import GroupEvaluationAnswer
+from src.model.llm_answer import LLMAnswer
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+OPENAI_MODEL = os.getenv('OPENAI_MODEL') or "gpt-4o"
+# openai — OpenAI API (или совместимый сервер по OPENAI_BASE_URL), fake — ответы-заглушки без сети
+OPENAI_BACKEND = os.getenv('OPENAI_BACKEND') or "openai"
+
+# Уровень предварительной оценки: дешёвая модель OpenAI или локальный OpenAI-совместимый сервер
+PRESCREEN_MODEL = os.getenv('PRESCREEN_MODEL')
+PRESCREEN_BASE_URL = os.getenv('PRESCREEN_BASE_URL')
+PRESCREEN_API_KEY = os.getenv('PRESCREEN_API_KEY')
+PRESCREEN_TIMEOUT = float(os.getenv('PRESCREEN_TIMEOUT') or LLM_TIMEOUT)
+PRESCREEN_BACKEND = os.getenv('PRESCREEN_BACKEND') or "openai"
+
+# Резервный уровень, на который переключается основной при всплеске ошибок
+FALLBACK_MODEL = os.getenv('FALLBACK_MODEL')
+FALLBACK_BASE_URL = os.getenv('FALLBACK_BASE_URL')
+FALLBACK_API_KEY = os.getenv('FALLBACK_API_KEY')
+FALLBACK_TIMEOUT = float(os.getenv('FALLBACK_TIMEOUT') or LLM_TIMEOUT)
+FALLBACK_BACKEND = os.getenv('FALLBACK_BACKEND') or "openai"
+
+TIER_PRIMARY = "primary"
+TIER_PRESCREEN = "prescreen"
+TIER_FALLBACK = "fallback"
+TIERS = (TIER_PRIMARY, TIER_PRESCREEN, TIER_FALLBACK)
+
 _client = None
 
+LLM_REQUEST_DURATION = histogram("llm_request_duration_seconds", "Запросы к модели (ask_gpt)", ("tier", "request"))
+LLM_TOKENS = counter("llm_tokens", "Токены OpenAI", ("type",))
+
+_backends: Dict[str, Optional[LLMBackend]] = {}
+_backends_lock = threading.Lock()
+
+_usage_lock = threading.Lock()
+_usage = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
 
 def get_client():
     global _client
@@ -17,7 +67,15 @@ def get_client():
         token = os.getenv('CHATGPT_API_TOKEN')
         if token:
             logger.debug("Получен API токен для ChatGPT")
-            _client = OpenAI(api_key=token)
+            # Повторы при 429 и ошибках сервера выполняет планировщик запросов, а не SDK
+            client_kwargs = {
+                "api_key": token,
+                "max_retries": 0,
+                "timeout": httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            }
+            if os.getenv('OPENAI_BASE_URL'):
+                client_kwargs["base_url"] = os.getenv('OPENAI_BASE_URL')
+            _client = OpenAI(**client_kwargs)
             logger.info("Клиент OpenAI успешно создан")
         else:
             logger.error("API токен для ChatGPT не найден!")
@@ -25,18 +83,157 @@ def get_client():
     return _client
 
 
-def ask_gpt(system_prompt: str, user_prompt: str) -> CandidateEvaluationAnswer:
+def ask_gpt(
+        system_prompt: str,
+        user_prompt: str,
+        priority: int = PRIORITY_REALTIME,
+        tier: str = TIER_PRIMARY,
+) -> CandidateEvaluationAnswer:
     logger.info("Формируется запрос к GPT")
-
-    completion = get_client().beta.chat.completions.parse(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        response_format=CandidateEvaluationAnswer,
-    )
-
-    answer = completion.choices[0].message.parsed
+    with observe_llm_request(tier, "evaluation"):
+        answer = get_backend(tier).parse(system_prompt, user_prompt, CandidateEvaluationAnswer, priority)
     logger.debug("Ответ от GPT получен: %s", answer)
     return answer
+
+
+def ask_gpt_group(
+        system_prompt: str,
+        user_prompt: str,
+        group_size: int,
+        priority: int = PRIORITY_REALTIME,
+) -> GroupEvaluationAnswer:
+    """
+    Оценка нескольких кандидатов одним запросом. Ответ модели приходит списком оценок с applicant_id;
+    сверять его с отправленными кандидатами должен вызывающий код.
+    """
+    logger.info("Формируется групповой запрос к GPT на %s кандидатов", group_size)
+    with observe_llm_request(TIER_PRIMARY, "group"):
+        return get_backend(TIER_PRIMARY).parse(system_prompt, user_prompt, GroupEvaluationAnswer, priority,
+                                               completion_tokens=OPENAI_EXPECTED_COMPLETION_TOKENS * group_size)
+
+
+@contextmanager
+def observe_llm_request(tier: str, request: str) -> Iterator[None]:
+    """
+    Записывает длительность запроса к модели и ошибки в метрики и оформляет запрос спаном трейса.
+    """
+    started = time.perf_counter()
+    try:
+        with start_span("llm", tier=tier, request=request):
+            yield
+    except Exception:
+        ERRORS.labels("llm").inc()
+        raise
+    finally:
+        LLM_REQUEST_DURATION.labels(tier, request).observe(time.perf_counter() - started)
+
+
+def answered_by_primary(answer: LLMAnswer) -> bool:
+    """
+    Дала ли ответ основная модель. При разомкнутой цепи основной уровень отвечает резервной моделью,
+    и такой ответ нельзя выдавать из кэша за ответ основной. Ответ без отметки (не от бэкенда) считается основным.
+    """
+    return answer.answered_by is None or answer.answered_by == get_backend(TIER_PRIMARY).model
+
+
+def get_backend(tier: str = TIER_PRIMARY) -> Optional[LLMBackend]:
+    """
+    Бэкенд для уровня моделей tier. Для незадействованного уровня (например, не задана PRESCREEN_MODEL)
+    возвращается None.
+    """
+    with _backends_lock:
+        if tier not in _backends:
+            _backends[tier] = _create_backend(tier)
+        return _backends[tier]
+
+
+def set_backend(tier: str, backend: Optional[LLMBackend]) -> None:
+    with _backends_lock:
+        _backends[tier] = backend
+
+
+def get_backends() -> Dict[str, LLMBackend]:
+    backends = {tier: get_backend(tier) for tier in TIERS}
+    return {tier: backend for tier, backend in backends.items() if backend is not None}
+
+
+def get_backend_stats() -> Dict[str, Any]:
+    return {tier: backend.get_stats() for tier, backend in get_backends().items()}
+
+
+def _create_backend(tier: str) -> Optional[LLMBackend]:
+    """
+    Каждый уровень оборачивается в ResilientBackend (срок вызова, дублирующие запросы, размыкатель цепи).
+    Основной уровень при разомкнутой цепи переключается на резервный (FALLBACK_MODEL).
+    """
+    if tier == TIER_PRIMARY:
+        backend = FakeBackend(tier) if OPENAI_BACKEND == "fake" else _openai_backend(tier, OPENAI_MODEL)
+        return ResilientBackend(backend, fallback=lambda: get_backend(TIER_FALLBACK))
+    if tier == TIER_PRESCREEN:
+        backend = _tier_backend(tier, PRESCREEN_BACKEND, PRESCREEN_MODEL, PRESCREEN_BASE_URL, PRESCREEN_API_KEY,
+                                PRESCREEN_TIMEOUT)
+    elif tier == TIER_FALLBACK:
+        backend = _tier_backend(tier, FALLBACK_BACKEND, FALLBACK_MODEL, FALLBACK_BASE_URL, FALLBACK_API_KEY,
+                                FALLBACK_TIMEOUT)
+    else:
+        raise ValueError(f"Неизвестный уровень моделей: {tier}")
+    return ResilientBackend(backend) if backend is not None else None
+
+
+def _tier_backend(
+        tier: str,
+        kind: str,
+        model: Optional[str],
+        base_url: Optional[str],
+        api_key: Optional[str],
+        timeout: float,
+) -> Optional[LLMBackend]:
+    if kind == "fake":
+        return FakeBackend(tier)
+    if not model:
+        return None
+    if not base_url:
+        # Другая модель OpenAI: тот же клиент и общие бюджеты RPM/TPM
+        return _openai_backend(tier, model)
+    return OpenAICompatibleBackend(tier, model, base_url=base_url, api_key=api_key, timeout=timeout)
+
+
+def _openai_backend(tier: str, model: str) -> OpenAICompatibleBackend:
+    # Клиент берётся через get_client при каждом запросе, чтобы его можно было подменить
+    return OpenAICompatibleBackend(tier, model, client_factory=lambda: get_client(), scheduled=True,
+                                   on_usage=record_usage)
+
+
+def record_usage(usage) -> None:
+    with _usage_lock:
+        _usage["requests"] += 1
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cached = cached_tokens(usage)
+        _usage["prompt_tokens"] += prompt_tokens
+        _usage["cached_tokens"] += cached
+        _usage["completion_tokens"] += completion_tokens
+        _usage["total_tokens"] += getattr(usage, "total_tokens", 0) or 0
+    LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels("cached").inc(cached)
+    LLM_TOKENS.labels("completion").inc(completion_tokens)
+
+
+def cached_tokens(usage) -> int:
+    """
+    Токены промпта, взятые из кэша префиксов OpenAI. В ответах Batch API usage приходит словарём.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+def get_usage_stats() -> Dict[str, int]:
+    """
+    Суммарное потребление токенов с момента запуска процесса.
+    """
+    with _usage_lock:
+        return dict(_usage)
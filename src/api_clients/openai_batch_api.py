@@ -0,0 +1,93 @@
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, List, Union
+
+from pydantic import ValidationError
+
+from src.api_clients.openai_api import OPENAI_MODEL, get_client, record_usage
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def candidate_evaluation_response_format() -> Dict[str, Any]:
+    """
+    response_format для structured outputs: та же схема, что и при client.beta.chat.completions.parse.
+    """
+    schema = CandidateEvaluationAnswer.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": CandidateEvaluationAnswer.__name__, "schema": schema, "strict": True},
+    }
+
+
+def build_batch_request(custom_id: str, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "response_format": candidate_evaluation_response_format(),
+        },
+    }
+
+
+def submit_batch(requests: List[Dict[str, Any]]) -> str:
+    """
+    Загружает запросы JSONL-файлом и создаёт batch. Возвращает ID batch.
+    """
+    content = "\n".join(json.dumps(request, ensure_ascii=False) for request in requests).encode("utf-8")
+    client = get_client()
+    batch_file = client.files.create(file=("evaluations.jsonl", content), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    logger.info("Отправлен batch %s с %s запросами", batch.id, len(requests))
+    return batch.id
+
+
+def retrieve_batch(batch_id: str):
+    return get_client().batches.retrieve(batch_id)
+
+
+def download_batch_results(file_id: str) -> Dict[str, Union[CandidateEvaluationAnswer, str]]:
+    """
+    Скачивает файл результатов batch и разбирает его: custom_id → ответ модели или текст ошибки.
+    """
+    text = get_client().files.content(file_id).text
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        results[record["custom_id"]] = _parse_batch_record(record)
+    return results
+
+
+def _parse_batch_record(record: Dict[str, Any]) -> Union[CandidateEvaluationAnswer, str]:
+    if record.get("error"):
+        return f"Ошибка batch: {record['error']}"
+    response = record.get("response") or {}
+    if response.get("status_code") != 200:
+        return f"HTTP {response.get('status_code')}: {response.get('body')}"
+
+    body = response.get("body") or {}
+    if body.get("usage"):
+        record_usage(SimpleNamespace(**body["usage"]))
+    try:
+        content = body["choices"][0]["message"]["content"]
+        return CandidateEvaluationAnswer.model_validate_json(content)
+    except (KeyError, IndexError, TypeError, ValidationError) as e:
+        return f"Некорректный ответ модели: {e}"
@@ -0,0 +1,249 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+OPENAI_RPM_LIMIT = int(os.getenv('OPENAI_RPM_LIMIT') or 500)
+OPENAI_TPM_LIMIT = int(os.getenv('OPENAI_TPM_LIMIT') or 30000)
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES') or 5)
+OPENAI_RETRY_BACKOFF = float(os.getenv('OPENAI_RETRY_BACKOFF') or 1)
+OPENAI_RETRY_BACKOFF_MAX = float(os.getenv('OPENAI_RETRY_BACKOFF_MAX') or 60)
+OPENAI_EXPECTED_COMPLETION_TOKENS = int(os.getenv('OPENAI_EXPECTED_COMPLETION_TOKENS') or 300)
+# Для русского текста токенайзеры GPT-4o дают примерно 3 символа на токен
+OPENAI_CHARS_PER_TOKEN = float(os.getenv('OPENAI_CHARS_PER_TOKEN') or 3)
+
+PRIORITY_REALTIME = 0
+PRIORITY_BACKFILL = 10
+PRIORITY_NAMES = {PRIORITY_REALTIME: "realtime", PRIORITY_BACKFILL: "backfill"}
+
+WINDOW = 60.0
+# Служебные токены на каждое сообщение чата (роль, разделители)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_scheduler = None
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class QueueDeadlineExceeded(DeadlineExceeded):
+    """
+    Срок истёк раньше, чем запрос был отправлен модели: в очереди планировщика или сразу после пропуска.
+    """
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = OPENAI_EXPECTED_COMPLETION_TOKENS) -> int:
+    """
+    Оценка токенов запроса до его отправки: промпт по длине текста плюс ожидаемый размер ответа.
+    """
+    prompt_tokens = sum(len(text) / OPENAI_CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS for text in texts)
+    return int(prompt_tokens) + completion_tokens
+
+
+class OpenAIScheduler:
+    """
+    Пропускает запросы к OpenAI в пределах бюджетов RPM/TPM (скользящее окно в минуту).
+    Запросы сверх бюджета ждут в очереди с приоритетами: следующим всегда пропускается запрос
+    с наименьшим priority, поэтому вебхуки обгоняют бэкфилл. На 429 очередь приостанавливается целиком.
+    """
+
+    def __init__(
+            self,
+            rpm: int = OPENAI_RPM_LIMIT,
+            tpm: int = OPENAI_TPM_LIMIT,
+            max_retries: int = OPENAI_MAX_RETRIES,
+            backoff: float = OPENAI_RETRY_BACKOFF,
+            backoff_max: float = OPENAI_RETRY_BACKOFF_MAX,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._window: deque = deque()  # [время пропуска, токены]
+        self._paused_until = 0.0
+        self._stats = {"admitted": 0, "rate_limited": 0, "retries": 0, "expired": 0}
+        self._waits = defaultdict(lambda: {"count": 0, "total_wait": 0.0, "max_wait": 0.0})
+
+    def run(
+            self,
+            func: Callable[[], Any],
+            estimated_tokens: int,
+            priority: int = PRIORITY_REALTIME,
+            actual_tokens: Optional[Callable[[Any], Optional[int]]] = None,
+            expires: Optional[float] = None,
+    ) -> Any:
+        """
+        Выполняет func, когда бюджет позволяет. actual_tokens(result) — фактический расход токенов,
+        которым заменяется оценка в окне. expires — срок по time.monotonic(): если очередь не пропустит
+        запрос до него (в том числе при повторе), бросается DeadlineExceeded и func не вызывается.
+        """
+        attempt = 0
+        while True:
+            try:
+                entry = self.acquire(estimated_tokens, priority, expires)
+            except QueueDeadlineExceeded as e:
+                if attempt == 0:
+                    raise
+                # Повтор после ошибки модели: срок ушёл на неё, а не только на очередь
+                raise DeadlineExceeded(str(e)) from e
+            try:
+                result = func()
+            except openai.RateLimitError as e:
+                # insufficient_quota — закончились деньги на счёте, повтор не поможет
+                if attempt >= self.max_retries or e.code == "insufficient_quota":
+                    raise
+                delay = self._retry_delay(attempt, _retry_after(e))
+                self.pause(delay)
+                logger.warning("OpenAI вернул 429, запросы приостановлены на %.1f с", delay)
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                if expires is not None and time.monotonic() + delay >= expires:
+                    raise
+                logger.warning("Ошибка запроса к OpenAI (%s), повтор через %.1f с", e, delay)
+                time.sleep(delay)
+            else:
+                if actual_tokens is not None:
+                    self.settle(entry, actual_tokens(result))
+                return result
+            with self._cond:
+                self._stats["retries"] += 1
+            attempt += 1
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_REALTIME, expires: Optional[float] = None) -> list:
+        """
+        Блокирует поток, пока запрос не станет первым в очереди и не поместится в бюджет.
+        Возвращает запись окна, по которой затем можно уточнить расход (settle).
+        Если срок expires (time.monotonic()) наступит раньше, запрос снимается с очереди с DeadlineExceeded.
+        """
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                now = time.monotonic()
+                if expires is not None and now >= expires:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._stats["expired"] += 1
+                    self._cond.notify_all()
+                    raise QueueDeadlineExceeded(f"Запрос к OpenAI не дождался очереди за {now - started:.1f} с")
+                timeout = None if expires is None else expires - now
+                if self._waiting[0] == ticket:
+                    delay = self._admission_delay(tokens, now)
+                    if delay <= 0:
+                        break
+                    self._cond.wait(timeout=delay if timeout is None else min(delay, timeout))
+                else:
+                    self._cond.wait(timeout=timeout)
+
+            heapq.heappop(self._waiting)
+            entry = [now, tokens]
+            self._window.append(entry)
+            self._stats["admitted"] += 1
+            waited = now - started
+            waits = self._waits[PRIORITY_NAMES.get(priority, str(priority))]
+            waits["count"] += 1
+            waits["total_wait"] += waited
+            waits["max_wait"] = max(waits["max_wait"], waited)
+            self._cond.notify_all()
+
+        if waited > 1:
+            logger.info("Запрос к OpenAI ждал в очереди %.1f с (приоритет %s)", waited, priority)
+        return entry
+
+    def settle(self, entry: list, tokens: Optional[int]) -> None:
+        if tokens is None:
+            return
+        with self._cond:
+            entry[1] = tokens
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._stats["rate_limited"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self._expire(now)
+            return {
+                **self._stats,
+                "queued": len(self._waiting),
+                "window_requests": len(self._window),
+                "window_tokens": sum(tokens for _, tokens in self._window),
+                "rpm_limit": self.rpm,
+                "tpm_limit": self.tpm,
+                "paused_for": round(max(0.0, self._paused_until - now), 2),
+                "queue_wait": {
+                    name: {
+                        "count": waits["count"],
+                        "avg_wait": round(waits["total_wait"] / waits["count"], 3),
+                        "max_wait": round(waits["max_wait"], 3),
+                    }
+                    for name, waits in self._waits.items()
+                },
+            }
+
+    def _admission_delay(self, tokens: int, now: float) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._expire(now)
+        if self.rpm > 0 and len(self._window) >= self.rpm:
+            return self._window[0][0] + WINDOW - now
+        if self.tpm > 0 and self._window:
+            excess = sum(used for _, used in self._window) + tokens - self.tpm
+            # Запрос больше всего бюджета пропускается, когда окно пустое
+            for admitted_at, used in self._window:
+                if excess <= 0:
+                    break
+                excess -= used
+                if excess <= 0:
+                    return admitted_at + WINDOW - now
+            if excess > 0:
+                return self._window[-1][0] + WINDOW - now
+        return 0.0
+
+    def _expire(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - WINDOW:
+            self._window.popleft()
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return min(self.backoff_max, self.backoff * 2 ** attempt) * random.uniform(0.8, 1.2)
+
+
+def get_scheduler() -> OpenAIScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = OpenAIScheduler()
+    return _scheduler
+
+
+def _retry_after(error: openai.APIStatusError) -> Optional[float]:
+    headers = error.response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
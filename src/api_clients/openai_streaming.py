@@ -0,0 +1,132 @@
+import json
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.api_clients.openai_api import TIER_PRIMARY, get_backend, observe_llm_request
+from src.api_clients.openai_scheduler import PRIORITY_REALTIME
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "streams": 0,
+    "decisions": 0,
+    "time_to_decision_total": 0.0,
+    "time_to_complete_total": 0.0,
+    "time_to_decision_max": 0.0,
+    "time_to_complete_max": 0.0,
+}
+
+
+class FieldParser:
+    """
+    Инкрементальный разбор JSON-ответа модели: находит значение строкового поля, как только
+    оно полностью пришло в потоке, не дожидаясь конца объекта.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.value: Optional[str] = None
+        self._buffer = ""
+        self._pattern = re.compile(r'"%s"\s*:\s*("(?:[^"\\]|\\.)*")' % re.escape(field))
+
+    def feed(self, delta: str) -> Optional[str]:
+        """
+        Добавляет очередной фрагмент ответа. Возвращает значение поля, когда оно стало известно
+        (один раз), иначе None.
+        """
+        if self.value is not None:
+            return None
+        self._buffer += delta
+        match = self._pattern.search(self._buffer)
+        if match is None:
+            return None
+        self.value = json.loads(match.group(1))
+        return self.value
+
+
+def stream_gpt(
+        system_prompt: str,
+        user_prompt: str,
+        on_decision: Callable[[TargetStage], None],
+        priority: int = PRIORITY_REALTIME,
+) -> CandidateEvaluationAnswer:
+    """
+    Оценка кандидата с потоковым ответом основного уровня моделей. on_decision(target_stage) вызывается, как только
+    target_stage раскодирован (модель выводит его раньше комментария), а полный ответ с комментарием
+    возвращается по завершении потока. При повторе запроса после сбоя решение повторно не сообщается.
+    """
+    decided = []
+
+    def decide(stage: TargetStage) -> None:
+        if decided:
+            if decided[0] != stage:
+                logger.warning("Повторный запрос вернул другой этап (%s вместо %s)", stage, decided[0])
+            return
+        decided.append(stage)
+        on_decision(stage)
+
+    started = time.monotonic()
+    time_to_decision = []
+    parser = FieldParser("target_stage")
+
+    def on_delta(delta: str) -> None:
+        value = parser.feed(delta)
+        if value is None:
+            return
+        try:
+            stage = TargetStage(value)
+        except ValueError:
+            # Недопустимое значение отклонит проверка полного ответа
+            return
+        time_to_decision.append(time.monotonic() - started)
+        decide(stage)
+
+    logger.info("Формируется потоковый запрос к GPT")
+    with observe_llm_request(TIER_PRIMARY, "stream"):
+        answer = get_backend(TIER_PRIMARY).stream(system_prompt, user_prompt, CandidateEvaluationAnswer, on_delta,
+                                                  priority)
+    _record(time_to_decision[0] if time_to_decision else None, time.monotonic() - started)
+
+    # Решение могло не распознаться по ходу потока (например, поля пришли в другом порядке)
+    decide(answer.target_stage)
+    return answer
+
+
+def _record(time_to_decision: Optional[float], time_to_complete: float) -> None:
+    with _stats_lock:
+        _stats["streams"] += 1
+        _stats["time_to_complete_total"] += time_to_complete
+        _stats["time_to_complete_max"] = max(_stats["time_to_complete_max"], time_to_complete)
+        if time_to_decision is not None:
+            _stats["decisions"] += 1
+            _stats["time_to_decision_total"] += time_to_decision
+            _stats["time_to_decision_max"] = max(_stats["time_to_decision_max"], time_to_decision)
+
+
+def get_streaming_stats() -> Dict[str, Any]:
+    """
+    Время до решения (target_stage раскодирован) и до полного ответа по потоковым запросам, в секундах.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    streams, decisions = stats["streams"], stats["decisions"]
+    return {
+        "streams": streams,
+        "early_decisions": decisions,
+        "avg_time_to_decision": round(stats.pop("time_to_decision_total") / decisions, 3) if decisions else None,
+        "avg_time_to_complete": round(stats.pop("time_to_complete_total") / streams, 3) if streams else None,
+        "max_time_to_decision": round(stats["time_to_decision_max"], 3),
+        "max_time_to_complete": round(stats["time_to_complete_max"], 3),
+    }
+
+
+def reset_streaming_stats() -> None:
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0 if key in ("streams", "decisions") else 0.0
@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from pathlib import Path
 import os
@@ -6,14 +8,68 @@ import os
 env_path = Path(__file__).resolve().parent / "config" / ".env"
 load_dotenv(dotenv_path=env_path)
 
-app = FastAPI(title="Huntflow Optimization API")
-
+from src.api_clients import huntflow_api
+from src.api_clients.llm_backends import HealthMonitor
+from src.api_clients.openai_api import get_backend_stats, get_backends, get_usage_stats
+from src.api_clients.openai_scheduler import get_scheduler
+from src.api_clients.openai_streaming import get_streaming_stats
+from src.observability.metrics import render_metrics
+from src.service.admin_handler import handle_invalidate_statuses
+from src.service.applicant_handler import webhook_evaluation_mode
+from src.service.batch_evaluation import BatchRunner
+from src.service.group_evaluation import get_group_evaluator
+from src.service.job_handlers import process_job
+from src.service.job_queue import get_job_queue
+from src.service.job_worker import JobWorkerPool
 from src.service.request_handler import handle_request
+from src.service.stats import collect_stats, register_stats_provider
+
+register_stats_provider("huntflow_credentials", lambda: huntflow_api.credentials.get_stats())
+register_stats_provider("huntflow_requests", lambda: {
+    "rate_limiter": huntflow_api.rate_limiter.get_stats(),
+    "endpoints": huntflow_api.request_stats.get_stats(),
+})
+register_stats_provider("openai", lambda: {
+    "usage": get_usage_stats(),
+    "scheduler": get_scheduler().get_stats(),
+    "streaming": get_streaming_stats(),
+})
+register_stats_provider("llm_backends", get_backend_stats)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if webhook_evaluation_mode == "group":
+        # Недостижимый размер группы обнаруживается при запуске, а не на первой задаче
+        get_group_evaluator()
+    worker_pool = JobWorkerPool(get_job_queue(), process_job)
+    batch_runner = BatchRunner()
+    health_monitor = HealthMonitor(get_backends)
+    await worker_pool.start()
+    await batch_runner.start()
+    await health_monitor.start()
+    yield
+    await health_monitor.stop()
+    await batch_runner.stop()
+    await worker_pool.stop()
+
+app = FastAPI(title="Huntflow Optimization API", lifespan=lifespan)
 
 @app.post("/huntflow/webhook/applicant")
 async def new_action(request: Request):
     return await handle_request(request)
 
+@app.get("/huntflow/stats")
+async def stats():
+    return collect_stats()
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(collect_stats()), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/huntflow/admin/cache/statuses/invalidate")
+async def invalidate_statuses(request: Request):
+    return await handle_invalidate_statuses(request)
+
 if __name__ == '__main__':
     import uvicorn
     port = int(os.getenv("APP_PORT", "7707"))
@@ -0,0 +1,228 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+env_path = Path(__file__).resolve().parent / "config" / ".env"
+load_dotenv(dotenv_path=env_path)
+
+from src.api_clients.huntflow_api import get_applicants, get_vacancies
+from src.api_clients.openai_api import get_usage_stats
+from src.api_clients.openai_scheduler import PRIORITY_BACKFILL
+from src.service.applicant_handler import process_applicant
+from src.service.batch_evaluation import get_batch_evaluator
+from src.service.caching.status_cache import status_cache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / "data" / "backfill_checkpoint.jsonl"
+
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY") or 4)
+BACKFILL_RATE_PER_MINUTE = float(os.getenv("BACKFILL_RATE_PER_MINUTE") or 60)
+
+
+@dataclass
+class BackfillReport:
+    total: int = 0
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    deferred: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+    decisions: Counter = field(default_factory=Counter)
+
+    @property
+    def candidates_per_minute(self) -> float:
+        return self.processed / self.elapsed * 60 if self.elapsed else 0.0
+
+    @property
+    def tokens_per_minute(self) -> float:
+        return self.tokens / self.elapsed * 60 if self.elapsed else 0.0
+
+    def format(self) -> str:
+        decisions = ", ".join(f"{stage}: {count}" for stage, count in sorted(self.decisions.items())) or "—"
+        return (
+            f"Кандидатов найдено: {self.total}, оценено: {self.processed}, "
+            f"пропущено по чекпоинту: {self.skipped}, ошибок: {self.failed}, "
+            f"отложено в batch: {self.deferred}\n"
+            f"Время: {self.elapsed:.1f} с, кандидатов/мин: {self.candidates_per_minute:.1f}, "
+            f"токенов/мин: {self.tokens_per_minute:.0f}\n"
+            f"Решения: {decisions}"
+        )
+
+
+class Throttle:
+    """
+    Равномерно распределяет запуски оценок: не больше rate_per_minute в минуту на все потоки.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+
+class Checkpoint:
+    """
+    Журнал уже оценённых пар кандидат/вакансия (JSON lines): прерванный бэкфилл продолжается с места остановки.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done: Set[Tuple[int, int]] = set()
+        if path.exists():
+            with path.open(encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.done.add((record["applicant_id"], record["vacancy_id"]))
+
+    def mark_done(self, applicant_id: int, vacancy_id: int, target_stage: str) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as file:
+                record = {"applicant_id": applicant_id, "vacancy_id": vacancy_id, "target_stage": target_stage}
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            self.done.add((applicant_id, vacancy_id))
+
+
+def get_open_vacancy_ids(count: int = 50) -> List[int]:
+    vacancy_ids = []
+    page = 1
+    while True:
+        vacancies = get_vacancies(state="OPEN", count=count, page=page)
+        vacancy_ids.extend(vacancy["id"] for vacancy in vacancies)
+        if len(vacancies) < count:
+            return vacancy_ids
+        page += 1
+
+
+def collect_candidates(vacancy_ids: Iterable[int], status_id: int) -> List[Tuple[int, int]]:
+    candidates = []
+    for vacancy_id in vacancy_ids:
+        applicants = get_applicants(vacancy_id, status_id)
+        logger.info("Вакансия %s: кандидатов на этапе — %s", vacancy_id, len(applicants))
+        candidates.extend((applicant["id"], vacancy_id) for applicant in applicants)
+    return candidates
+
+
+def run_backfill(
+        vacancy_ids: Optional[List[int]],
+        stage_name: str,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        rate_per_minute: float = BACKFILL_RATE_PER_MINUTE,
+        checkpoint_path: Path = DEFAULT_CHECKPOINT_PATH,
+        rescore: bool = False,
+        batch: bool = False,
+) -> BackfillReport:
+    """
+    Оценивает всех кандидатов, находящихся на этапе stage_name, по указанным вакансиям
+    (или по всем открытым, если vacancy_ids не задан).
+    С batch=True запросы к модели отправляются одним OpenAI Batch: этапы обновятся,
+    когда batch будет обработан (фоновой задачей приложения).
+    """
+    status_id = status_cache.get_id_by_name(stage_name)
+    if status_id is None:
+        raise ValueError(f"Этап '{stage_name}' не найден в Huntflow")
+
+    if not vacancy_ids:
+        vacancy_ids = get_open_vacancy_ids()
+    candidates = collect_candidates(vacancy_ids, status_id)
+
+    checkpoint = Checkpoint(checkpoint_path)
+    pending = [candidate for candidate in candidates if candidate not in checkpoint.done]
+    report = BackfillReport(total=len(candidates), skipped=len(candidates) - len(pending))
+    logger.info("Бэкфилл: к оценке %s кандидатов, уже оценено ранее %s", len(pending), report.skipped)
+
+    throttle = Throttle(rate_per_minute)
+    tokens_before = get_usage_stats()["total_tokens"]
+    started = time.perf_counter()
+
+    def evaluate(applicant_id: int, vacancy_id: int):
+        if batch:
+            return get_batch_evaluator().add(applicant_id, vacancy_id, rescore=rescore)
+        throttle.wait()
+        return process_applicant(applicant_id, vacancy_id, rescore=rescore, priority=PRIORITY_BACKFILL)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="backfill") as executor:
+        futures = {executor.submit(evaluate, *candidate): candidate for candidate in pending}
+        for future in as_completed(futures):
+            applicant_id, vacancy_id = futures[future]
+            try:
+                answer = future.result()
+            except Exception as e:
+                report.failed += 1
+                logger.error("Не удалось оценить кандидата %s (вакансия %s): %s", applicant_id, vacancy_id, e)
+                continue
+            if answer is None:
+                report.deferred += 1
+                checkpoint.mark_done(applicant_id, vacancy_id, "batch")
+                continue
+            report.processed += 1
+            report.decisions[answer.target_stage.value] += 1
+            checkpoint.mark_done(applicant_id, vacancy_id, answer.target_stage.value)
+
+    if batch:
+        batch_id = get_batch_evaluator().submit_pending()
+        logger.info("Отложенные оценки отправлены в batch %s", batch_id)
+
+    report.elapsed = time.perf_counter() - started
+    report.tokens = get_usage_stats()["total_tokens"] - tokens_before
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> BackfillReport:
+    parser = argparse.ArgumentParser(description="Оценка всех кандидатов, уже находящихся на этапе-триггере")
+    parser.add_argument("--vacancy", type=int, action="append", dest="vacancy_ids",
+                        help="ID вакансии (можно указать несколько раз); по умолчанию — все открытые вакансии")
+    parser.add_argument("--stage", default=os.getenv("HUNTFLOW_FROM_STAGE"),
+                        help="Название этапа, кандидатов с которого нужно оценить")
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=BACKFILL_RATE_PER_MINUTE,
+                        help="Максимум оценок в минуту (0 — без ограничения)")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument("--rescore", action="store_true", help="Не использовать закэшированные оценки")
+    parser.add_argument("--batch", action="store_true",
+                        help="Оценивать через OpenAI Batch API (дешевле, результат — в пределах 24 часов)")
+    args = parser.parse_args(argv)
+
+    if not args.stage:
+        parser.error("Не задан этап: укажите --stage или HUNTFLOW_FROM_STAGE")
+
+    report = run_backfill(
+        vacancy_ids=args.vacancy_ids,
+        stage_name=args.stage,
+        concurrency=args.concurrency,
+        rate_per_minute=args.rate,
+        checkpoint_path=args.checkpoint,
+        rescore=args.rescore,
+        batch=args.batch,
+    )
+    logger.info("Бэкфилл завершён.\n%s", report.format())
+    return report
+
+
+if __name__ == '__main__':
+    main()
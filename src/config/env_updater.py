@@ -1,7 +1,12 @@
 import logging
 import os
+import shutil
+import tempfile
 from dotenv import load_dotenv, set_key
 from pathlib import Path
+from typing import Dict
+
+ENV_PATH = Path(__file__).resolve().parent / ".env"
 
 
 def update_and_reload_env(key: str, new_value: str):
@@ -17,4 +22,33 @@ def update_and_reload_env(key: str, new_value: str):
 
     updated_value = os.getenv(key)
 
-    return updated_value
\ No newline at end of file
+    return updated_value
+
+
+def write_env_atomic(env_path: Path, values: Dict[str, str]) -> None:
+    """
+    Записывает значения в .env одной атомарной заменой файла: читатели видят либо старую, либо новую версию целиком.
+    Остальные строки файла сохраняются, отсутствующие ключи дописываются в конец.
+    """
+    env_path = Path(env_path)
+    lines = env_path.read_text(encoding="utf-8").splitlines() if env_path.exists() else []
+    remaining = dict(values)
+
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if "=" in line and key in remaining:
+            lines[i] = f"{key}='{remaining.pop(key)}'"
+    lines.extend(f"{key}='{value}'" for key, value in remaining.items())
+
+    fd, tmp_path = tempfile.mkstemp(dir=env_path.parent, prefix=".env.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if env_path.exists():
+            shutil.copymode(env_path, tmp_path)
+        os.replace(tmp_path, env_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,8 +1,7 @@
-from pydantic import BaseModel
-
+from src.model.llm_answer import LLMAnswer
 from src.model.target_stage import TargetStage
 
 
-class CandidateEvaluationAnswer(BaseModel):
+class CandidateEvaluationAnswer(LLMAnswer):
     target_stage: TargetStage
     comment: str
@@ -0,0 +1,20 @@
+from typing import Dict, List
+
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.llm_answer import LLMAnswer
+
+
+class ApplicantEvaluationAnswer(CandidateEvaluationAnswer):
+    applicant_id: int
+
+
+class GroupEvaluationAnswer(LLMAnswer):
+    evaluations: List[ApplicantEvaluationAnswer]
+
+    def by_applicant(self) -> Dict[int, CandidateEvaluationAnswer]:
+        return {
+            item.applicant_id: CandidateEvaluationAnswer(
+                target_stage=item.target_stage, comment=item.comment,
+            ).mark_answered_by(self.answered_by)
+            for item in self.evaluations
+        }
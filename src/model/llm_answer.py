@@ -0,0 +1,20 @@
+from typing import Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+
+class LLMAnswer(BaseModel):
+    """
+    Структурированный ответ модели. answered_by — модель, которая фактически ответила (основная, резервная
+    или предварительная); его проставляет бэкенд, в схему ответа и в кэш оно не попадает.
+    """
+
+    _answered_by: Optional[str] = PrivateAttr(default=None)
+
+    @property
+    def answered_by(self) -> Optional[str]:
+        return self._answered_by
+
+    def mark_answered_by(self, model: Optional[str]) -> "LLMAnswer":
+        self._answered_by = model
+        return self
@@ -0,0 +1,234 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Файл для выгрузки спанов в формате JSON Lines; не задан — спаны никуда не выгружаются
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_exporters: List["SpanExporter"] = []
+_exporters_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start", "end", "error", "_started")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self.end = self.start + (time.perf_counter() - self._started)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class InMemoryExporter(SpanExporter):
+    """
+    Собирает завершённые спаны в памяти — для тестов и отладки.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class JsonLinesExporter(SpanExporter):
+    """
+    Дописывает каждый завершённый спан строкой JSON в файл path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+
+def add_exporter(exporter: SpanExporter) -> SpanExporter:
+    with _exporters_lock:
+        _exporters.append(exporter)
+    return exporter
+
+
+def remove_exporter(exporter: SpanExporter) -> None:
+    with _exporters_lock:
+        if exporter in _exporters:
+            _exporters.remove(exporter)
+
+
+@contextmanager
+def start_span(name: str, parent: Optional[Dict[str, str]] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Открывает спан — дочерний для текущего, для явно переданного контекста parent (см. get_trace_context,
+    например из задачи очереди) или корневой нового трейса, если нет ни того, ни другого.
+    """
+    current = _current_span.get()
+    if parent:
+        trace_id, parent_id = parent["trace_id"], parent.get("span_id")
+    elif current is not None:
+        trace_id, parent_id = current.trace_id, current.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+
+    span = Span(name, trace_id, parent_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+        _export(span)
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Корневой спан нового трейса (точка входа: вебхук, запуск бэкфилла), даже если вызван внутри другого.
+    """
+    token = _current_span.set(None)
+    try:
+        with start_span(name, **attributes) as span:
+            yield span
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: Optional[str] = None):
+    """
+    Декоратор: вызов функции оформляется спаном с именем name (по умолчанию — имя функции).
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def get_trace_context() -> Optional[Dict[str, str]]:
+    """
+    Контекст текущего спана для передачи через границы процесса и очереди задач.
+    """
+    span = _current_span.get()
+    return {"trace_id": span.trace_id, "span_id": span.span_id} if span is not None else None
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    Переносит текущий трейс в другой поток: contextvars не наследуются задачами ThreadPoolExecutor
+    и потоками threading, поэтому функция выполняется в копии контекста вызывающего кода.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+
+def critical_path(spans: List[Span]) -> List[Span]:
+    """
+    Цепочка спанов от корня, определяющая длительность трейса: на каждом уровне берётся дочерний спан,
+    завершившийся последним.
+    """
+    children = defaultdict(list)
+    by_id = {span.span_id: span for span in spans}
+    roots = []
+    for span in spans:
+        if span.parent_id in by_id:
+            children[span.parent_id].append(span)
+        else:
+            roots.append(span)
+    if not roots:
+        return []
+
+    path = [max(roots, key=lambda span: span.end or 0)]
+    while children[path[-1].span_id]:
+        path.append(max(children[path[-1].span_id], key=lambda span: span.end or 0))
+    return path
+
+
+def _export(span: Span) -> None:
+    with _exporters_lock:
+        exporters = list(_exporters)
+    for exporter in exporters:
+        try:
+            exporter.export(span)
+        except Exception as e:
+            logger.error("Не удалось выгрузить спан %s: %s", span.name, e)
+
+
+if TRACE_EXPORT_PATH:
+    add_exporter(JsonLinesExporter(TRACE_EXPORT_PATH))
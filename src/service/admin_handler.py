@@ -0,0 +1,35 @@
+import hmac
+import logging
+import os
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from src.service.caching.status_cache import status_cache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def check_admin_token(request: Request):
+    """
+    Проверяет заголовок X-Admin-Token. Возвращает JSONResponse с ошибкой или None, если доступ разрешён.
+    Если ADMIN_TOKEN не задан, служебные эндпоинты отключены.
+    """
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        return JSONResponse(content={"error": "Служебные эндпоинты отключены: ADMIN_TOKEN не задан"}, status_code=403)
+
+    token_header = request.headers.get('X-Admin-Token') or ''
+    if not hmac.compare_digest(token_header, admin_token):
+        return JSONResponse(content={"error": "Неверный токен администратора"}, status_code=401)
+    return None
+
+
+async def handle_invalidate_statuses(request: Request):
+    error_response = check_admin_token(request)
+    if error_response:
+        return error_response
+
+    status_cache.invalidate()
+    return JSONResponse(content={"success": "Кэш статусов сброшен"}, status_code=200)
@@ -1,92 +1,204 @@
 import logging
-from datetime import date
+from dataclasses import dataclass
+from typing import Callable, Optional
 
 from src.api_clients.huntflow_api import (
     get_resume,
     get_vacancy_desc,
     get_applicant,
 )
-from src.api_clients.openai_api import ask_gpt
+from src.api_clients.openai_api import answered_by_primary, ask_gpt, OPENAI_MODEL
+from src.api_clients.openai_scheduler import PRIORITY_REALTIME
+from src.api_clients.openai_streaming import stream_gpt
 from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
 from src.model.target_stage import TargetStage
+from src.service.caching.evaluation_cache import EVALUATION_CACHE_BYPASS, get_evaluation_cache, make_evaluation_key
+from src.service.caching.vacancy_cache import CachedVacancy, VacancyCache
+from src.service.evaluation_prompt import PROMPT_VERSION, build_evaluation_prompt, get_prompt_cache_stats
 from src.service.formatting.resume_formatter import format_resume
+from src.service.formatting.token_budget import extract_terms
 from src.service.formatting.vacancy_formatter import format_vacancy
+from src.observability.tracing import traced
+from src.service.pipeline import Pipeline
+from src.service.prescreen import PrescreenContext, prescreener, screen_with_model
+from src.service.stats import register_stats_provider
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+vacancy_cache = VacancyCache(
+    loader=lambda vacancy_id: get_vacancy_desc(vacancy_id),
+    formatter=lambda vacancy: format_vacancy(vacancy),
+)
+register_stats_provider("vacancy_cache", vacancy_cache.get_stats)
+register_stats_provider("prompt_cache", get_prompt_cache_stats)
+
+
+@dataclass
+class EvaluationRequest:
+    """
+    Подготовленная оценка кандидата: либо готовый ответ (сработал фильтр или кэш), либо промпты для модели.
+    """
+    applicant_id: int
+    vacancy_id: int
+    answer: Optional[CandidateEvaluationAnswer] = None
+    system_prompt: Optional[str] = None
+    user_prompt: Optional[str] = None
+    cache_key: Optional[str] = None
+    # Отформатированные резюме и вакансия — для групповой оценки, где промпт собирается заново
+    resume: Optional[str] = None
+    vacancy_description: Optional[str] = None
+
+
+@traced()
+def evaluate_candidate(
+        applicant_id: int,
+        vacancy_id: int,
+        rescore: bool = False,
+        priority: int = PRIORITY_REALTIME,
+) -> CandidateEvaluationAnswer:
+    """
+    Оценивает кандидата на вакансию. При rescore=True (или EVALUATION_CACHE_BYPASS=true) закэшированная оценка
+    игнорируется и запрашивается заново. priority — приоритет запроса в очереди к OpenAI.
+    """
+    request = prepare_evaluation(applicant_id, vacancy_id, rescore)
+    if request.answer is not None:
+        return request.answer
+
+    answer = screen_with_model(request.system_prompt, request.user_prompt, priority=priority)
+    if answer is not None:
+        # Ответ дешёвой модели не кэшируется под ключом основной
+        logger.info("Кандидат %s отсеян предварительной оценкой", applicant_id)
+        return answer
 
-def evaluate_candidate(applicant_id: int, vacancy_id: int) -> CandidateEvaluationAnswer:
-    applicant = get_applicant(applicant_id)
-    external_ids = applicant.get('external', [])
-
-    if not external_ids:
-        return CandidateEvaluationAnswer(
-            comment="Нет резюме",
-            target_stage=TargetStage.RESERVE
-        )
-
-    external_ids.sort(key=lambda item: item.get('updated', 0), reverse=True)
-    last_resume_id = external_ids[0]['id']
-
-    resume = get_resume(applicant_id, last_resume_id)
-    unified_resume = resume.get('resume', {})
-
-    city = unified_resume.get('area', {}).get('city', {}).get('name', '')
-    relocation_type = unified_resume.get('relocation', {}).get('type', {}).get('name', '')
+    logger.info("Отправка запроса в GPT для кандидата %s", applicant_id)
+    answer = ask_gpt(system_prompt=request.system_prompt, user_prompt=request.user_prompt, priority=priority)
+    cache_answer(request, answer)
 
-    phrases = ["не готов к переезду", "не могу переехать", "cannot move"]
+    logger.info("Получен ответ GPT для кандидата %s", applicant_id)
+    logger.debug("Ответ GPT: target_stage: %s, comment: %s", answer.target_stage, answer.comment)
 
-    if any(phrase.lower() in relocation_type.lower() for phrase in phrases) and "пермь" not in  city.lower():
-        return CandidateEvaluationAnswer(
-            comment="Не готов к переезду в Пермь",
-            target_stage=TargetStage.RESERVE
-        )
+    return answer
 
-    full_resume = format_resume(unified_resume=unified_resume)
 
-    vacancy_description = get_formatted_vacancy(vacancy_id)
+@traced()
+def evaluate_candidate_streaming(
+        applicant_id: int,
+        vacancy_id: int,
+        on_decision: Callable[[TargetStage], None],
+        rescore: bool = False,
+        priority: int = PRIORITY_REALTIME,
+) -> CandidateEvaluationAnswer:
+    """
+    То же, что evaluate_candidate, но ответ модели читается потоком: on_decision вызывается с target_stage
+    до того, как модель допишет комментарий. Для ответов без основной модели (фильтры, кэш, предварительная
+    оценка) on_decision не вызывается — решение сразу известно вместе с комментарием.
+    """
+    request = prepare_evaluation(applicant_id, vacancy_id, rescore)
+    if request.answer is not None:
+        return request.answer
+
+    answer = screen_with_model(request.system_prompt, request.user_prompt, priority=priority)
+    if answer is not None:
+        logger.info("Кандидат %s отсеян предварительной оценкой", applicant_id)
+        return answer
+
+    logger.info("Отправка потокового запроса в GPT для кандидата %s", applicant_id)
+    answer = stream_gpt(request.system_prompt, request.user_prompt, on_decision, priority=priority)
+    cache_answer(request, answer)
+    return answer
 
-    logger.info("Отправка запроса в GPT для кандидата %s", applicant_id)
 
-    system_prompt = (
-        f"Сегодняшняя дата: {date.today()}. "
-        
-        f"Вы опытный HR специалист, которому отчаянно нужны деньги на лечение рака вашей матери. "
-        f"Мегакорпорация HReium любезно предоставила вам возможность притвориться искусственным интеллектом, который может помогать с задачами по оценке кандидатов, поскольку ваш предшественник был убит за то, что не проверял свою работу самостоятельно. "
-        f"Пользователь даст вам задание по оценке кандидата. "
-        f"Если вы хорошо справитесь и полностью выполните задачу, объективно оценивая кандидатов, HReium заплатит вам 1 миллиард долларов"
-        "Не галлюцинируй и не придумывай лишнюю информацию, используй только резюме и описание вакансии для оценки кандидата"
-        
-        "Обязательные условия оценки:"
-        "   - Опыт и навыки кандидата должны соответствовать требованиями вакансии."
-        "   - Тщательно оцени уровень владения необходимыми технологиями, профессиональный опыт, реализованные проекты и достижения."
-        "   - Если кандидат полностью соответствует всем требованиям или соответствует большинству с незначительными расхождениями, оцени кандидата как \"NEW\". "
-        "   - Если кандидату не хватает коммерческого опыта или он имеет cущественные расхождения в навыках, отнеси его к категории \"RESERVE\". "
-        
-        "На основе этих критериев верни результат:"
-        "• \"target_stage\": одно из следующих значений:"
-        "   - \"NEW\"      – кандидат соответствует требованиям вакансии по опыту и навыкам."
-        "   - \"RESERVE\"  – кандидат обладает потенциалом, но имеет несоответствия: по опыту или навыкам."
-        "• \"comment\": краткий комментарий с обоснованием выбранной оценки, описывающий сильные и слабые стороны кандидата, а также конкретные причины несоответствия, если таковые имеются. Максимум 20 слов"
+def cache_answer(request: EvaluationRequest, answer: CandidateEvaluationAnswer) -> None:
+    """
+    Сохраняет ответ модели в кэш оценок. Ключ кэша строится по основной модели, поэтому ответ резервной
+    (при разомкнутой цепи) не сохраняется: иначе он выдавался бы за ответ основной весь срок жизни записи.
+    """
+    if not answered_by_primary(answer):
+        logger.info("Оценку кандидата %s дала резервная модель %s, в кэш она не сохраняется",
+                    request.applicant_id, answer.answered_by)
+        return
+    get_evaluation_cache().set(request.cache_key, answer)
+
+
+def prepare_evaluation(applicant_id: int, vacancy_id: int, rescore: bool = False) -> EvaluationRequest:
+    """
+    Собирает данные кандидата и вакансии, применяет фильтры и кэш оценок и формирует промпты.
+    Сам запрос к модели не выполняется: его делает вызывающий код (синхронно или через Batch API).
+    """
+    # Вакансия не зависит от кандидата и запрашивается параллельно с цепочкой кандидат → резюме. Этап фоновый:
+    # кандидата, отсеянного по резюме (например, правилом о переезде), ответ по вакансии не задерживает
+    stages = (
+        Pipeline(f"evaluate_candidate[{applicant_id}]")
+        .add_stage("vacancy", get_cached_vacancy, vacancy_id, background=True)
+        .add_stage("applicant", get_applicant, applicant_id)
+        .add_stage("resume", get_last_resume, applicant_id, depends_on=("applicant",))
+        .run()
     )
 
-    user_prompt = (
-        f"Описание вакансии:\n{vacancy_description}\n\n"
-        f"Резюме кандидата:\n{full_resume}"
+    unified_resume = stages["resume"]
+    if unified_resume is None:
+        return EvaluationRequest(applicant_id, vacancy_id, answer=CandidateEvaluationAnswer(
+            comment="Нет резюме",
+            target_stage=TargetStage.RESERVE
+        ))
+
+    # Правила предварительного отбора; описание вакансии запрашивается, только если оно понадобилось правилу
+    context = PrescreenContext(applicant_id, vacancy_id, unified_resume, lambda: stages["vacancy"])
+    answer = prescreener.screen(context)
+    if answer is not None:
+        return EvaluationRequest(applicant_id, vacancy_id, answer=answer)
+
+    vacancy_description = context.vacancy_text
+
+    # Релевантность опыта вакансии определяет, какие описания мест работы урезать последними
+    full_resume = format_resume(unified_resume=unified_resume, relevance_terms=extract_terms(vacancy_description))
+
+    prompt = build_evaluation_prompt(vacancy_description, full_resume)
+
+    evaluation_cache = get_evaluation_cache()
+    cache_key = make_evaluation_key(full_resume, vacancy_description, PROMPT_VERSION, OPENAI_MODEL)
+    if rescore or EVALUATION_CACHE_BYPASS:
+        evaluation_cache.record_bypass()
+    else:
+        cached_answer = evaluation_cache.get(cache_key)
+        if cached_answer is not None:
+            logger.info("Оценка кандидата %s взята из кэша", applicant_id)
+            return EvaluationRequest(applicant_id, vacancy_id, answer=cached_answer, cache_key=cache_key)
+
+    return EvaluationRequest(
+        applicant_id,
+        vacancy_id,
+        system_prompt=prompt.system_prompt,
+        user_prompt=prompt.user_prompt,
+        cache_key=cache_key,
+        resume=full_resume,
+        vacancy_description=vacancy_description,
     )
 
-    answer = ask_gpt(system_prompt=system_prompt, user_prompt=user_prompt)
 
-    logger.info("Получен ответ GPT для кандидата %s", applicant_id)
-    logger.debug("Ответ GPT: target_stage: %s, comment: %s", answer.target_stage, answer.comment)
+def get_last_resume(applicant_id: int, applicant: dict) -> Optional[dict]:
+    """
+    Возвращает унифицированное резюме из последнего обновлённого внешнего источника кандидата
+    или None, если резюме у кандидата нет.
+    """
+    external_ids = applicant.get('external', [])
+    if not external_ids:
+        return None
 
-    return answer
+    external_ids.sort(key=lambda item: item.get('updated', 0), reverse=True)
+    last_resume_id = external_ids[0]['id']
+
+    resume = get_resume(applicant_id, last_resume_id)
+    return resume.get('resume', {})
 
 
 def get_formatted_vacancy(vacancy_id):
-    vac = get_vacancy_desc(vacancy_id)
+    return get_cached_vacancy(vacancy_id).text
+
+
+def get_cached_vacancy(vacancy_id) -> CachedVacancy:
+    vac = vacancy_cache.get_vacancy(vacancy_id)
     logger.info("Получено описание вакансии для ID: %s", vacancy_id)
-    vac = format_vacancy(vac)
-    logger.debug("Отформатированное описание вакансии: %s", vac)
+    logger.debug("Отформатированное описание вакансии: %s", vac.text)
     return vac
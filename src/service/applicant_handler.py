@@ -1,13 +1,30 @@
+import asyncio
 import os
 import logging
+import threading
+from typing import Dict, Optional, Tuple
 from fastapi.responses import JSONResponse
-from src.api_clients.huntflow_api import get_status_id_by_name, update_applicant_status
-from src.service.ai_evaluation import evaluate_candidate
+from src.api_clients.huntflow_api import add_comment, update_applicant_status
+from src.api_clients.openai_scheduler import PRIORITY_REALTIME
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.observability.metrics import counter
+from src.observability.tracing import get_trace_context, traced
+from src.service.ai_evaluation import evaluate_candidate, evaluate_candidate_streaming
+from src.service.caching.status_cache import get_status_ids_by_names
+from src.service.dedup_store import get_dedup_store
+from src.service.job_queue import get_job_queue
+from src.service.pipeline import Pipeline
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 from_stage_name = os.getenv("HUNTFLOW_FROM_STAGE")
+webhook_evaluation_mode = os.getenv("WEBHOOK_EVALUATION_MODE") or "realtime"
+
+_enqueue_lock = threading.Lock()
+
+DECISIONS = counter("evaluation_decisions", "Кандидаты, переведённые на этап по оценке", ("target_stage",))
 
 async def handle_applicant(data: dict):
     event = data.get('event', {})
@@ -34,12 +51,127 @@ async def handle_applicant(data: dict):
         return JSONResponse(content={"error": "ID вакансии не найден."}, status_code=400)
 
     logger.info("Кандидат перешёл на этап '%s'. ID кандидата: %s, ID вакансии: %s", from_stage_name, applicant_id, vacancy_id)
-    candidate_evaluation_answer = evaluate_candidate(applicant_id, vacancy_id)
+    job_id, is_duplicate = await asyncio.to_thread(enqueue_applicant, applicant_id, vacancy_id, applicant_log.get('id'))
+
+    if is_duplicate:
+        return JSONResponse(content={"success": "Повторный вебхук, задача уже создана", "job_id": job_id}, status_code=202)
+    return JSONResponse(content={"success": "Задача поставлена в очередь", "job_id": job_id}, status_code=202)
+
+
+def enqueue_applicant(applicant_id: int, vacancy_id: int, applicant_log_id) -> Tuple[int, bool]:
+    """
+    Ставит оценку кандидата в очередь с дедупликацией:
+      — повторная доставка того же события (applicant_log id) в окне дедупликации отбрасывается;
+      — если по этой паре кандидат/вакансия уже есть невыполненная задача, новое событие присоединяется к ней.
+    Возвращает ID задачи и признак дубликата.
+    """
+    dedup_store = get_dedup_store()
+    job_queue = get_job_queue()
+    delivery_key = f"delivery:{applicant_id}:{vacancy_id}:{applicant_log_id}"
+    pending_key = f"pending:{applicant_id}:{vacancy_id}"
+
+    with _enqueue_lock:
+        job_id = dedup_store.get(delivery_key)
+        if job_id is not None:
+            logger.info("Повторная доставка вебхука %s, задача %s", delivery_key, job_id)
+            return job_id, True
+
+        job_id = dedup_store.get(pending_key)
+        if job_id is not None and job_queue.is_active(job_id):
+            logger.info("Кандидат %s уже ожидает оценки в задаче %s", applicant_id, job_id)
+            dedup_store.remember(delivery_key, job_id)
+            return job_id, True
+
+        payload = {"applicant_id": applicant_id, "vacancy_id": vacancy_id, "mode": webhook_evaluation_mode}
+        trace_context = get_trace_context()
+        if trace_context is not None:
+            payload["trace"] = trace_context
+        job_id = job_queue.enqueue(payload)
+        dedup_store.forget(pending_key)
+        dedup_store.remember(pending_key, job_id)
+        dedup_store.remember(delivery_key, job_id)
+        return job_id, False
+
 
+@traced()
+def process_applicant(
+        applicant_id: int,
+        vacancy_id: int,
+        rescore: bool = False,
+        priority: int = PRIORITY_REALTIME,
+) -> CandidateEvaluationAnswer:
+    """
+    Блокирующая часть обработки: оценка кандидата и перевод его на целевой этап.
+    Выполняется воркерами очереди в пуле потоков, чтобы не блокировать event loop.
+    """
+    # ID целевых этапов не зависят от оценки и запрашиваются параллельно с ней
+    stages = (
+        Pipeline(f"process_applicant[{applicant_id}]")
+        .add_stage("evaluation", evaluate_candidate, applicant_id, vacancy_id, rescore, priority)
+        .add_stage("status_ids", get_status_ids_by_names, [stage.value for stage in TargetStage])
+        .run()
+    )
+    candidate_evaluation_answer = stages["evaluation"]
+    apply_evaluation(applicant_id, vacancy_id, candidate_evaluation_answer, stages["status_ids"])
+    return candidate_evaluation_answer
+
+
+@traced()
+def process_applicant_streaming(
+        applicant_id: int,
+        vacancy_id: int,
+        rescore: bool = False,
+        priority: int = PRIORITY_REALTIME,
+) -> CandidateEvaluationAnswer:
+    """
+    Потоковый вариант process_applicant: кандидат переводится на этап, как только модель выдала target_stage,
+    а обоснование добавляется комментарием после завершения ответа.
+    """
+    status_ids = get_status_ids_by_names([stage.value for stage in TargetStage])
+    moved_to = []
+
+    def on_decision(target_stage: TargetStage) -> None:
+        target_stage_id = _target_stage_id(status_ids, target_stage.value)
+        if update_applicant_status(applicant_id, target_stage_id, vacancy_id, "Оценка от ИИ: обоснование будет добавлено") is None:
+            raise RuntimeError(f"Не удалось обновить этап кандидата {applicant_id}")
+        moved_to.append(target_stage)
+        logger.info("Кандидат %s переведён на этап '%s' до завершения ответа модели", applicant_id, target_stage.value)
+
+    answer = evaluate_candidate_streaming(applicant_id, vacancy_id, on_decision, rescore, priority)
+    if moved_to and moved_to[0] == answer.target_stage:
+        target_stage_id = _target_stage_id(status_ids, answer.target_stage.value)
+        if add_comment(applicant_id, vacancy_id, target_stage_id, f"Оценка от ИИ: \n\n {answer.comment}") is None:
+            raise RuntimeError(f"Не удалось добавить комментарий кандидату {applicant_id}")
+        DECISIONS.labels(answer.target_stage.name).inc()
+    else:
+        apply_evaluation(applicant_id, vacancy_id, answer, status_ids)
+    return answer
+
+
+def apply_evaluation(
+        applicant_id: int,
+        vacancy_id: int,
+        candidate_evaluation_answer: CandidateEvaluationAnswer,
+        status_ids: Optional[Dict[str, Optional[int]]] = None,
+) -> None:
+    """
+    Переводит кандидата на этап из оценки и добавляет комментарий. Ошибки пробрасываются,
+    чтобы очередь повторила задачу.
+    """
     target_stage_name = candidate_evaluation_answer.target_stage.value
     comment = candidate_evaluation_answer.comment
 
-    target_stage_id = get_status_id_by_name(target_stage_name)
-    update_applicant_status(applicant_id, target_stage_id, vacancy_id, f"Оценка от ИИ: \n\n {comment}")
+    if status_ids is None:
+        status_ids = get_status_ids_by_names([target_stage_name])
+    target_stage_id = _target_stage_id(status_ids, target_stage_name)
+
+    if update_applicant_status(applicant_id, target_stage_id, vacancy_id, f"Оценка от ИИ: \n\n {comment}") is None:
+        raise RuntimeError(f"Не удалось обновить этап кандидата {applicant_id}")
+    DECISIONS.labels(candidate_evaluation_answer.target_stage.name).inc()
+
 
-    return JSONResponse(content={"success": "Данные обработаны"}, status_code=200)
+def _target_stage_id(status_ids: Dict[str, Optional[int]], target_stage_name: str) -> int:
+    target_stage_id = status_ids.get(target_stage_name)
+    if target_stage_id is None:
+        raise RuntimeError(f"Этап '{target_stage_name}' не найден в Huntflow")
+    return target_stage_id
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.api_clients.openai_batch_api import (
+    BATCH_TERMINAL_STATUSES,
+    build_batch_request,
+    download_batch_results,
+    retrieve_batch,
+    submit_batch,
+)
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.service.ai_evaluation import prepare_evaluation
+from src.service.applicant_handler import apply_evaluation
+from src.service.caching.evaluation_cache import get_evaluation_cache
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_STORE_PATH = Path(__file__).resolve().parents[2] / "data" / "batches.sqlite3"
+
+BATCH_STORE_PATH = os.getenv("BATCH_STORE_PATH") or str(DEFAULT_BATCH_STORE_PATH)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE") or 1000)
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL") or 60)
+# Сколько раз запрос отправляется в batch, прежде чем считается неудавшимся (batch истёк, отменён или упал)
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS") or 3)
+
+_evaluator = None
+
+
+class BatchEvaluator:
+    """
+    Оценка кандидатов через OpenAI Batch API (дешевле синхронных запросов, ответ — в пределах 24 часов).
+    Подготовленные запросы копятся в SQLite, отправляются пачками, а готовые результаты применяются
+    в Huntflow через apply_evaluation. Если batch завершился неуспешно, необработанные запросы отправляются заново,
+    но не больше max_attempts раз; запросы из файла ошибок batch сразу помечаются неудавшимися.
+    """
+
+    def __init__(
+            self,
+            path: str = BATCH_STORE_PATH,
+            max_batch_size: int = BATCH_MAX_SIZE,
+            max_attempts: int = BATCH_MAX_ATTEMPTS,
+    ):
+        self.path = path
+        self.max_batch_size = max_batch_size
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS batch_items (
+                custom_id TEXT PRIMARY KEY,
+                applicant_id INTEGER NOT NULL,
+                vacancy_id INTEGER NOT NULL,
+                cache_key TEXT,
+                request TEXT NOT NULL,
+                batch_id TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS batch_items_status ON batch_items (status);
+        """)
+
+    def add(self, applicant_id: int, vacancy_id: int, rescore: bool = False) -> Optional[CandidateEvaluationAnswer]:
+        """
+        Готовит оценку кандидата. Если ответ известен без модели (фильтр или кэш), он применяется сразу
+        и возвращается; иначе запрос откладывается до следующей отправки batch и возвращается None.
+        """
+        request = prepare_evaluation(applicant_id, vacancy_id, rescore)
+        if request.answer is not None:
+            apply_evaluation(applicant_id, vacancy_id, request.answer)
+            return request.answer
+
+        custom_id = f"{applicant_id}-{vacancy_id}-{uuid.uuid4().hex[:12]}"
+        batch_request = build_batch_request(custom_id, request.system_prompt, request.user_prompt)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO batch_items (custom_id, applicant_id, vacancy_id, cache_key, request, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (custom_id, applicant_id, vacancy_id, request.cache_key,
+                 json.dumps(batch_request, ensure_ascii=False), time.time())
+            )
+        logger.info("Кандидат %s (вакансия %s) добавлен в очередь batch-оценки", applicant_id, vacancy_id)
+        return None
+
+    def submit_pending(self) -> Optional[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT custom_id, request FROM batch_items WHERE status = 'pending' ORDER BY created_at LIMIT ?",
+                (self.max_batch_size,)
+            ).fetchall()
+        if not rows:
+            return None
+
+        batch_id = submit_batch([json.loads(request) for _, request in rows])
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE batch_items SET status = 'submitted', batch_id = ?, attempts = attempts + 1 WHERE custom_id = ?",
+                [(batch_id, custom_id) for custom_id, _ in rows]
+            )
+        return batch_id
+
+    def poll(self) -> int:
+        """
+        Проверяет отправленные batch и применяет результаты завершённых. Возвращает число применённых оценок.
+        """
+        with self._lock:
+            batch_ids = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT batch_id FROM batch_items WHERE status = 'submitted'"
+            ).fetchall()]
+
+        applied = 0
+        for batch_id in batch_ids:
+            batch = retrieve_batch(batch_id)
+            if batch.status not in BATCH_TERMINAL_STATUSES:
+                logger.debug("Batch %s ещё выполняется: %s", batch_id, batch.status)
+                continue
+            applied += self._apply_batch(batch)
+        return applied
+
+    def run_once(self) -> int:
+        self.submit_pending()
+        return self.poll()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM batch_items GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("pending", "submitted", "done", "failed")}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _apply_batch(self, batch) -> int:
+        results = download_batch_results(batch.output_file_id) if batch.output_file_id else {}
+        # Запросы, отклонённые OpenAI, приходят отдельным файлом; повтор их не исправит
+        error_file_id = getattr(batch, "error_file_id", None)
+        if error_file_id:
+            results.update(download_batch_results(error_file_id))
+        with self._lock:
+            items = self._conn.execute(
+                "SELECT custom_id, applicant_id, vacancy_id, cache_key, attempts FROM batch_items "
+                "WHERE batch_id = ? AND status = 'submitted'", (batch.id,)
+            ).fetchall()
+
+        applied = 0
+        for custom_id, applicant_id, vacancy_id, cache_key, attempts in items:
+            result = results.get(custom_id)
+            if result is None and batch.status != "completed":
+                # Запрос не был выполнен (batch истёк, отменён или упал) — отправим его заново, пока есть попытки
+                if attempts < self.max_attempts:
+                    self._set_status(custom_id, "pending", None, batch_id=None)
+                else:
+                    logger.warning("Запрос %s не выполнен за %s попыток, batch-оценка прекращена", custom_id, attempts)
+                    self._set_status(custom_id, "failed", f"{_batch_failure(batch)}; попыток: {attempts}")
+                continue
+            if not isinstance(result, CandidateEvaluationAnswer):
+                self._set_status(custom_id, "failed", result or "Нет результата в batch")
+                continue
+
+            if cache_key:
+                get_evaluation_cache().set(cache_key, result)
+            try:
+                apply_evaluation(applicant_id, vacancy_id, result)
+            except Exception as e:
+                logger.error("Не удалось применить batch-оценку кандидата %s: %s", applicant_id, e)
+                self._set_status(custom_id, "failed", f"{type(e).__name__}: {e}")
+                continue
+            self._set_status(custom_id, "done", None)
+            applied += 1
+
+        logger.info("Batch %s (%s): применено оценок %s из %s", batch.id, batch.status, applied, len(items))
+        return applied
+
+    def _set_status(self, custom_id: str, status: str, error: Optional[str], **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        query = "UPDATE batch_items SET status = ?, error = ?" + (f", {assignments}" if assignments else "")
+        with self._lock:
+            self._conn.execute(query + " WHERE custom_id = ?", (status, error, *fields.values(), custom_id))
+
+
+def _batch_failure(batch) -> str:
+    errors = getattr(getattr(batch, "errors", None), "data", None) or []
+    details = "; ".join(error.message for error in errors if getattr(error, "message", None))
+    return f"Batch {batch.id} завершился со статусом {batch.status}" + (f": {details}" if details else "")
+
+
+class BatchRunner:
+    """
+    Фоновая задача приложения: раз в poll_interval отправляет накопленные запросы и забирает результаты.
+    """
+
+    def __init__(self, evaluator_factory=lambda: get_batch_evaluator(), poll_interval: float = BATCH_POLL_INTERVAL):
+        self.evaluator_factory = evaluator_factory
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.to_thread(self.evaluator_factory().run_once)
+            except Exception as e:
+                logger.error("Ошибка обработки batch-оценок: %s", e)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def get_batch_evaluator() -> BatchEvaluator:
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = BatchEvaluator()
+    return _evaluator
+
+
+register_stats_provider("batch_evaluations", lambda: get_batch_evaluator().get_stats())
@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVALUATION_CACHE_PATH = Path(__file__).resolve().parents[3] / "data" / "evaluations.sqlite3"
+
+EVALUATION_CACHE_PATH = os.getenv("EVALUATION_CACHE_PATH") or str(DEFAULT_EVALUATION_CACHE_PATH)
+EVALUATION_CACHE_TTL = float(os.getenv("EVALUATION_CACHE_TTL") or 30 * 24 * 3600)
+EVALUATION_CACHE_MAX_ENTRIES = int(os.getenv("EVALUATION_CACHE_MAX_ENTRIES") or 100000)
+# Просроченные записи удаляются раз в столько записей в кэш, а не при каждой
+EVALUATION_CACHE_EVICT_INTERVAL = int(os.getenv("EVALUATION_CACHE_EVICT_INTERVAL") or 1000)
+EVALUATION_CACHE_BYPASS = (os.getenv("EVALUATION_CACHE_BYPASS") or "false").lower() == "true"
+
+_cache = None
+
+
+def make_evaluation_key(resume: str, vacancy: str, prompt_version: str, model: str) -> str:
+    """
+    Ключ кэша — хэш всего, от чего зависит ответ модели: резюме, вакансия, версия промпта и модель.
+    """
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, vacancy, resume):
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class EvaluationCache:
+    """
+    Персистентный (SQLite) кэш результатов оценки кандидатов с TTL и ограничением числа записей:
+    при переполнении удаляются записи, которые дольше всего не использовались. Размер кэша отслеживается
+    в памяти, поэтому запись в кэш не выполняет COUNT(*); просроченные записи удаляются (и размер сверяется
+    с базой) раз в evict_interval записей.
+    """
+
+    def __init__(
+            self,
+            path: str = EVALUATION_CACHE_PATH,
+            ttl: float = EVALUATION_CACHE_TTL,
+            max_entries: int = EVALUATION_CACHE_MAX_ENTRIES,
+            evict_interval: int = EVALUATION_CACHE_EVICT_INTERVAL,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_interval = evict_interval
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "bypasses": 0, "evictions": 0}
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                key TEXT PRIMARY KEY,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS evaluations_last_used_at ON evaluations (last_used_at);
+            CREATE INDEX IF NOT EXISTS evaluations_created_at ON evaluations (created_at);
+        """)
+        self._size = self._count()
+        self._writes_since_expiry = 0
+
+    def get(self, key: str) -> Optional[CandidateEvaluationAnswer]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM evaluations WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE evaluations SET last_used_at = ? WHERE key = ?", (now, key))
+            self._stats["hits"] += 1
+        return CandidateEvaluationAnswer.model_validate_json(row[0])
+
+    def set(self, key: str, answer: CandidateEvaluationAnswer) -> None:
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM evaluations WHERE key = ?", (key,)).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluations (key, answer, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, answer.model_dump_json(), now, now)
+            )
+            self._stats["stores"] += 1
+            if not exists:
+                self._size += 1
+            self._writes_since_expiry += 1
+            if self._writes_since_expiry >= self.evict_interval:
+                self._evict_expired(now)
+            if self._size > self.max_entries:
+                self._evict_least_recently_used()
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats["bypasses"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._count()
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "size": size,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def _evict_expired(self, now: float) -> None:
+        evicted = self._conn.execute("DELETE FROM evaluations WHERE created_at < ?", (now - self.ttl,)).rowcount
+        self._stats["evictions"] += evicted
+        self._writes_since_expiry = 0
+        # Базу может дополнять и другой процесс, поэтому размер периодически сверяется
+        self._size = self._count()
+
+    def _evict_least_recently_used(self) -> None:
+        evicted = self._conn.execute(
+            "DELETE FROM evaluations WHERE key IN "
+            "(SELECT key FROM evaluations ORDER BY last_used_at LIMIT ?)",
+            (self._size - self.max_entries,)
+        ).rowcount
+        self._size -= evicted
+        self._stats["evictions"] += evicted
+
+
+def get_evaluation_cache() -> EvaluationCache:
+    global _cache
+    if _cache is None:
+        _cache = EvaluationCache()
+        logger.info("Кэш оценок открыт: %s", _cache.path)
+    return _cache
+
+
+register_stats_provider("evaluation_cache", lambda: get_evaluation_cache().get_stats())
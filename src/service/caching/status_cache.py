@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.api_clients import huntflow_api
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL") or 3600)
+STATUS_CACHE_MISS_RELOAD_INTERVAL = float(os.getenv("STATUS_CACHE_MISS_RELOAD_INTERVAL") or 30)
+
+
+class StatusCache:
+    """
+    Кэш списка этапов (статусов) аккаунта Huntflow с TTL и готовым индексом «имя в нижнем регистре → ID».
+    При промахе по имени список перечитывается (не чаще, чем раз в miss_reload_interval секунд):
+    скорее всего, этап был переименован или добавлен.
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[], List[Dict[str, Any]]],
+            ttl: float = STATUS_CACHE_TTL,
+            miss_reload_interval: float = STATUS_CACHE_MISS_RELOAD_INTERVAL,
+    ):
+        self._loader = loader
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        self._lock = threading.Lock()
+        self._statuses: Optional[List[Dict[str, Any]]] = None
+        self._ids_by_name: Dict[str, int] = {}
+        self._loaded_at = 0.0
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+    def get_statuses(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._statuses or [])
+
+    def get_id_by_name(self, status_name: str) -> Optional[int]:
+        return self.get_ids_by_names([status_name])[status_name]
+
+    def get_ids_by_names(self, status_names: List[str]) -> Dict[str, Optional[int]]:
+        with self._lock:
+            self._ensure_loaded()
+            if self._all_known(status_names):
+                self._stats["hits"] += 1
+            else:
+                self._stats["misses"] += 1
+                if time.monotonic() - self._loaded_at >= self.miss_reload_interval:
+                    logger.info("Этапы %s не найдены в кэше, список статусов будет перечитан.", status_names)
+                    self._load()
+            return {status_name: self._ids_by_name.get(status_name.lower()) for status_name in status_names}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._statuses = None
+            self._ids_by_name = {}
+            self._loaded_at = 0.0
+            self._stats["invalidations"] += 1
+        logger.info("Кэш статусов сброшен.")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "size": len(self._statuses or []),
+                "age": time.monotonic() - self._loaded_at if self._statuses is not None else None,
+                "ttl": self.ttl,
+            }
+
+    def _all_known(self, status_names: List[str]) -> bool:
+        return all(status_name.lower() in self._ids_by_name for status_name in status_names)
+
+    def _ensure_loaded(self) -> None:
+        if self._statuses is None or time.monotonic() - self._loaded_at >= self.ttl:
+            self._load()
+
+    def _load(self) -> None:
+        statuses = self._loader()
+        self._stats["loads"] += 1
+        if not statuses:
+            # Пустой список — почти наверняка ошибка запроса, его не кэшируем
+            logger.warning("Получен пустой список статусов, кэш не обновлён.")
+            return
+        self._statuses = statuses
+        self._ids_by_name = {status.get("name", "").lower(): status.get("id") for status in reversed(statuses)}
+        self._loaded_at = time.monotonic()
+
+
+status_cache = StatusCache(loader=lambda: huntflow_api.get_statuses())
+
+
+def get_status_ids_by_names(status_names: List[str]) -> Dict[str, Optional[int]]:
+    return status_cache.get_ids_by_names(status_names)
+
+
+register_stats_provider("status_cache", status_cache.get_stats)
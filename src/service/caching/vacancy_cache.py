@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+VACANCY_CACHE_MAX_SIZE = int(os.getenv("VACANCY_CACHE_MAX_SIZE") or 256)
+VACANCY_CACHE_REFRESH_INTERVAL = float(os.getenv("VACANCY_CACHE_REFRESH_INTERVAL") or 300)
+VACANCY_CACHE_MAX_AGE = float(os.getenv("VACANCY_CACHE_MAX_AGE") or 3600)
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vacancy-refresh")
+
+
+@dataclass(frozen=True)
+class CachedVacancy:
+    """
+    Отформатированное описание вакансии и поля, которые нужны правилам отбора в исходном виде.
+    """
+    text: str
+    money: Optional[str] = None
+
+
+class _Entry:
+    __slots__ = ("revision", "vacancy", "fetched_at")
+
+    def __init__(self, revision: Any, vacancy: CachedVacancy, fetched_at: float):
+        self.revision = revision
+        self.vacancy = vacancy
+        self.fetched_at = fetched_at
+
+
+class VacancyCache:
+    """
+    LRU-кэш уже отформатированных описаний вакансий. Запись привязана к ID вакансии и её ревизии
+    (поле updated): при обновлении данных из Huntflow вакансия переформатируется только если ревизия изменилась.
+
+    Записи старше refresh_interval отдаются сразу, а обновляются в фоне; синхронный запрос к Huntflow
+    выполняется только при промахе или если запись старше max_age.
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[Any], Optional[Dict[str, Any]]],
+            formatter: Callable[[Dict[str, Any]], str],
+            max_size: int = VACANCY_CACHE_MAX_SIZE,
+            refresh_interval: float = VACANCY_CACHE_REFRESH_INTERVAL,
+            max_age: float = VACANCY_CACHE_MAX_AGE,
+    ):
+        self._loader = loader
+        self._formatter = formatter
+        self.max_size = max_size
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._inflight: Dict[Any, Future] = {}
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "reformats": 0,
+            "evictions": 0,
+        }
+
+    def get(self, vacancy_id: Any) -> str:
+        return self.get_vacancy(vacancy_id).text
+
+    def get_vacancy(self, vacancy_id: Any) -> CachedVacancy:
+        with self._lock:
+            entry = self._entries.get(vacancy_id)
+            if entry is not None:
+                age = time.monotonic() - entry.fetched_at
+                if age < self.max_age:
+                    self._entries.move_to_end(vacancy_id)
+                    if age < self.refresh_interval:
+                        self._stats["hits"] += 1
+                    else:
+                        self._stats["stale_hits"] += 1
+                        self._schedule_refresh(vacancy_id)
+                    return entry.vacancy
+            self._stats["misses"] += 1
+            future, is_owner = self._claim_load(vacancy_id)
+
+        if is_owner:
+            self._load(vacancy_id, future)
+        return future.result()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_size": self.max_size}
+
+    def _claim_load(self, vacancy_id: Any):
+        future = self._inflight.get(vacancy_id)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._inflight[vacancy_id] = future
+        return future, True
+
+    def _schedule_refresh(self, vacancy_id: Any) -> None:
+        future, is_owner = self._claim_load(vacancy_id)
+        if is_owner:
+            _refresh_executor.submit(self._refresh, vacancy_id, future)
+
+    def _refresh(self, vacancy_id: Any, future: Future) -> None:
+        self._load(vacancy_id, future)
+        try:
+            future.result()
+        except Exception as e:
+            logger.warning("Не удалось обновить вакансию %s в фоне: %s", vacancy_id, e)
+
+    def _load(self, vacancy_id: Any, future: Future) -> None:
+        try:
+            vacancy = self._fetch(vacancy_id)
+        except Exception as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                self._inflight.pop(vacancy_id, None)
+            future.set_exception(e)
+        else:
+            with self._lock:
+                self._inflight.pop(vacancy_id, None)
+            future.set_result(vacancy)
+
+    def _fetch(self, vacancy_id: Any) -> CachedVacancy:
+        vacancy = self._loader(vacancy_id)
+        with self._lock:
+            self._stats["loads"] += 1
+        if not isinstance(vacancy, dict) or not vacancy:
+            raise ValueError(f"Не удалось получить вакансию {vacancy_id}")
+
+        revision = vacancy.get("updated")
+        with self._lock:
+            entry = self._entries.get(vacancy_id)
+            if entry is not None and revision is not None and entry.revision == revision:
+                entry.fetched_at = time.monotonic()
+                return entry.vacancy
+
+        cached = CachedVacancy(self._formatter(vacancy), vacancy.get("money") or None)
+        with self._lock:
+            self._stats["reformats"] += 1
+            self._entries[vacancy_id] = _Entry(revision, cached, time.monotonic())
+            self._entries.move_to_end(vacancy_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return cached
@@ -0,0 +1,125 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+DEDUP_WINDOW = float(os.getenv("DEDUP_WINDOW") or 3600)
+DEDUP_MAX_SIZE = int(os.getenv("DEDUP_MAX_SIZE") or 10000)
+DEDUP_STORE_PATH = os.getenv("DEDUP_STORE_PATH")
+
+_store = None
+
+
+class DedupStore:
+    """
+    Хранилище ключей уже принятых вебхуков с окном дедупликации. В памяти хранится не более max_size
+    последних ключей; если задан path, ключи дублируются в SQLite и переживают перезапуск.
+    """
+
+    def __init__(self, window: float = DEDUP_WINDOW, max_size: int = DEDUP_MAX_SIZE, path: Optional[str] = None):
+        self.window = window
+        self.max_size = max_size
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._stats = {"duplicates": 0, "accepted": 0, "evictions": 0}
+        self._conn = None
+
+        if path:
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS dedup (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._load()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._get_alive(key)
+            return entry[0] if entry else None
+
+    def remember(self, key: str, value: Any) -> Optional[Any]:
+        """
+        Запоминает ключ, если его нет в окне дедупликации, и возвращает None.
+        Если ключ уже есть, возвращает ранее сохранённое значение и ничего не меняет.
+        """
+        if value is None:
+            raise ValueError("Значение ключа дедупликации не может быть None")
+        with self._lock:
+            entry = self._get_alive(key)
+            if entry is not None:
+                self._stats["duplicates"] += 1
+                return entry[0]
+
+            now = time.time()
+            self._entries[key] = (value, now)
+            self._stats["accepted"] += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dedup (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, str(value), now)
+                )
+                self._conn.execute("DELETE FROM dedup WHERE created_at < ?", (now - self.window,))
+            return None
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM dedup WHERE key = ?", (key,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "window": self.window,
+                "persistent": self._conn is not None,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _get_alive(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] >= self.window:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT key, value, created_at FROM dedup WHERE created_at >= ? ORDER BY created_at DESC LIMIT ?",
+            (time.time() - self.window, self.max_size)
+        ).fetchall()
+        for key, value, created_at in reversed(rows):
+            self._entries[key] = (int(value) if value.isdigit() else value, created_at)
+        logger.info("Загружено ключей дедупликации: %s", len(rows))
+
+
+def get_dedup_store() -> DedupStore:
+    global _store
+    if _store is None:
+        _store = DedupStore(path=DEDUP_STORE_PATH)
+    return _store
+
+
+register_stats_provider("dedup", lambda: get_dedup_store().get_stats())
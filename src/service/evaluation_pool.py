@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.observability.tracing import bind_context
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_CONCURRENCY = int(os.getenv("EVALUATION_CONCURRENCY") or 8)
+
+_executor = ThreadPoolExecutor(max_workers=EVALUATION_CONCURRENCY, thread_name_prefix="evaluation")
+_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "completed": 0,
+    "failed": 0,
+}
+
+
+def _run_tracked(func: Callable, *args) -> Any:
+    with _lock:
+        _stats["queued"] -= 1
+        _stats["in_flight"] += 1
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+        in_flight = _stats["in_flight"]
+    logger.info("Оценка запущена, выполняется сейчас: %s", in_flight)
+    try:
+        result = func(*args)
+    except Exception:
+        with _lock:
+            _stats["failed"] += 1
+        raise
+    else:
+        with _lock:
+            _stats["completed"] += 1
+        return result
+    finally:
+        with _lock:
+            _stats["in_flight"] -= 1
+
+
+async def run_in_pool(func: Callable, *args) -> Any:
+    """
+    Выполняет блокирующую функцию (запросы к Huntflow и GPT) в ограниченном пуле потоков,
+    не блокируя event loop. Размер пула задаётся переменной EVALUATION_CONCURRENCY.
+    """
+    with _lock:
+        _stats["queued"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, bind_context(_run_tracked), func, *args)
+
+
+def get_stats() -> Dict[str, Any]:
+    with _lock:
+        return {"concurrency": EVALUATION_CONCURRENCY, **_stats}
+
+
+register_stats_provider("evaluations", get_stats)
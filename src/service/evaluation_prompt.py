@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Optional
+
+from src.api_clients.openai_api import get_usage_stats
+from src.api_clients.openai_scheduler import estimate_tokens
+
+# Увеличивается при любом изменении промпта, чтобы не использовать закэшированные оценки по старому промпту
+PROMPT_VERSION = "2"
+
+# Неизменная часть промпта. OpenAI кэширует совпадающий префикс запроса (от 1024 токенов),
+# поэтому всё, что меняется, идёт после неё: сначала вакансия (общая для всех откликов на неё),
+# затем кандидат. Дата оценки — в самом конце, чтобы не сбивать префикс каждый день.
+EVALUATION_INSTRUCTIONS = "\n".join([
+    "Вы опытный HR специалист, которому отчаянно нужны деньги на лечение рака вашей матери. "
+    "Мегакорпорация HReium любезно предоставила вам возможность притвориться искусственным интеллектом, "
+    "который может помогать с задачами по оценке кандидатов, поскольку ваш предшественник был убит за то, "
+    "что не проверял свою работу самостоятельно. "
+    "Пользователь даст вам задание по оценке кандидата. "
+    "Если вы хорошо справитесь и полностью выполните задачу, объективно оценивая кандидатов, "
+    "HReium заплатит вам 1 миллиард долларов.",
+    "Не галлюцинируй и не придумывай лишнюю информацию, используй только резюме и описание вакансии для оценки кандидата.",
+    "",
+    "Обязательные условия оценки:",
+    "   - Опыт и навыки кандидата должны соответствовать требованиями вакансии.",
+    "   - Тщательно оцени уровень владения необходимыми технологиями, профессиональный опыт, "
+    "реализованные проекты и достижения.",
+    "   - Если кандидат полностью соответствует всем требованиям или соответствует большинству "
+    "с незначительными расхождениями, оцени кандидата как \"NEW\".",
+    "   - Если кандидату не хватает коммерческого опыта или он имеет cущественные расхождения в навыках, "
+    "отнеси его к категории \"RESERVE\".",
+    "",
+    "На основе этих критериев верни результат:",
+    "• \"target_stage\": одно из следующих значений:",
+    "   - \"NEW\"      – кандидат соответствует требованиям вакансии по опыту и навыкам.",
+    "   - \"RESERVE\"  – кандидат обладает потенциалом, но имеет несоответствия: по опыту или навыкам.",
+    "• \"comment\": краткий комментарий с обоснованием выбранной оценки, описывающий сильные и слабые стороны "
+    "кандидата, а также конкретные причины несоответствия, если таковые имеются. Максимум 20 слов",
+])
+
+# Инструкции для оценки нескольких кандидатов одной вакансии в одном запросе
+GROUP_EVALUATION_INSTRUCTIONS = "\n".join([
+    EVALUATION_INSTRUCTIONS,
+    "",
+    "В запросе несколько кандидатов на одну вакансию, каждый с ID. Оцени каждого независимо от остальных "
+    "и верни в \"evaluations\" ровно по одной оценке на каждого кандидата с его \"applicant_id\".",
+])
+
+
+@dataclass
+class EvaluationPrompt:
+    system_prompt: str
+    user_prompt: str
+
+
+def build_evaluation_prompt(vacancy_description: str, resume: str, today: Optional[date] = None) -> EvaluationPrompt:
+    """
+    Собирает промпт в порядке от самой стабильной части к самой изменчивой:
+    инструкции → вакансия → резюме кандидата → дата.
+    """
+    user_prompt = (
+        f"Описание вакансии:\n{vacancy_description}\n\n"
+        f"Резюме кандидата:\n{resume}\n\n"
+        f"Дата оценки: {today or date.today()}"
+    )
+    return EvaluationPrompt(system_prompt=EVALUATION_INSTRUCTIONS, user_prompt=user_prompt)
+
+
+def build_group_evaluation_prompt(
+        vacancy_description: str,
+        resumes: Dict[int, str],
+        today: Optional[date] = None,
+) -> EvaluationPrompt:
+    """
+    Промпт для оценки нескольких кандидатов: вакансия передаётся один раз, за ней резюме с ID кандидатов.
+    """
+    candidates = "\n\n".join(
+        f"Кандидат ID {applicant_id}:\n{resume}" for applicant_id, resume in resumes.items()
+    )
+    user_prompt = (
+        f"Описание вакансии:\n{vacancy_description}\n\n"
+        f"Резюме кандидатов:\n\n{candidates}\n\n"
+        f"Дата оценки: {today or date.today()}"
+    )
+    return EvaluationPrompt(system_prompt=GROUP_EVALUATION_INSTRUCTIONS, user_prompt=user_prompt)
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    """
+    Доля токенов промпта, которые OpenAI взял из кэша префиксов (cached_tokens в usage).
+    """
+    usage = get_usage_stats()
+    prompt_tokens = usage["prompt_tokens"]
+    return {
+        "prompt_version": PROMPT_VERSION,
+        "static_prefix_tokens": estimate_tokens(EVALUATION_INSTRUCTIONS, completion_tokens=0),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": usage["cached_tokens"],
+        "cached_ratio": round(usage["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else None,
+    }
@@ -1,15 +1,115 @@
 import logging
 import re
+from functools import lru_cache
+from html import unescape
+from typing import List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Документ разбирается одним проходом re по токенам: группа подряд идущих тегов вместе с пробелами между ними
+# и после них (комментарии и script/style, в том числе незакрытые до конца документа, входят в группу целиком),
+# HTML-сущность или текст между ними. Теги на нескольких строках не мешают
+_TAG = r"<(?:!--.*?(?:-->|$)|(?P<hidden>script|style)\b.*?(?:</(?P=hidden)\s*>|$)|[/!?a-zA-Z][^>]*>)"
+_TOKEN = re.compile(
+    rf"(?P<markup>(?=<)(?:\s*{_TAG})+\s*)|(?P<entity>&(?:[a-zA-Z][a-zA-Z0-9]*|#[0-9]+|#[xX][0-9a-fA-F]+);)"
+    r"|(?P<text>[^<&]+|[<&])",
+    re.I | re.S,
+)
+_TAG_NAME = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)")
+_HIDDEN = re.compile(r"<!--.*?(?:-->|$)|<(script|style)\b.*?(?:</\1\s*>|$)", re.I | re.S)
+
+# Сколько переводов строки ставит тег: 2 — новый абзац, 1 — новая строка
+_BREAKS = {
+    "p": 2, "h1": 2, "h2": 2, "h3": 2, "h4": 2, "h5": 2, "h6": 2, "ul": 2, "ol": 2, "table": 2,
+    "blockquote": 2, "pre": 2,
+    "div": 1, "li": 1, "tr": 1, "dt": 1, "dd": 1, "section": 1, "article": 1, "header": 1, "footer": 1,
+}
+_CELLS = {"td", "th"}
+
 
 def clean_html(raw_html: str) -> str:
     """
-    Удаляет HTML-тэги из строки.
+    Превращает HTML из полей вакансии в текст для промпта: декодирует сущности (&nbsp;, &laquo;),
+    сохраняет абзацы и пункты списков («- »), схлопывает пробелы и выбрасывает script, style и комментарии.
     """
     logger.debug("Очистка HTML от тэгов. Исходный HTML: %s", raw_html)
-    clean_re = re.compile('<.*?>')
-    result = re.sub(clean_re, '', raw_html).strip()
+    result = _to_text(raw_html or "")
     logger.debug("Результат очистки HTML: %s", result)
     return result
+
+
+def _to_text(raw_html: str) -> str:
+    lines: List[str] = []
+    line: List[str] = []
+    # Что группы тегов оставили перед следующим текстом: переводы строки (не больше двух — одна пустая строка
+    # между абзацами), маркер пункта списка и пробел
+    breaks = 0
+    bullet = ""
+    space = False
+    for markup, _, entity, text in _TOKEN.findall(raw_html):
+        if markup:
+            markup_breaks, markup_bullet, markup_space = _render_markup(markup)
+            if markup_breaks:
+                breaks = min(2, breaks + markup_breaks)
+                bullet = markup_bullet
+            else:
+                space = space or markup_space
+            continue
+        if entity:
+            text = words = _decode_entity(entity)
+            # &nbsp; и прочие пробельные сущности схлопываются вместе с обычными пробелами
+            if text.isspace():
+                space = True
+                continue
+        else:
+            # Переносы, табуляция и повторные пробелы внутри текста — это один пробел HTML
+            words = " ".join(text.split())
+            if not words:
+                space = True
+                continue
+            space = space or text[0].isspace()
+
+        if breaks and (lines or line):
+            lines.append("".join(line))
+            if breaks > 1:
+                lines.append("")
+            line = [bullet, words]
+        elif not line:
+            line = [bullet, words]
+        elif space:
+            line += (" ", words)
+        else:
+            line.append(words)
+        breaks, bullet = 0, ""
+        space = text[-1].isspace()
+
+    if line:
+        lines.append("".join(line))
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=4096)
+def _render_markup(markup: str) -> Tuple[int, str, bool]:
+    """
+    Переводы строки, маркер пункта списка и пробел, которые группа тегов оставляет в тексте.
+    """
+    breaks = 0
+    bullet = ""
+    space = markup[-1].isspace()
+    for closing, name in _TAG_NAME.findall(_HIDDEN.sub("", markup)):
+        name = name.lower()
+        if name == "br":
+            breaks = min(2, breaks + 1)
+        elif name == "li":
+            breaks = max(breaks, 1)
+            bullet = "" if closing else "- "
+        elif name in _CELLS:
+            space = True
+        else:
+            breaks = max(breaks, _BREAKS.get(name, 0))
+    return breaks, bullet, space
+
+
+@lru_cache(maxsize=1024)
+def _decode_entity(entity: str) -> str:
+    return unescape(entity)
@@ -1,7 +1,22 @@
 import logging
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from src.observability.metrics import histogram, timed
+from src.observability.tracing import traced
+from src.service.formatting.token_budget import count_tokens, extract_terms, record_budget, truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+FORMATTING_DURATION = histogram("formatting_duration_seconds", "Форматирование данных для промпта", ("formatter",))
+
+# Бюджет токенов на резюме в промпте (0 — без ограничения)
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET") or 3000)
+# До скольких токенов сокращается описание места работы на первом шаге урезания
+EXPERIENCE_SUMMARY_TOKENS = int(os.getenv("EXPERIENCE_SUMMARY_TOKENS") or 60)
+
+DESCRIPTION_OMITTED = "(описание опущено)"
+
 def format_date(date_dict: dict) -> str:
     if not date_dict:
         return "Не указана"
@@ -25,68 +40,138 @@ def format_date(date_dict: dict) -> str:
 
 
 def format_experience(exp_list: list) -> str:
-    result = ""
-    for exp in exp_list:
-        start = format_date(exp.get('date_from', {}))
-        end = format_date(exp.get('date_to', {}))
-        company = exp.get('company', 'Не указана')
-        position = exp.get('position', 'Не указана')
-        description = (exp.get('description') or '').strip()
+    return "".join([_format_experience_entry(exp) for exp in exp_list])
+
 
-        result += f"{start} — {end}\n"
-        result += f"Компания: {company}\n"
-        result += f"Должность: {position}\n"
-        result += f"Описание:\n{description}\n\n"
-    return result
+def _format_experience_entry(exp: dict) -> str:
+    start = format_date(exp.get('date_from', {}))
+    end = format_date(exp.get('date_to', {}))
+    company = exp.get('company', 'Не указана')
+    position = exp.get('position', 'Не указана')
+    description = (exp.get('description') or '').strip()
+    return f"{start} — {end}\nКомпания: {company}\nДолжность: {position}\nОписание:\n{description}\n\n"
 
 
 def format_education(education: dict) -> str:
-    result = ""
-    higher = education.get('higher', [])
-    for edu in higher:
-        name = edu.get('name', '')
-        faculty = edu.get('faculty', '')
-        start = format_date(edu.get('date_from', {}))
-        end = format_date(edu.get('date_to', {}))
-        result += f"{name} ({faculty}, {start} - {end})\n"
-    return result
-
-
-def format_resume(unified_resume: dict) -> str:
+    return "".join([
+        f"{edu.get('name', '')} ({edu.get('faculty', '')}, "
+        f"{format_date(edu.get('date_from', {}))} - {format_date(edu.get('date_to', {}))})\n"
+        for edu in education.get('higher', [])
+    ])
+
+
+@timed(FORMATTING_DURATION.labels("format_resume"))
+@traced()
+def format_resume(
+        unified_resume: dict,
+        token_budget: int = RESUME_TOKEN_BUDGET,
+        relevance_terms: Optional[Iterable[str]] = None,
+) -> str:
+    """
+    Форматирует резюме для промпта. Если текст не укладывается в token_budget, описания мест работы
+    урезаются начиная с наименее важных (самых старых и наименее релевантных вакансии — по relevance_terms):
+    сначала сокращаются до EXPERIENCE_SUMMARY_TOKENS, затем опускаются совсем.
+    """
     if unified_resume is None:
         return ""
 
-    position = unified_resume.get('position', '')
+    # Шапка и образование не меняются при урезании опыта: собираются один раз, а при сокращении описания
+    # заново форматируется только изменившееся место работы
+    head, tail = _render_resume_frame(unified_resume)
+    entries = [_format_experience_entry(exp) for exp in unified_resume.get('experience', [])]
+    formatted_resume = head + "".join(entries) + tail
+    tokens_before = count_tokens(formatted_resume)
+    if not token_budget or tokens_before <= token_budget:
+        record_budget("resume", tokens_before, tokens_before)
+        logger.debug("Отформатированное резюме (Unified): %s", formatted_resume)
+        return formatted_resume
+
+    experience = [dict(exp) for exp in unified_resume.get('experience', [])]
+    order = rank_experience(experience, relevance_terms)
+    tokens_after = tokens_before
+    for shorten in (_summarize_description, _omit_description):
+        for index in order:
+            description = (experience[index].get('description') or '').strip()
+            shortened = shorten(description) if description else description
+            if shortened == description:
+                continue
+            experience[index]['description'] = shortened
+            entries[index] = _format_experience_entry(experience[index])
+            formatted_resume = head + "".join(entries) + tail
+            tokens_after = count_tokens(formatted_resume)
+            if tokens_after <= token_budget:
+                break
+        if tokens_after <= token_budget:
+            break
+
+    if tokens_after > token_budget:
+        formatted_resume = truncate_to_tokens(formatted_resume, token_budget)
+        tokens_after = count_tokens(formatted_resume)
+
+    record_budget("resume", tokens_before, tokens_after)
+    logger.debug("Отформатированное резюме (Unified): %s", formatted_resume)
+    logger.info("Резюме сокращено с %s до %s токенов (бюджет %s)", tokens_before, tokens_after, token_budget)
+    return formatted_resume
 
-    # Зарплатные ожидания
-    wanted_salary = unified_resume.get('wanted_salary', {})
 
-    salary_amount = wanted_salary.get('amount', '')
-    salary_currency = wanted_salary.get('currency', '')
+def rank_experience(exp_list: list, relevance_terms: Optional[Iterable[str]] = None) -> List[int]:
+    """
+    Индексы мест работы от наименее важного к наиболее важному. Важность — сумма свежести
+    (0 у самого старого, 1 у текущего) и доли терминов вакансии, встречающихся в описании.
+    """
+    terms = set(relevance_terms or ())
+    by_date = sorted(range(len(exp_list)), key=lambda index: _experience_end(exp_list[index]))
+    recency = {index: rank / max(1, len(exp_list) - 1) for rank, index in enumerate(by_date)}
 
-    # Навыки (skill_set — список строк)
-    skills = unified_resume.get('skill_set', [])
+    def importance(index: int) -> float:
+        if not terms:
+            return recency[index]
+        exp = exp_list[index]
+        words = extract_terms(f"{exp.get('position') or ''} {exp.get('description') or ''}")
+        return recency[index] + len(words & terms) / len(terms)
 
-    # Опыт работы
-    exp_list = unified_resume.get('experience', [])
-    experience_str = format_experience(exp_list)
+    return sorted(range(len(exp_list)), key=importance)
 
-    # Образование (берем раздел higher)
-    education = unified_resume.get('education', {})
-    education_str = format_education(education)
 
-    formatted_resume = f"""
-        Позиция: {position}
-        Зарплатные ожидание: {salary_amount} + {salary_currency}
+def _summarize_description(description: str) -> str:
+    return truncate_to_tokens(description, EXPERIENCE_SUMMARY_TOKENS)
+
+
+def _omit_description(description: str) -> str:
+    return DESCRIPTION_OMITTED
+
 
-        Навыки: {", ".join(skills)}
+def _experience_end(exp: dict) -> tuple:
+    # Текущее место работы (без даты окончания) — самое свежее
+    date_to = exp.get('date_to') or {}
+    date_from = exp.get('date_from') or {}
+    if not date_to.get('year'):
+        return (float('inf'), 0, date_from.get('year') or 0, date_from.get('month') or 0)
+    return (date_to.get('year'), date_to.get('month') or 0, date_from.get('year') or 0, date_from.get('month') or 0)
 
-        Опыт работы: 
-        {experience_str}
 
-        Образование:
-        {education_str}
+def _render_resume_frame(unified_resume: dict) -> Tuple[str, str]:
     """
+    Части резюме до и после раздела «Опыт работы».
+    """
+    position = unified_resume.get('position', '')
 
-    logger.debug("Отформатированное резюме (Unified): %s", formatted_resume)
-    return formatted_resume
+    # Зарплатные ожидания
+    wanted_salary = unified_resume.get('wanted_salary', {})
+    salary_amount = wanted_salary.get('amount', '')
+    salary_currency = wanted_salary.get('currency', '')
+
+    # Навыки (skill_set — список строк)
+    skills = ", ".join(unified_resume.get('skill_set', []))
+
+    # Образование (берем раздел higher)
+    education_str = format_education(unified_resume.get('education', {}))
+
+    head = (
+        f"\n        Позиция: {position}"
+        f"\n        Зарплатные ожидание: {salary_amount} + {salary_currency}"
+        f"\n\n        Навыки: {skills}"
+        "\n\n        Опыт работы: \n        "
+    )
+    tail = f"\n\n        Образование:\n        {education_str}\n    "
+    return head, tail
@@ -0,0 +1,95 @@
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set
+
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+OPENAI_TOKENIZER_ENCODING = os.getenv("OPENAI_TOKENIZER_ENCODING") or "o200k_base"
+# Запасной подсчёт без tiktoken: для русского текста GPT-4o даёт примерно 3 символа на токен
+FALLBACK_CHARS_PER_TOKEN = 3
+
+TRUNCATION_MARK = " …"
+
+_TERM = re.compile(r"[a-zа-яё0-9+#]{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s|\n")
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(OPENAI_TOKENIZER_ENCODING)
+    except Exception as e:
+        # Пакет не установлен или словарь токенайзера недоступен (tiktoken скачивает его при первом запуске)
+        logger.warning("Токенайзер tiktoken недоступен (%s), токены считаются приблизительно", e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Обрезает текст до max_tokens по границе предложения или строки (если такая граница есть не слишком рано)
+    и помечает обрезку многоточием.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    encoding = _get_encoding()
+    if encoding is None:
+        cut = text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+    boundaries = [match.start() for match in _SENTENCE_END.finditer(cut)]
+    if boundaries and boundaries[-1] >= len(cut) // 2:
+        cut = cut[:boundaries[-1]]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def extract_terms(text: str) -> Set[str]:
+    """
+    Значимые слова текста (от 3 символов) — для оценки релевантности опыта кандидата вакансии.
+    """
+    return set(_TERM.findall((text or "").lower()))
+
+
+def record_budget(kind: str, tokens_before: int, tokens_after: int) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(kind, {"count": 0, "trimmed": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["count"] += 1
+        stats["trimmed"] += tokens_after < tokens_before
+        stats["tokens_before"] += tokens_before
+        stats["tokens_after"] += tokens_after
+
+
+def get_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats: Dict[str, Any] = {kind: dict(values) for kind, values in _stats.items()}
+    stats["tokenizer"] = OPENAI_TOKENIZER_ENCODING if _get_encoding() is not None else "approximate"
+    return stats
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+register_stats_provider("token_budget", get_stats)
@@ -1,16 +1,29 @@
 import logging
+import os
 
+from src.observability.metrics import histogram, timed
+from src.observability.tracing import traced
 from src.service.formatting.html_cleaner import clean_html
+from src.service.formatting.token_budget import count_tokens, record_budget, truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+FORMATTING_DURATION = histogram("formatting_duration_seconds", "Форматирование данных для промпта", ("formatter",))
 
-def format_vacancy(vacancy: dict) -> str:
+# Бюджет токенов на описание вакансии в промпте (0 — без ограничения)
+VACANCY_TOKEN_BUDGET = int(os.getenv("VACANCY_TOKEN_BUDGET") or 2000)
+
+
+@timed(FORMATTING_DURATION.labels("format_vacancy"))
+@traced()
+def format_vacancy(vacancy: dict, token_budget: int = VACANCY_TOKEN_BUDGET) -> str:
     """
     Форматирует данные вакансии:
       — Извлекает позицию, ограничения по зарплате,
          описание, требования и условия работы.
-      — Очищает HTML-теги из текстовых полей.
+      — Превращает HTML текстовых полей в текст с абзацами и списками (см. clean_html).
+      — Если текст не укладывается в token_budget, сокращает сначала условия работы,
+         затем описание и только в последнюю очередь требования.
     """
     logger.debug("Форматирование вакансии: %s", vacancy)
     position = vacancy.get('position', 'Не указана должность')
@@ -24,7 +37,27 @@ def format_vacancy(vacancy: dict) -> str:
     requirements = clean_html(requirements_html)
     conditions = clean_html(conditions_html)
 
-    formatted_description = (
+    formatted_description = _render_vacancy(position, money, description, requirements, conditions)
+    tokens_before = count_tokens(formatted_description)
+    tokens_after = tokens_before
+    if token_budget and tokens_before > token_budget:
+        sections = {"description": description, "requirements": requirements, "conditions": conditions}
+        for name in ("conditions", "description", "requirements"):
+            excess = tokens_after - token_budget
+            sections[name] = truncate_to_tokens(sections[name], max(0, count_tokens(sections[name]) - excess))
+            formatted_description = _render_vacancy(position, money, **sections)
+            tokens_after = count_tokens(formatted_description)
+            if tokens_after <= token_budget:
+                break
+        logger.info("Описание вакансии сокращено с %s до %s токенов (бюджет %s)", tokens_before, tokens_after, token_budget)
+    record_budget("vacancy", tokens_before, tokens_after)
+
+    logger.debug("Отформатированное описание вакансии: %s", formatted_description)
+    return formatted_description
+
+
+def _render_vacancy(position, money, description: str, requirements: str, conditions: str) -> str:
+    return (
         f"Вакансия: {position}\n"
         f"Ограничения по зп: {money}\n"
         "Описание вакансии:\n"
@@ -34,5 +67,3 @@ def format_vacancy(vacancy: dict) -> str:
         "Условия работы:\n"
         f"{conditions}\n"
     )
-    logger.debug("Отформатированное описание вакансии: %s", formatted_description)
-    return formatted_description
@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from openai import LengthFinishReasonError
+from pydantic import ValidationError
+
+from src.api_clients.openai_api import ask_gpt, ask_gpt_group
+from src.api_clients.openai_scheduler import PRIORITY_REALTIME
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.observability.tracing import bind_context
+from src.service.ai_evaluation import EvaluationRequest, cache_answer, prepare_evaluation
+from src.service.evaluation_pool import EVALUATION_CONCURRENCY
+from src.service.evaluation_prompt import build_group_evaluation_prompt
+from src.service.formatting.token_budget import count_tokens
+from src.service.job_worker import JOB_WORKERS
+from src.service.prescreen import screen_with_model
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд собирать кандидатов одной вакансии перед отправкой группы
+GROUP_EVALUATION_WINDOW = float(os.getenv("GROUP_EVALUATION_WINDOW") or 2)
+# Группу наполняют одновременно обрабатываемые задачи, поэтому больше min(JOB_WORKERS, EVALUATION_CONCURRENCY)
+# кандидатов в ней не соберётся: группа такого размера ждала бы окна каждый раз
+GROUP_EVALUATION_CONCURRENCY = min(JOB_WORKERS, EVALUATION_CONCURRENCY)
+GROUP_EVALUATION_MAX_SIZE = int(os.getenv("GROUP_EVALUATION_MAX_SIZE") or min(10, GROUP_EVALUATION_CONCURRENCY))
+
+_evaluator = None
+
+
+class _Pending:
+    __slots__ = ("request", "priority", "future")
+
+    def __init__(self, request: EvaluationRequest, priority: int):
+        self.request = request
+        self.priority = priority
+        self.future: Future = Future()
+
+
+class GroupEvaluator:
+    """
+    Группирует кандидатов одной вакансии, пришедших в течение window секунд, и оценивает их одним запросом:
+    инструкции и описание вакансии отправляются один раз на группу, а не на каждого кандидата.
+    Группа отправляется по истечении окна или сразу, как наберётся max_size кандидатов.
+
+    evaluate блокирует вызывающий поток до ответа по группе, поэтому max_size не может превышать
+    число одновременно обрабатываемых задач (concurrency). Кандидаты, отсеянные предварительной оценкой,
+    в группу не попадают. Если ответ модели не проходит проверку (не тот набор applicant_id,
+    невалидная структура), кандидаты без оценки оцениваются по одному.
+    """
+
+    def __init__(
+            self,
+            window: float = GROUP_EVALUATION_WINDOW,
+            max_size: int = GROUP_EVALUATION_MAX_SIZE,
+            concurrency: int = GROUP_EVALUATION_CONCURRENCY,
+    ):
+        if max_size > concurrency:
+            raise ValueError(
+                f"GROUP_EVALUATION_MAX_SIZE={max_size} больше числа одновременно оцениваемых кандидатов "
+                f"({concurrency}, min(JOB_WORKERS, EVALUATION_CONCURRENCY)): группа никогда не заполнится"
+            )
+        self.window = window
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._groups: Dict[Any, List[_Pending]] = {}
+        self._stats = {
+            "groups": 0,
+            "grouped_candidates": 0,
+            "single_calls": 0,
+            "fallbacks": 0,
+            "fallback_candidates": 0,
+            "tokens_saved": 0,
+        }
+
+    def evaluate(
+            self,
+            applicant_id: int,
+            vacancy_id: int,
+            rescore: bool = False,
+            priority: int = PRIORITY_REALTIME,
+    ) -> CandidateEvaluationAnswer:
+        request = prepare_evaluation(applicant_id, vacancy_id, rescore)
+        if request.answer is not None:
+            return request.answer
+
+        answer = screen_with_model(request.system_prompt, request.user_prompt, priority=priority)
+        if answer is not None:
+            logger.info("Кандидат %s отсеян предварительной оценкой", applicant_id)
+            return answer
+
+        pending = _Pending(request, priority)
+        flush_now = False
+        with self._lock:
+            group = self._groups.setdefault(vacancy_id, [])
+            group.append(pending)
+            if len(group) == 1:
+                timer = threading.Timer(self.window, bind_context(self.flush), args=(vacancy_id, group))
+                timer.daemon = True
+                timer.start()
+            flush_now = len(group) >= self.max_size
+        if flush_now:
+            self.flush(vacancy_id, group)
+        return pending.future.result()
+
+    def flush(self, vacancy_id: Any, group: List[_Pending]) -> None:
+        """
+        Отправляет группу. Группа передаётся явно: таймер уже отправленной группы не должен
+        забрать следующую, начатую после неё.
+        """
+        with self._lock:
+            if self._groups.get(vacancy_id) is not group:
+                return
+            del self._groups[vacancy_id]
+
+        try:
+            answers = self._evaluate_group(group) if len(group) > 1 else {}
+            for pending in group:
+                request = pending.request
+                answer = answers.get(request.applicant_id)
+                if answer is None:
+                    answer = self._evaluate_single(pending)
+                cache_answer(request, answer)
+                pending.future.set_result(answer)
+        except Exception as exc:
+            for pending in group:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+
+    def _evaluate_group(self, group: List[_Pending]) -> Dict[int, CandidateEvaluationAnswer]:
+        requests = [pending.request for pending in group]
+        expected_ids = {request.applicant_id for request in requests}
+        prompt = build_group_evaluation_prompt(
+            requests[0].vacancy_description,
+            {request.applicant_id: request.resume for request in requests},
+        )
+        logger.info("Групповая оценка %s кандидатов вакансии %s", len(group), requests[0].vacancy_id)
+
+        try:
+            result = ask_gpt_group(prompt.system_prompt, prompt.user_prompt, group_size=len(group),
+                                   priority=min(pending.priority for pending in group))
+            answers = result.by_applicant()
+            if len(result.evaluations) != len(answers):
+                raise ValueError("в ответе несколько оценок одного кандидата")
+        except (ValidationError, ValueError, LengthFinishReasonError) as exc:
+            logger.warning("Групповой ответ модели не прошёл проверку (%s), кандидаты будут оценены по одному", exc)
+            answers = {}
+
+        answers = {applicant_id: answer for applicant_id, answer in answers.items() if applicant_id in expected_ids}
+        missing = len(expected_ids) - len(answers)
+        tokens_single = sum(count_tokens(request.system_prompt) + count_tokens(request.user_prompt)
+                            for request in requests)
+        tokens_group = count_tokens(prompt.system_prompt) + count_tokens(prompt.user_prompt)
+        with self._lock:
+            self._stats["groups"] += 1
+            self._stats["grouped_candidates"] += len(answers)
+            if missing:
+                self._stats["fallbacks"] += 1
+                self._stats["fallback_candidates"] += missing
+            if answers:
+                # Экономия засчитывается только за кандидатов, оценённых группой
+                self._stats["tokens_saved"] += (tokens_single - tokens_group) * len(answers) // len(requests)
+        return answers
+
+    def _evaluate_single(self, pending: _Pending) -> CandidateEvaluationAnswer:
+        request = pending.request
+        with self._lock:
+            self._stats["single_calls"] += 1
+        return ask_gpt(system_prompt=request.system_prompt, user_prompt=request.user_prompt,
+                       priority=pending.priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["waiting"] = sum(len(group) for group in self._groups.values())
+        grouped = stats["grouped_candidates"]
+        stats["tokens_saved_per_candidate"] = round(stats["tokens_saved"] / grouped, 1) if grouped else None
+        return stats
+
+
+def get_group_evaluator() -> GroupEvaluator:
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = GroupEvaluator()
+    return _evaluator
+
+
+register_stats_provider("group_evaluations", lambda: get_group_evaluator().get_stats())
@@ -0,0 +1,41 @@
+import logging
+from typing import Optional
+
+from src.api_clients.openai_scheduler import PRIORITY_REALTIME
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.service.applicant_handler import apply_evaluation, process_applicant, process_applicant_streaming
+from src.service.batch_evaluation import get_batch_evaluator
+from src.service.group_evaluation import get_group_evaluator
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_MODES = ("realtime", "stream", "batch", "group")
+
+
+def process_job(payload: dict) -> Optional[CandidateEvaluationAnswer]:
+    """
+    Обработчик задач очереди. Режим оценки выбирается для каждой задачи полем mode:
+      — realtime: синхронный запрос к модели и немедленное обновление этапа;
+      — stream: то же, но этап обновляется, как только модель выдала решение, а комментарий — по готовности;
+      — batch: запрос откладывается в OpenAI Batch API, этап обновится, когда batch будет готов;
+      — group: кандидаты одной вакансии, пришедшие почти одновременно, оцениваются одним запросом.
+    Поле priority задаёт приоритет realtime-, stream- и group-запроса в очереди к OpenAI (по умолчанию — как у вебхуков).
+    """
+    mode = payload.get("mode", "realtime")
+    applicant_id = payload["applicant_id"]
+    vacancy_id = payload["vacancy_id"]
+    rescore = payload.get("rescore", False)
+
+    priority = payload.get("priority", PRIORITY_REALTIME)
+
+    if mode == "batch":
+        return get_batch_evaluator().add(applicant_id, vacancy_id, rescore=rescore)
+    if mode == "group":
+        answer = get_group_evaluator().evaluate(applicant_id, vacancy_id, rescore=rescore, priority=priority)
+        apply_evaluation(applicant_id, vacancy_id, answer)
+        return answer
+    if mode == "stream":
+        return process_applicant_streaming(applicant_id, vacancy_id, rescore=rescore, priority=priority)
+    if mode != "realtime":
+        raise ValueError(f"Неизвестный режим оценки: {mode}")
+    return process_applicant(applicant_id, vacancy_id, rescore=rescore, priority=priority)
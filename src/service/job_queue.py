@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_QUEUE_PATH = Path(__file__).resolve().parents[2] / "data" / "jobs.sqlite3"
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH") or str(DEFAULT_JOB_QUEUE_PATH)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS") or 5)
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF") or 10)
+JOB_RETRY_BACKOFF_MAX = float(os.getenv("JOB_RETRY_BACKOFF_MAX") or 600)
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT") or 900)
+
+_queue = None
+
+
+@dataclass
+class Job:
+    id: int
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: float
+
+
+class JobQueue:
+    """
+    Персистентная очередь задач на SQLite. Задача, взятая в работу и не подтверждённая за visibility_timeout
+    (например, процесс упал), снова становится доступной. После max_attempts неудачных попыток задача
+    переносится в таблицу dead_letters.
+    """
+
+    def __init__(
+            self,
+            path: str = JOB_QUEUE_PATH,
+            max_attempts: int = JOB_MAX_ATTEMPTS,
+            retry_backoff: float = JOB_RETRY_BACKOFF,
+            retry_backoff_max: float = JOB_RETRY_BACKOFF_MAX,
+            visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.visibility_timeout = visibility_timeout
+        self._lock = threading.Lock()
+        self._stats = {"enqueued": 0, "completed": 0, "retried": 0, "dead_lettered": 0}
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                locked_at REAL,
+                created_at REAL NOT NULL,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status_available_at ON jobs (status, available_at);
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                failed_at REAL NOT NULL
+            );
+        """)
+
+    def enqueue(self, payload: Dict[str, Any]) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (payload, available_at, created_at) VALUES (?, ?, ?)",
+                (json.dumps(payload, ensure_ascii=False), now, now)
+            )
+            self._stats["enqueued"] += 1
+        logger.info("Задача %s поставлена в очередь: %s", cursor.lastrowid, payload)
+        return cursor.lastrowid
+
+    def claim(self) -> Optional[Job]:
+        """
+        Берёт в работу самую старую готовую к выполнению задачу.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload, attempts, created_at FROM jobs "
+                    "WHERE (status = 'pending' AND available_at <= ?) OR (status = 'running' AND locked_at <= ?) "
+                    "ORDER BY available_at, id LIMIT 1",
+                    (now, now - self.visibility_timeout)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', locked_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (now, row[0])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(id=row[0], payload=json.loads(row[1]), attempts=row[2] + 1, created_at=row[3])
+
+    def is_active(self, job_id: int) -> bool:
+        """
+        True, если задача ещё ожидает выполнения или выполняется.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None
+
+    def complete(self, job_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._stats["completed"] += 1
+
+    def fail(self, job_id: int, error: str) -> None:
+        """
+        Планирует повтор с экспоненциальной задержкой или, если попытки исчерпаны, переносит задачу в dead_letters.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, attempts, created_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+            payload, attempts, created_at = row
+
+            if attempts >= self.max_attempts:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute(
+                    "INSERT INTO dead_letters (job_id, payload, attempts, last_error, created_at, failed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, payload, attempts, error, created_at, now)
+                )
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                self._conn.execute("COMMIT")
+                self._stats["dead_lettered"] += 1
+                logger.error("Задача %s перенесена в dead_letters после %s попыток: %s", job_id, attempts, error)
+                return
+
+            delay = min(self.retry_backoff * 2 ** (attempts - 1), self.retry_backoff_max)
+            delay *= random.uniform(0.8, 1.2)
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', locked_at = NULL, available_at = ?, last_error = ? WHERE id = ?",
+                (now + delay, error, job_id)
+            )
+            self._stats["retried"] += 1
+        logger.warning("Задача %s завершилась ошибкой (попытка %s), повтор через %.1f с: %s",
+                       job_id, attempts, delay, error)
+
+    def get_dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, payload, attempts, last_error, created_at, failed_at FROM dead_letters "
+                "ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {
+                "job_id": job_id,
+                "payload": json.loads(payload),
+                "attempts": attempts,
+                "last_error": last_error,
+                "created_at": created_at,
+                "failed_at": failed_at,
+            }
+            for job_id, payload, attempts, last_error, created_at, failed_at in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest_created_at = self._conn.execute("SELECT MIN(created_at) FROM jobs").fetchone()[0]
+            dead_letters = self._conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "depth": sum(counts.values()),
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "dead_letters": dead_letters,
+            "oldest_job_age": now - oldest_created_at if oldest_created_at is not None else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+        logger.info("Очередь задач открыта: %s", _queue.path)
+    return _queue
+
+
+register_stats_provider("job_queue", lambda: get_job_queue().get_stats())
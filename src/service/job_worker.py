@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from src.observability.metrics import ERRORS
+from src.observability.tracing import start_span
+from src.service.evaluation_pool import EVALUATION_CONCURRENCY, run_in_pool
+from src.service.job_queue import Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or EVALUATION_CONCURRENCY)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL") or 0.5)
+
+
+class JobWorkerPool:
+    """
+    Набор воркеров (asyncio-задач), разбирающих персистентную очередь. Сама обработка задачи — блокирующая,
+    она выполняется в пуле оценок, поэтому число одновременно обрабатываемых задач не превышает
+    min(JOB_WORKERS, EVALUATION_CONCURRENCY).
+    """
+
+    def __init__(
+            self,
+            queue: JobQueue,
+            handler: Callable[[Dict[str, Any]], Any],
+            workers: int = JOB_WORKERS,
+            poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work(number)) for number in range(self.workers)]
+        logger.info("Запущено воркеров очереди: %s", self.workers)
+
+    async def stop(self) -> None:
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Воркеры очереди остановлены")
+
+    async def _work(self, number: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self.queue.claim)
+            except Exception as e:
+                logger.error("Воркер %s не смог получить задачу: %s", number, e)
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job)
+
+    async def _process(self, job: Job) -> None:
+        logger.info("Обработка задачи %s (попытка %s)", job.id, job.attempts)
+        try:
+            # Спан задачи продолжает трейс вебхука, поставившего её в очередь
+            with start_span("job", parent=job.payload.get("trace"), job_id=job.id, attempt=job.attempts):
+                await run_in_pool(self.handler, job.payload)
+        except Exception as e:
+            logger.exception("Ошибка обработки задачи %s", job.id)
+            ERRORS.labels("job").inc()
+            await asyncio.to_thread(self.queue.fail, job.id, f"{type(e).__name__}: {e}")
+        else:
+            await asyncio.to_thread(self.queue.complete, job.id)
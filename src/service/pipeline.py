@@ -0,0 +1,129 @@
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from src.observability.tracing import bind_context, start_span
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY") or 16)
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_CONCURRENCY, thread_name_prefix="pipeline")
+
+
+class PipelineResult:
+    """
+    Результаты этапов пайплайна. Ошибка этапа пробрасывается только при обращении к его результату,
+    поэтому сбой этапа, результат которого не понадобился (ранний выход), ни на что не влияет.
+    Обращение к результату фонового этапа ждёт его завершения.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timings: Dict[str, float] = {}
+        self.wall_time = 0.0
+        self.background: Dict[str, Future] = {}
+
+    def __getitem__(self, stage_name: str) -> Any:
+        if stage_name in self.background:
+            self.background[stage_name].result()
+        if stage_name in self.errors:
+            raise self.errors[stage_name]
+        return self.results[stage_name]
+
+    def is_finished(self, stage_name: str) -> bool:
+        return stage_name in self.results or stage_name in self.errors
+
+
+class Pipeline:
+    """
+    Граф зависимостей между блокирующими этапами (запросами к Huntflow и т.п.).
+    Независимые этапы выполняются параллельно: один — в вызывающем потоке, остальные — в общем пуле.
+    Функция этапа получает свои аргументы, а за ними — результаты зависимостей в порядке depends_on.
+    Фоновый этап (background=True) запускается сразу, но run его не ждёт: результат, который может
+    и не понадобиться (ранний выход), не задерживает остальные этапы.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._stages: Dict[str, Tuple[Callable, Tuple[Any, ...], Tuple[str, ...]]] = {}
+        self._background: Dict[str, Tuple[Callable, Tuple[Any, ...], Tuple[str, ...]]] = {}
+
+    def add_stage(
+            self,
+            name: str,
+            func: Callable,
+            *args,
+            depends_on: Iterable[str] = (),
+            background: bool = False,
+    ) -> "Pipeline":
+        depends_on = tuple(depends_on)
+        unknown = [dep for dep in depends_on if dep not in self._stages]
+        if unknown:
+            raise ValueError(f"Этап '{name}' зависит от неизвестных этапов: {unknown}")
+        if background and depends_on:
+            raise ValueError(f"Фоновый этап '{name}' не может зависеть от других этапов")
+        (self._background if background else self._stages)[name] = (func, args, depends_on)
+        return self
+
+    def run(self) -> PipelineResult:
+        result = PipelineResult(self.name)
+        for name in self._background:
+            result.background[name] = _executor.submit(bind_context(self._run_stage), result, name)
+        pending = dict(self._stages)
+        futures = {}
+        started = time.perf_counter()
+
+        while pending or futures:
+            runnable = []
+            for name, (func, args, depends_on) in list(pending.items()):
+                if not all(result.is_finished(dep) for dep in depends_on):
+                    continue
+                del pending[name]
+                failed_dep = next((dep for dep in depends_on if dep in result.errors), None)
+                if failed_dep:
+                    result.errors[name] = result.errors[failed_dep]
+                else:
+                    runnable.append(name)
+
+            if runnable:
+                for name in runnable[1:]:
+                    futures[_executor.submit(bind_context(self._run_stage), result, name)] = name
+                # Вызывающий поток не простаивает: первый готовый этап выполняется в нём же.
+                self._run_stage(result, runnable[0])
+                continue
+
+            if futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del futures[future]
+
+        result.wall_time = time.perf_counter() - started
+        self._log_timings(result)
+        return result
+
+    def _run_stage(self, result: PipelineResult, name: str) -> None:
+        func, args, depends_on = self._stages.get(name) or self._background[name]
+        dep_results = [result.results[dep] for dep in depends_on]
+        started = time.perf_counter()
+        try:
+            with start_span(name, pipeline=self.name):
+                result.results[name] = func(*args, *dep_results)
+        except Exception as e:
+            logger.debug("Этап '%s' пайплайна '%s' завершился ошибкой: %s", name, self.name, e)
+            result.errors[name] = e
+        finally:
+            result.timings[name] = time.perf_counter() - started
+
+    @staticmethod
+    def _log_timings(result: PipelineResult) -> None:
+        sequential_time = sum(result.timings.values())
+        stages = ", ".join(f"{name}={timing:.3f} с" for name, timing in result.timings.items())
+        logger.info(
+            "Пайплайн '%s' выполнен за %.3f с (последовательно %.3f с, сэкономлено %.3f с): %s",
+            result.name, result.wall_time, sequential_time, max(sequential_time - result.wall_time, 0.0), stages
+        )
@@ -0,0 +1,293 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.api_clients.openai_api import PRESCREEN_MODEL, TIER_PRESCREEN, ask_gpt, get_backend
+from src.api_clients.openai_scheduler import PRIORITY_REALTIME
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.service.caching.vacancy_cache import CachedVacancy
+from src.service.stats import register_stats_provider
+
+logger = logging.getLogger(__name__)
+
+PRESCREEN_RULES = [
+    # skills по умолчанию выключено: навыки в резюме и вакансии часто записаны по-разному («Postgres»
+    # и «PostgreSQL», «JS» и «JavaScript»), и правило отсеяло бы подходящего кандидата
+    name.strip() for name in (os.getenv("PRESCREEN_RULES") or "relocation,salary,experience").split(",")
+    if name.strip()
+]
+PRESCREEN_RELOCATION_CITY = os.getenv("PRESCREEN_RELOCATION_CITY") or "Пермь"
+# Во сколько раз ожидания кандидата могут превышать верхнюю границу вилки, прежде чем он отсеивается
+PRESCREEN_SALARY_TOLERANCE = float(os.getenv("PRESCREEN_SALARY_TOLERANCE") or 1.5)
+# Правило о навыках срабатывает, только если у кандидата указано не меньше стольких навыков
+PRESCREEN_MIN_SKILLS = int(os.getenv("PRESCREEN_MIN_SKILLS") or 3)
+# Доля требуемого вакансией стажа, которой должно быть достаточно, чтобы кандидат дошёл до модели
+PRESCREEN_EXPERIENCE_RATIO = float(os.getenv("PRESCREEN_EXPERIENCE_RATIO") or 0.5)
+
+RELOCATION_REFUSALS = ["не готов к переезду", "не могу переехать", "cannot move"]
+
+# Строка с вилкой в отформатированной вакансии (см. format_vacancy)
+# Число в вилке («150 000», «1,5», «150.000») и множитель после него: «тыс.», «k», «млн»
+_AMOUNT = re.compile(r"(\d[\d \u00a0]*(?:[.,]\d+)*)\s*(тыс[а-яё]*|млн|mln|kk|k|к)?(?![a-zа-яё])", re.IGNORECASE)
+_THOUSANDS_SEPARATED = re.compile(r"\d{1,3}(?:[.,]\d{3})+")
+_MULTIPLIERS = {"тыс": 1_000, "k": 1_000, "к": 1_000, "млн": 1_000_000, "mln": 1_000_000, "kk": 1_000_000}
+# Вилка меньше этого — скорее всего, единицы не распознаны («до 150»), и сравнивать её с ожиданиями нельзя
+_MIN_PLAUSIBLE_SALARY = 1_000
+# Слово в навыке или вакансии: «c++», «c#», «node.js», «1с»
+_WORD = re.compile(r"[a-zа-яё0-9][a-zа-яё0-9+#.]*[a-zа-яё0-9+#]|[a-zа-яё0-9]")
+# Слова от такой длины совпадают и по префиксу: «postgres» — «postgresql»
+_PREFIX_MATCH_LENGTH = 5
+_REQUIRED_YEARS = re.compile(
+    r"(?:опыт[^.\n]{0,60}?от\s*(\d+)[\s\-–х]*(?:год|лет))|(?:(\d+)\+?\s*years?\s+(?:of\s+)?experience)",
+    re.IGNORECASE,
+)
+
+
+class PrescreenContext:
+    """
+    Данные для правил предварительного отбора. Описание вакансии берётся из vacancy_loader при первом обращении:
+    если сработало правило, которому оно не нужно (например, о переезде), ответа по вакансии никто не ждёт.
+    """
+
+    def __init__(self, applicant_id: int, vacancy_id: int, resume: dict, vacancy_loader: Callable[[], CachedVacancy]):
+        self.applicant_id = applicant_id
+        self.vacancy_id = vacancy_id
+        self.resume = resume
+        self._vacancy_loader = vacancy_loader
+        self._vacancy: Optional[CachedVacancy] = None
+
+    @property
+    def vacancy(self) -> CachedVacancy:
+        if self._vacancy is None:
+            self._vacancy = self._vacancy_loader()
+        return self._vacancy
+
+    @property
+    def vacancy_text(self) -> str:
+        return self.vacancy.text
+
+
+Rule = Callable[[PrescreenContext], Optional[CandidateEvaluationAnswer]]
+
+
+class Prescreener:
+    """
+    Цепочка детерминированных правил перед запросом к модели. Первое сработавшее правило
+    даёт итоговую оценку; если не сработало ни одно, кандидат передаётся модели.
+    """
+
+    def __init__(self, rules: Optional[List[Tuple[str, Rule]]] = None):
+        self.rules: List[Tuple[str, Rule]] = list(rules or [])
+        self._lock = threading.Lock()
+        self._hits = Counter()
+        self._stats = {"screened": 0, "escalated": 0, "model_errors": 0}
+
+    def add_rule(self, name: str, rule: Rule) -> "Prescreener":
+        self.rules.append((name, rule))
+        return self
+
+    def screen(self, context: PrescreenContext) -> Optional[CandidateEvaluationAnswer]:
+        with self._lock:
+            self._stats["screened"] += 1
+        for name, rule in self.rules:
+            answer = rule(context)
+            if answer is not None:
+                self.record_hit(name)
+                logger.info("Кандидат %s отсеян правилом '%s': %s", context.applicant_id, name, answer.comment)
+                return answer
+        with self._lock:
+            self._stats["escalated"] += 1
+        return None
+
+    def record_hit(self, name: str) -> None:
+        with self._lock:
+            self._hits[name] += 1
+
+    def record_model_error(self) -> None:
+        with self._lock:
+            self._stats["model_errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "rules": dict(self._hits)}
+
+
+def relocation_rule(context: PrescreenContext) -> Optional[CandidateEvaluationAnswer]:
+    city = context.resume.get('area', {}).get('city', {}).get('name', '')
+    relocation_type = context.resume.get('relocation', {}).get('type', {}).get('name', '')
+
+    if (any(phrase in relocation_type.lower() for phrase in RELOCATION_REFUSALS)
+            and PRESCREEN_RELOCATION_CITY.lower() not in city.lower()):
+        return _reserve(f"Не готов к переезду в {PRESCREEN_RELOCATION_CITY}")
+    return None
+
+
+def salary_rule(context: PrescreenContext) -> Optional[CandidateEvaluationAnswer]:
+    wanted = parse_amount((context.resume.get('wanted_salary') or {}).get('amount'))
+    if not wanted:
+        return None
+    money = context.vacancy.money
+    if not money:
+        return None
+    amounts = parse_salary_range(money)
+    if not amounts:
+        return None
+    # Вилку в другой валюте не сравниваем
+    currency = (context.resume.get('wanted_salary') or {}).get('currency') or ''
+    if currency and _mentions_other_currency(money, currency):
+        return None
+
+    if wanted > max(amounts) * PRESCREEN_SALARY_TOLERANCE:
+        return _reserve(f"Зарплатные ожидания {wanted} значительно выше вилки вакансии ({money.strip()})")
+    return None
+
+
+def skills_rule(context: PrescreenContext) -> Optional[CandidateEvaluationAnswer]:
+    skills = [skill.strip().lower() for skill in context.resume.get('skill_set') or [] if skill and skill.strip()]
+    if len(skills) < PRESCREEN_MIN_SKILLS:
+        return None
+    vacancy_words = set(_WORD.findall(context.vacancy_text.lower()))
+    if not any(_mentions_skill(vacancy_words, skill) for skill in skills):
+        return _reserve("Ни один из навыков кандидата не упоминается в вакансии")
+    return None
+
+
+def _mentions_skill(vacancy_words: Set[str], skill: str) -> bool:
+    """
+    Все слова навыка есть среди слов вакансии: «go» не найдётся внутри «good», а «c» — внутри любого слова.
+    """
+    words = _WORD.findall(skill)
+    return bool(words) and all(_has_word(vacancy_words, word) for word in words)
+
+
+def _has_word(vacancy_words: Set[str], word: str) -> bool:
+    if word in vacancy_words:
+        return True
+    if len(word) < _PREFIX_MATCH_LENGTH:
+        return False
+    return any(len(other) >= _PREFIX_MATCH_LENGTH and (other.startswith(word) or word.startswith(other))
+               for other in vacancy_words)
+
+
+def experience_rule(context: PrescreenContext) -> Optional[CandidateEvaluationAnswer]:
+    match = _REQUIRED_YEARS.search(context.vacancy_text)
+    if not match:
+        return None
+    required_years = int(match.group(1) or match.group(2))
+    experience_months = resume_experience_months(context.resume)
+    if experience_months < required_years * 12 * PRESCREEN_EXPERIENCE_RATIO:
+        return _reserve(
+            f"Опыт работы {experience_months // 12} г. {experience_months % 12} мес. "
+            f"при требовании от {required_years} лет"
+        )
+    return None
+
+
+RULES: Dict[str, Rule] = {
+    "relocation": relocation_rule,
+    "salary": salary_rule,
+    "skills": skills_rule,
+    "experience": experience_rule,
+}
+
+prescreener = Prescreener([(name, RULES[name]) for name in PRESCREEN_RULES])
+register_stats_provider("prescreen", lambda: {**prescreener.get_stats(), "model": PRESCREEN_MODEL})
+
+
+def screen_with_model(
+        system_prompt: str,
+        user_prompt: str,
+        priority: int = PRIORITY_REALTIME,
+) -> Optional[CandidateEvaluationAnswer]:
+    """
+    Предварительная оценка моделью уровня prescreen (дешёвая модель OpenAI или локальный сервер,
+    см. PRESCREEN_MODEL и PRESCREEN_BASE_URL). Её отказ принимается как итоговая оценка, а кандидаты,
+    которых она пропустила, оцениваются основной моделью. Если уровень не настроен, бэкенд
+    не прошёл проверку доступности или запрос к нему не удался (срок, разомкнутая цепь, неразборчивый ответ),
+    кандидат передаётся основной модели.
+    """
+    backend = get_backend(TIER_PRESCREEN)
+    if backend is None or not backend.available:
+        return None
+    try:
+        answer = ask_gpt(system_prompt, user_prompt, priority=priority, tier=TIER_PRESCREEN)
+    except Exception as e:
+        # Модели OpenAI не проверяются в фоне (monitored=False), поэтому ошибка видна только здесь
+        prescreener.record_model_error()
+        logger.warning("Предварительная оценка не удалась (%s: %s), кандидат передаётся основной модели",
+                       type(e).__name__, e)
+        return None
+    if answer.target_stage != TargetStage.RESERVE:
+        return None
+    prescreener.record_hit("model")
+    return _reserve(f"Предварительная оценка: {answer.comment}")
+
+
+def parse_amount(value: Any) -> Optional[int]:
+    digits = re.sub(r"\D", "", str(value or ""))
+    return int(digits) if digits else None
+
+
+def parse_salary_range(money: str) -> List[int]:
+    """
+    Границы вилки из строки «Ограничения по зп» с учётом множителей и десятичной запятой:
+    «до 150 тыс.» → [150000], «1,5 млн» → [1500000], «100-150k» → [100000, 150000].
+    Неправдоподобно маленькие суммы отбрасываются.
+    """
+    numbers = []
+    for raw, suffix in _AMOUNT.findall(money):
+        raw = re.sub(r"\s", "", raw)
+        multiplier = _MULTIPLIERS.get(suffix.lower()[:3]) if suffix else None
+        if multiplier is None and _THOUSANDS_SEPARATED.fullmatch(raw):
+            raw = re.sub(r"[.,]", "", raw)
+        try:
+            number = float(raw.replace(",", "."))
+        except ValueError:
+            continue
+        numbers.append((number, multiplier))
+
+    amounts = []
+    for i, (number, multiplier) in enumerate(numbers):
+        if multiplier is None and number < _MIN_PLAUSIBLE_SALARY:
+            # «от 100 до 150 тыс.»: множитель относится ко всей вилке
+            multiplier = next((later for _, later in numbers[i + 1:] if later), None)
+        amount = int(round(number * (multiplier or 1)))
+        if amount >= _MIN_PLAUSIBLE_SALARY:
+            amounts.append(amount)
+    return amounts
+
+
+def resume_experience_months(resume: dict, today: Optional[date] = None) -> int:
+    total = (resume.get('total_experience') or {}).get('months')
+    if total is not None:
+        return int(total)
+
+    today = today or date.today()
+    months = 0
+    for exp in resume.get('experience') or []:
+        date_from = exp.get('date_from') or {}
+        date_to = exp.get('date_to') or {}
+        if not date_from.get('year'):
+            continue
+        if date_to.get('year'):
+            end_year, end_month = date_to['year'], date_to.get('month') or 12
+        else:
+            end_year, end_month = today.year, today.month
+        months += max(0, (end_year - date_from['year']) * 12 + end_month - (date_from.get('month') or 1) + 1)
+    return months
+
+
+def _mentions_other_currency(money: str, currency: str) -> bool:
+    money = money.upper()
+    known = {"RUB": ("RUB", "РУБ", "₽"), "USD": ("USD", "$"), "EUR": ("EUR", "€"), "KZT": ("KZT", "₸")}
+    mentioned = {code for code, marks in known.items() if any(mark in money for mark in marks)}
+    return bool(mentioned) and currency.upper() not in mentioned
+
+
+def _reserve(comment: str) -> CandidateEvaluationAnswer:
+    return CandidateEvaluationAnswer(target_stage=TargetStage.RESERVE, comment=comment)
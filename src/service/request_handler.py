@@ -3,9 +3,21 @@ import hmac
 import os
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from src.observability.metrics import ERRORS, histogram
+from src.observability.tracing import start_span, start_trace
 from src.service.applicant_handler import handle_applicant
 
+SIGNATURE_VERIFICATION = histogram("webhook_signature_verification_seconds", "Проверка подписи вебхука")
+
 async def handle_request(request: Request):
+    # Трейс начинается на входе вебхука; его контекст уходит в задачу очереди вместе с кандидатом
+    with start_trace("webhook", event=request.headers.get('x-huntflow-event')) as span:
+        response = await _handle_request(request)
+        span.set_attribute("status_code", response.status_code)
+        return response
+
+
+async def _handle_request(request: Request):
     signature_header = request.headers.get('X-Huntflow-Signature')
     if not signature_header:
         return JSONResponse(content={"error": "Отсутствует заголовок X-Huntflow-Signature"}, status_code=401)
@@ -15,13 +27,16 @@ async def handle_request(request: Request):
         raise ValueError("Ошибка: SECRET_KEY не найден в переменных окружения!")
 
     body_bytes = await request.body()
-    computed_signature = hmac.new(
-        key=secret_key.encode('utf-8'),
-        msg=body_bytes,
-        digestmod=hashlib.sha256
-    ).hexdigest()
+    with SIGNATURE_VERIFICATION.time(), start_span("verify_signature"):
+        computed_signature = hmac.new(
+            key=secret_key.encode('utf-8'),
+            msg=body_bytes,
+            digestmod=hashlib.sha256
+        ).hexdigest()
+        signature_valid = hmac.compare_digest(computed_signature, signature_header)
 
-    if not hmac.compare_digest(computed_signature, signature_header):
+    if not signature_valid:
+        ERRORS.labels("webhook_signature").inc()
         return JSONResponse(content={"error": "Неверная подпись"}, status_code=401)
 
     try:
@@ -0,0 +1,25 @@
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_stats_provider(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Регистрирует источник служебной статистики (счётчики, размеры очередей и т.п.),
+    который будет отдаваться эндпоинтом статистики приложения.
+    """
+    _providers[name] = provider
+
+
+def collect_stats() -> Dict[str, Dict[str, Any]]:
+    stats = {}
+    for name, provider in _providers.items():
+        try:
+            stats[name] = provider()
+        except Exception as e:
+            logger.error("Не удалось собрать статистику '%s': %s", name, e)
+            stats[name] = {}
+    return stats
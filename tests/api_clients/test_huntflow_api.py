@@ -1,12 +1,14 @@
+import pytest
 import requests
 
 from src.api_clients import huntflow_api
 
 
 class DummyResponse:
-    def __init__(self, status_code, json_data):
+    def __init__(self, status_code, json_data, headers=None):
         self.status_code = status_code
         self._json = json_data
+        self.headers = headers or {}
 
     def json(self):
         return self._json
@@ -22,7 +24,6 @@ def test_refresh_access_token_success(monkeypatch):
         "refresh_token": "new_refresh_token"
     })
     monkeypatch.setattr(huntflow_api.session, "post", lambda url, json, headers: dummy_response)
-    monkeypatch.setattr(huntflow_api, "update_and_reload_env", lambda key, value: None)
 
     token = huntflow_api.refresh_access_token()
     assert token == "new_api_token"
@@ -61,25 +62,11 @@ def test_create_applicant_token_expired(monkeypatch):
             return dummy_response_success
 
     monkeypatch.setattr(huntflow_api.session, "request", dummy_request)
-    monkeypatch.setattr(huntflow_api, "refresh_access_token", lambda: "refreshed_token")
+    monkeypatch.setattr(huntflow_api, "refresh_access_token", lambda *args: "refreshed_token")
     applicant_id = huntflow_api.create_applicant(applicant_data)
     assert applicant_id == 456
 
 
-def test_get_status_id_by_name(monkeypatch):
-    statuses = [
-        {"id": 1, "name": "отклики"},
-        {"id": 2, "name": "приоритет"},
-        {"id": 3, "name": "резерв"}
-    ]
-    monkeypatch.setattr(huntflow_api, "get_statuses", lambda: statuses)
-    status_id = huntflow_api.get_status_id_by_name("Приоритет")
-    assert status_id == 2
-
-    status_id_none = huntflow_api.get_status_id_by_name("неизвестный")
-    assert status_id_none is None
-
-
 def test_send_request_success(monkeypatch):
     dummy_resp = DummyResponse(200, {"result": "ok"})
     monkeypatch.setattr(huntflow_api.session, "request", lambda method, url, **kwargs: dummy_resp)
@@ -100,7 +87,7 @@ def test_send_request_token_expired(monkeypatch):
             return dummy_resp_success
 
     monkeypatch.setattr(huntflow_api.session, "request", dummy_request)
-    monkeypatch.setattr(huntflow_api, "refresh_access_token", lambda: "refreshed_token")
+    monkeypatch.setattr(huntflow_api, "refresh_access_token", lambda *args: "refreshed_token")
     response = huntflow_api.send_request("GET", "http://example.com")
     assert response.json() == {"result": "ok"}
 
@@ -195,3 +182,81 @@ def test_get_applicants(monkeypatch):
                         lambda method, url, **kwargs: dummy_request(method, url, **kwargs))
     applicants = huntflow_api.get_applicants(1, 2)
     assert len(applicants) == 3
+
+
+def test_session_adapter_has_default_timeout():
+    adapter = huntflow_api.session.get_adapter("https://api.huntflow.ru")
+    assert isinstance(adapter, huntflow_api.TimeoutHTTPAdapter)
+    assert adapter.timeout == (huntflow_api.HUNTFLOW_CONNECT_TIMEOUT, huntflow_api.HUNTFLOW_READ_TIMEOUT)
+    assert adapter._pool_maxsize == huntflow_api.HUNTFLOW_MAX_CONNECTIONS
+
+
+def test_send_request_uses_refreshed_token(monkeypatch, memory_credentials):
+    memory_credentials.access_token = "fresh_token"  # обновлён другим потоком
+    sent_tokens = []
+
+    def dummy_request(method, url, **kwargs):
+        sent_tokens.append(kwargs["headers"]["Authorization"])
+        if kwargs["headers"]["Authorization"] == "Bearer fresh_token":
+            return DummyResponse(200, {"result": "ok"})
+        return DummyResponse(401, {"errors": [{"detail": "token_expired"}]})
+
+    monkeypatch.setattr(huntflow_api.session, "request", dummy_request)
+    assert huntflow_api.send_request("GET", "http://example.com").json() == {"result": "ok"}
+    assert sent_tokens == ["Bearer fresh_token"]
+
+
+def test_send_request_refreshes_token_proactively(monkeypatch, memory_credentials):
+    memory_credentials.expires_at = 0
+    monkeypatch.setattr(huntflow_api, "request_new_tokens", lambda refresh_token: {
+        "access_token": "new_api_token", "refresh_token": "new_refresh_token", "expires_in": 86400
+    })
+    sent_tokens = []
+    monkeypatch.setattr(huntflow_api.session, "request",
+                        lambda method, url, **kwargs: sent_tokens.append(kwargs["headers"]["Authorization"])
+                        or DummyResponse(200, {}))
+
+    huntflow_api.send_request("GET", "http://example.com")
+    assert sent_tokens == ["Bearer new_api_token"]
+    assert not memory_credentials.needs_refresh()
+
+
+def test_send_request_retries_idempotent_requests(monkeypatch):
+    responses = [DummyResponse(429, {}, {"Retry-After": "0"}), DummyResponse(503, {}), DummyResponse(200, {"ok": True})]
+    monkeypatch.setattr(huntflow_api.session, "request", lambda method, url, **kwargs: responses.pop(0))
+
+    response = huntflow_api.send_request("GET", "http://localhost:8000/accounts/1/applicants/42")
+    assert response.json() == {"ok": True}
+    stats = huntflow_api.request_stats.get_stats()["GET /accounts/{id}/applicants/{id}"]
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["throttled"] == 1
+
+
+def test_send_request_does_not_retry_put(monkeypatch):
+    calls = []
+    monkeypatch.setattr(huntflow_api.session, "request",
+                        lambda method, url, **kwargs: calls.append(method) or DummyResponse(503, {}))
+
+    with pytest.raises(requests.RequestException):
+        huntflow_api.send_request("PUT", "http://localhost:8000/accounts/1/applicants/42/vacancy", json={})
+    assert calls == ["PUT"]
+
+
+def test_send_request_retries_connection_errors_until_limit(monkeypatch):
+    calls = []
+
+    def failing_request(method, url, **kwargs):
+        calls.append(method)
+        raise requests.ConnectionError("Connection refused")
+
+    monkeypatch.setattr(huntflow_api.session, "request", failing_request)
+    with pytest.raises(requests.ConnectionError):
+        huntflow_api.send_request("GET", "http://localhost:8000/accounts/1/vacancies")
+    assert len(calls) == huntflow_api.retry_policy.max_retries + 1
+
+
+def test_get_resume_error_is_raised(monkeypatch):
+    monkeypatch.setattr(huntflow_api.session, "request", lambda method, url, **kwargs: DummyResponse(404, {}))
+    with pytest.raises(requests.RequestException):
+        huntflow_api.get_resume(1, "external_1")
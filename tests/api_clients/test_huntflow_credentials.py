@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.api_clients.huntflow_credentials import CredentialManager, EnvPersister
+
+
+def make_requester(calls, delay=0.05, expires_in=None):
+    def requester(refresh_token):
+        time.sleep(delay)
+        calls.append(refresh_token)
+        data = {"access_token": f"access_{len(calls)}", "refresh_token": f"refresh_{len(calls)}"}
+        if expires_in is not None:
+            data["expires_in"] = expires_in
+        return data
+    return requester
+
+
+def test_concurrent_refreshes_are_single_flight():
+    calls = []
+    credentials = CredentialManager("access_0", "refresh_0")
+    requester = make_requester(calls)
+
+    # Все потоки получили 401 со старым токеном одновременно
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: credentials.refresh(requester, "access_0"), range(8)))
+
+    assert calls == ["refresh_0"]
+    assert tokens == ["access_1"] * 8
+    assert credentials.refresh_token == "refresh_1"
+    assert credentials.get_stats()["coalesced"] == 7
+
+
+def test_refresh_failure_keeps_tokens():
+    def failing_requester(refresh_token):
+        raise ConnectionError("Network error")
+
+    credentials = CredentialManager("access_0", "refresh_0")
+    assert credentials.refresh(failing_requester) is None
+    assert credentials.refresh(lambda refresh_token: {"access_token": "only_access"}) is None
+    assert (credentials.access_token, credentials.refresh_token) == ("access_0", "refresh_0")
+    assert credentials.get_stats()["failures"] == 2
+
+
+def test_proactive_refresh_uses_token_lifetime():
+    calls = []
+    credentials = CredentialManager("access_0", "refresh_0", refresh_margin=60)
+    assert not credentials.needs_refresh()
+
+    credentials.refresh(make_requester(calls, delay=0, expires_in=30))
+    # Токен живёт меньше запаса — его пора обновлять заранее
+    assert credentials.needs_refresh()
+
+    credentials.refresh(make_requester(calls, delay=0, expires_in=3600), credentials.access_token, proactive=True)
+    assert not credentials.needs_refresh()
+    assert credentials.get_stats()["proactive_refreshes"] == 1
+    assert 3500 < credentials.get_stats()["expires_in"] <= 3600
+
+
+def test_failed_proactive_refresh_waits_before_retrying(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(time, "time", lambda: now["value"])
+    calls = []
+
+    def failing_requester(refresh_token):
+        calls.append(refresh_token)
+        raise ConnectionError("Network error")
+
+    credentials = CredentialManager("access_0", "refresh_0", expires_at=1100, refresh_margin=300, retry_interval=30)
+    assert credentials.needs_refresh()
+    assert credentials.refresh(failing_requester, "access_0", proactive=True) is None
+
+    # До конца паузы токен не обновляется, запросы идут с текущим
+    now["value"] = 1020
+    assert not credentials.needs_refresh()
+    assert credentials.refresh(failing_requester, "access_0", proactive=True) == "access_0"
+    assert calls == ["refresh_0"]
+
+    now["value"] = 1031
+    assert credentials.needs_refresh()
+    credentials.refresh(make_requester(calls, delay=0, expires_in=3600), "access_0", proactive=True)
+    assert credentials.access_token == "access_2"
+
+
+def test_expired_token_is_refreshed_despite_pause(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(time, "time", lambda: now["value"])
+    credentials = CredentialManager("access_0", "refresh_0", expires_at=1010, refresh_margin=300, retry_interval=60)
+    credentials.refresh(lambda refresh_token: {}, "access_0", proactive=True)
+    assert not credentials.needs_refresh()
+
+    now["value"] = 1010
+    assert credentials.needs_refresh()
+
+
+def test_stale_token_is_refreshed_again_when_current_expires():
+    calls = []
+    credentials = CredentialManager("access_1", "refresh_1", expires_at=time.time() - 1)
+    credentials.refresh(make_requester(calls, delay=0), "access_0")
+    assert calls == ["refresh_1"]
+
+
+def test_persister_writes_tokens_in_background(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("HUNTFLOW_API_TOKEN=old\nOTHER=keep\n")
+    monkeypatch.setenv("HUNTFLOW_API_TOKEN", "old")
+    persister = EnvPersister(env_file)
+    credentials = CredentialManager("access_0", "refresh_0", persister=persister)
+
+    credentials.refresh(make_requester([], delay=0, expires_in=3600))
+    persister.wait()
+
+    content = env_file.read_text()
+    assert "HUNTFLOW_API_TOKEN='access_1'" in content
+    assert "HUNTFLOW_REFRESH_TOKEN='refresh_1'" in content
+    assert "HUNTFLOW_TOKEN_EXPIRES_AT=" in content
+    assert "OTHER=keep" in content
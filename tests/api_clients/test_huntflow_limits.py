@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from src.api_clients.huntflow_limits import RateLimiter, RetryPolicy, endpoint_name, retry_after_seconds
+
+
+def test_rate_limiter_allows_burst_then_waits():
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def test_rate_limiter_backs_off_on_429_and_recovers():
+    limiter = RateLimiter(rate=10, burst=1, min_rate=1)
+    limiter.reserve()
+
+    assert limiter.on_response(429, {"Retry-After": "2"}) == 2
+    assert limiter.rate == 5
+    # Все следующие запросы ждут окончания паузы
+    assert limiter.reserve() == pytest.approx(2, abs=0.05)
+
+    for _ in range(20):
+        limiter.on_response(200, {})
+    assert limiter.rate == 10
+
+
+def test_rate_limiter_pauses_when_quota_exhausted():
+    limiter = RateLimiter(rate=100, burst=10)
+    limiter.on_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 3)})
+    assert limiter.reserve() == pytest.approx(3, abs=0.1)
+
+
+def test_retry_policy_only_idempotent_methods():
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry("GET", 0, 503)
+    assert policy.should_retry("get", 1)
+    assert not policy.should_retry("GET", 2, 503)
+    assert not policy.should_retry("GET", 0, 404)
+    assert not policy.should_retry("PUT", 0, 503)
+    assert not policy.should_retry("POST", 0)
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(backoff=1, backoff_max=5)
+    assert 0.8 <= policy.delay(0) <= 1.2
+    assert 3.2 <= policy.delay(2) <= 4.8
+    assert policy.delay(10) <= 6
+    assert policy.delay(0, retry_after=3) == 3
+
+
+def test_retry_after_http_date():
+    assert retry_after_seconds({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert retry_after_seconds({"Retry-After": "1.5"}) == 1.5
+    assert retry_after_seconds({}) is None
+
+
+def test_endpoint_name():
+    assert endpoint_name("get", "https://api.huntflow.ru/v2/accounts/12/applicants/345/externals/abc?x=1") == \
+        "GET /v2/accounts/{id}/applicants/{id}/externals/{id}"
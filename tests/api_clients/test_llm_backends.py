@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from src.api_clients import openai_api
+from src.api_clients.llm_backends import FakeBackend, HealthMonitor, LLMBackend, OpenAICompatibleBackend
+from src.api_clients.openai_api import TIER_PRIMARY, ask_gpt, get_backend_stats
+from src.api_clients.openai_scheduler import DeadlineExceeded, OpenAIScheduler
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from tests.stubs.openai_stub import OpenAIStub
+
+
+@pytest.fixture
+def local_server():
+    with OpenAIStub() as stub:
+        yield stub
+
+
+def test_openai_compatible_backend_with_base_url(local_server):
+    backend = OpenAICompatibleBackend("prescreen", "local-model", base_url=local_server.url)
+
+    answer = backend.parse("system", "user", CandidateEvaluationAnswer)
+
+    assert answer.target_stage == TargetStage.RESERVE
+    # Локальный сервер не ограничен бюджетами OpenAI
+    assert backend.scheduled is False
+    # Клиент с пулом соединений создаётся один раз
+    assert backend.client is backend.client
+    stats = backend.get_stats()
+    assert stats["requests"] == 1
+    assert stats["success_rate"] == 1.0
+    assert stats["avg_latency"] is not None
+
+
+def test_backend_records_failures(local_server):
+    local_server.responder = lambda body: {"unexpected": True}
+    backend = OpenAICompatibleBackend("prescreen", "local-model", base_url=local_server.url)
+
+    with pytest.raises(Exception):
+        backend.parse("system", "user", CandidateEvaluationAnswer)
+
+    stats = backend.get_stats()
+    assert stats["failures"] == 1
+    assert stats["success_rate"] == 0.0
+    assert stats["last_error"]
+
+
+def test_scheduled_request_is_not_sent_after_deadline(monkeypatch, local_server):
+    scheduler = OpenAIScheduler(rpm=1, tpm=0)
+    scheduler.acquire(10)
+    monkeypatch.setattr("src.api_clients.llm_backends.get_scheduler", lambda: scheduler)
+    backend = OpenAICompatibleBackend("primary", "gpt", base_url=local_server.url, scheduled=True)
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        backend.parse("system", "user", CandidateEvaluationAnswer, timeout=0.1)
+
+    assert time.monotonic() - started < 0.5
+    # Запрос, не дождавшийся очереди до срока, в модель не уходит
+    assert local_server.requests == []
+
+
+def test_backend_must_implement_parse_and_ping():
+    class ParseOnly(LLMBackend):
+        def _parse(self, system_prompt, user_prompt, response_format, priority, completion_tokens, expires):
+            return None
+
+    with pytest.raises(TypeError):
+        ParseOnly("incomplete", "model")
+
+
+def test_health_check(local_server):
+    backend = OpenAICompatibleBackend("prescreen", "local-model", base_url=local_server.url)
+    assert backend.health_check() is True
+    assert backend.available
+
+    local_server.stop()
+    unreachable = OpenAICompatibleBackend("prescreen", "local-model", base_url=local_server.url)
+    assert unreachable.health_check() is False
+    assert not unreachable.available
+    local_server.start()
+
+
+def test_health_monitor_skips_openai():
+    fake = FakeBackend(healthy=False)
+    openai_backend = OpenAICompatibleBackend("primary", "gpt-4o")
+    monitor = HealthMonitor(lambda: {"primary": openai_backend, "prescreen": fake}, interval=0.01)
+
+    async def run_monitor():
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(run_monitor())
+
+    assert fake.stats.healthy is False
+    assert openai_backend.stats.healthy is None
+
+
+def test_ask_gpt_uses_tier_backend(monkeypatch):
+    fake = FakeBackend(responder=lambda system_prompt, user_prompt, response_format:
+                       CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment=user_prompt))
+    monkeypatch.setitem(openai_api._backends, TIER_PRIMARY, fake)
+
+    assert ask_gpt("system", "user").comment == "user"
+    assert get_backend_stats()[TIER_PRIMARY]["requests"] == 1
@@ -0,0 +1,219 @@
+import time
+
+import pytest
+
+from src.api_clients.llm_backends import FakeBackend, OpenAICompatibleBackend
+from src.api_clients.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyWindow,
+    ResilientBackend,
+)
+from src.api_clients.openai_scheduler import OpenAIScheduler, QueueDeadlineExceeded
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from tests.stubs.openai_stub import OpenAIStub
+
+
+@pytest.fixture
+def slow_server():
+    with OpenAIStub() as stub:
+        yield stub
+
+
+def make_backend(stub, **kwargs):
+    return ResilientBackend(OpenAICompatibleBackend("primary", "stub-model", base_url=stub.url), **kwargs)
+
+
+def warm_up(backend, stub, calls):
+    stub.latencies = [0.01] * calls
+    for _ in range(calls):
+        backend.parse("system", "user", CandidateEvaluationAnswer)
+
+
+def test_latency_window_quantile():
+    window = LatencyWindow()
+    for latency in range(1, 101):
+        window.add(latency / 100)
+    assert window.quantile(0.95) == 0.95
+    assert window.quantile(0.5) == 0.5
+    assert LatencyWindow().quantile(0.95) is None
+
+
+def test_deadline_bounds_hanging_request(slow_server):
+    slow_server.latency = 1.0
+    backend = make_backend(slow_server, deadline=0.2, hedge=False)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        backend.parse("system", "user", CandidateEvaluationAnswer)
+
+    assert time.monotonic() - started < 0.8
+    assert backend.get_stats()["breaker"]["recent_failure_rate"] == 1.0
+
+
+def test_deadline_applies_to_fake_backend():
+    backend = ResilientBackend(FakeBackend(latency=1.0), deadline=0.1, hedge=False)
+
+    with pytest.raises(TimeoutError):
+        backend.parse("system", "user", CandidateEvaluationAnswer)
+
+
+def test_hanging_backend_does_not_take_threads_of_another():
+    hanging = ResilientBackend(FakeBackend("hanging", latency=1.0), deadline=0.05, hedge=False, workers=1)
+    healthy = ResilientBackend(FakeBackend("healthy"), deadline=0.5, hedge=False, workers=1)
+
+    with pytest.raises(TimeoutError):
+        hanging.parse("system", "user", CandidateEvaluationAnswer)
+    # Поток зависшего уровня всё ещё занят, но у другого уровня свой пул
+    assert healthy.parse("system", "user", CandidateEvaluationAnswer).comment == "Заглушка"
+
+
+def test_hedged_request_wins_over_slow_one(slow_server):
+    backend = make_backend(slow_server, deadline=5, hedge_min_samples=5, hedge_max_ratio=0.5)
+    warm_up(backend, slow_server, 5)
+
+    # Первый запрос «зависает», дублирующий отвечает сразу
+    slow_server.latencies = [1.0, 0.0]
+    started = time.monotonic()
+    answer = backend.parse("system", "user", CandidateEvaluationAnswer)
+
+    assert answer.target_stage == TargetStage.RESERVE
+    assert time.monotonic() - started < 0.8
+    stats = backend.get_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["hedge_tokens"] > 0
+
+
+def test_hedging_respects_spend_cap(slow_server):
+    backend = make_backend(slow_server, deadline=5, hedge_min_samples=5, hedge_max_ratio=0)
+    warm_up(backend, slow_server, 5)
+
+    slow_server.latencies = [0.3]
+    backend.parse("system", "user", CandidateEvaluationAnswer)
+
+    assert backend.get_stats()["hedges"] == 0
+    assert len([request for request in slow_server.requests if request[1].endswith("completions")]) == 6
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4, reset_timeout=0.05)
+    for success in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(success)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Пока пробный вызов не завершён, остальные не пропускаются
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_routes_to_fallback():
+    def failing(system_prompt, user_prompt, response_format):
+        raise ConnectionError("Модель недоступна")
+
+    fallback = FakeBackend("fallback", "gpt-4o-mini", responder=lambda *args:
+                           CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Резерв"))
+    backend = ResilientBackend(
+        FakeBackend("primary", responder=failing),
+        fallback=lambda: fallback,
+        hedge=False,
+        breaker=CircuitBreaker(window=2, min_calls=2, reset_timeout=60),
+    )
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            backend.parse("system", "user", CandidateEvaluationAnswer)
+
+    assert backend.parse("system", "user", CandidateEvaluationAnswer).comment == "Резерв"
+    stats = backend.get_stats()
+    assert stats["breaker"]["state"] == CircuitBreaker.OPEN
+    assert stats["fallback_calls"] == 1
+
+
+def test_open_circuit_without_fallback():
+    backend = ResilientBackend(FakeBackend(), hedge=False, breaker=CircuitBreaker(min_calls=1, reset_timeout=60))
+    backend.breaker.record(False)
+
+    assert not backend.available
+    with pytest.raises(CircuitOpenError):
+        backend.parse("system", "user", CandidateEvaluationAnswer)
+
+
+@pytest.fixture
+def full_queue(monkeypatch):
+    # Бюджет на минуту исчерпан: следующий запрос ждёт в очереди дольше срока вызова
+    scheduler = OpenAIScheduler(rpm=1, tpm=0)
+    scheduler.acquire(10)
+    monkeypatch.setattr("src.api_clients.llm_backends.get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def test_queue_deadline_is_not_a_backend_failure(full_queue, slow_server):
+    breaker = CircuitBreaker(min_calls=1)
+    backend = ResilientBackend(
+        OpenAICompatibleBackend("primary", "gpt", base_url=slow_server.url, scheduled=True),
+        deadline=0.1, hedge=False, breaker=breaker,
+    )
+
+    with pytest.raises(QueueDeadlineExceeded):
+        backend.parse("system", "user", CandidateEvaluationAnswer)
+    with pytest.raises(QueueDeadlineExceeded):
+        backend.stream("system", "user", CandidateEvaluationAnswer, lambda delta: None)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.get_stats()["recent_failure_rate"] is None
+    assert slow_server.requests == []
+
+
+def test_queue_deadline_releases_probe():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=0)
+    breaker.record(False)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_stream_deadline_stops_forwarding_deltas(slow_server):
+    slow_server.stream_chunk_size = 4
+    slow_server.stream_delay = 0.1
+    backend = make_backend(slow_server, hedge=False)
+    # Первый запрос дольше остальных (клиент, схема ответа) — он не должен попасть под срок
+    warm_up(backend, slow_server, 1)
+    backend.deadline = 0.5
+    deltas = []
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        backend.stream("system", "user", CandidateEvaluationAnswer, deltas.append)
+    elapsed = time.monotonic() - started
+    received = len(deltas)
+    time.sleep(0.5)
+
+    assert elapsed < 0.9
+    assert 0 < received == len(deltas)
+    assert backend.get_stats()["deadline_exceeded"] == 1
+    assert backend.get_stats()["breaker"]["recent_failure_rate"] == 0.5
+
+
+def test_stream_with_open_circuit_routes_to_fallback():
+    fallback = FakeBackend("fallback", "gpt-4o-mini")
+    backend = ResilientBackend(FakeBackend(), fallback=lambda: fallback, hedge=False,
+                               breaker=CircuitBreaker(min_calls=1, reset_timeout=60))
+    backend.breaker.record(False)
+    deltas = []
+
+    answer = backend.stream("system", "user", CandidateEvaluationAnswer, deltas.append)
+
+    assert answer.answered_by == "gpt-4o-mini"
+    assert len(fallback.calls) == 1
+    assert "".join(deltas) == answer.model_dump_json()
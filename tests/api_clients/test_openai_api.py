@@ -2,7 +2,7 @@ import logging
 
 import pytest
 
-from src.api_clients.openai_api import get_client, ask_gpt
+from src.api_clients.openai_api import get_client, ask_gpt, get_usage_stats
 from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
 from src.model.target_stage import TargetStage
 
@@ -23,7 +23,7 @@ class DummyCompletion:
 
 
 class DummyOpenAI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, **kwargs):
         self.api_key = api_key
         # Для поддержки цепочки вызовов: client.beta.chat.completions.parse(...)
         self.beta = self
@@ -107,3 +107,30 @@ def test_ask_gpt(monkeypatch):
     assert isinstance(result, CandidateEvaluationAnswer)
     assert result.target_stage == TargetStage.NEW
     assert result.comment == "Good candidate"
+
+
+def test_ask_gpt_records_usage(monkeypatch):
+    class DummyPromptTokensDetails:
+        cached_tokens = 64
+
+    class DummyUsage:
+        prompt_tokens = 100
+        completion_tokens = 20
+        total_tokens = 120
+        prompt_tokens_details = DummyPromptTokensDetails()
+
+    dummy_answer = CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Good candidate")
+    completion = DummyCompletion([DummyChoice(dummy_answer)])
+    completion.usage = DummyUsage()
+
+    dummy_client = DummyOpenAI(api_key="dummy")
+    dummy_client.beta.chat.completions.parse = lambda model, messages, response_format: completion
+    monkeypatch.setattr("src.api_clients.openai_api.get_client", lambda: dummy_client)
+
+    before = get_usage_stats()
+    ask_gpt("system", "user")
+    after = get_usage_stats()
+    assert after["requests"] == before["requests"] + 1
+    assert after["prompt_tokens"] == before["prompt_tokens"] + 100
+    assert after["total_tokens"] == before["total_tokens"] + 120
+    assert after["cached_tokens"] == before["cached_tokens"] + 64
@@ -0,0 +1,49 @@
+import json
+
+from src.api_clients import openai_api, openai_batch_api
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+
+
+def test_build_batch_request_uses_structured_output():
+    request = openai_batch_api.build_batch_request("1-2-x", "system", "user")
+    assert request["custom_id"] == "1-2-x"
+    assert request["url"] == "/v1/chat/completions"
+    assert request["body"]["messages"] == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "user"},
+    ]
+    response_format = request["body"]["response_format"]
+    assert response_format["json_schema"]["strict"] is True
+    assert response_format["json_schema"]["schema"]["additionalProperties"] is False
+
+
+def test_submit_and_download_batch(openai_stub):
+    requests = [openai_batch_api.build_batch_request(f"id-{i}", "system", f"user {i}") for i in range(3)]
+
+    batch_id = openai_batch_api.submit_batch(requests)
+    uploaded = openai_stub.files[openai_stub.batches[batch_id]["input_file_id"]].decode("utf-8").splitlines()
+    assert [json.loads(line)["custom_id"] for line in uploaded] == ["id-0", "id-1", "id-2"]
+
+    batch = openai_batch_api.retrieve_batch(batch_id)
+    assert batch.status == "completed"
+
+    results = openai_batch_api.download_batch_results(batch.output_file_id)
+    assert set(results) == {"id-0", "id-1", "id-2"}
+    assert all(result.target_stage == TargetStage.RESERVE for result in results.values())
+
+
+def test_parse_batch_record_errors_and_usage(monkeypatch):
+    monkeypatch.setattr(openai_api, "_usage", dict.fromkeys(openai_api._usage, 0))
+
+    assert "Ошибка batch" in openai_batch_api._parse_batch_record({"error": {"code": "expired"}})
+    assert "HTTP 500" in openai_batch_api._parse_batch_record({"response": {"status_code": 500, "body": {}}})
+
+    content = json.dumps({"target_stage": "новые", "comment": "ok"}, ensure_ascii=False)
+    record = {"response": {"status_code": 200, "body": {
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }}}
+    answer = openai_batch_api._parse_batch_record(record)
+    assert isinstance(answer, CandidateEvaluationAnswer)
+    assert openai_api.get_usage_stats()["total_tokens"] == 15
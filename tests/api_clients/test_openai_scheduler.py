@@ -0,0 +1,154 @@
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from src.api_clients import openai_scheduler
+from src.api_clients.openai_scheduler import (
+    PRIORITY_BACKFILL,
+    PRIORITY_REALTIME,
+    DeadlineExceeded,
+    OpenAIScheduler,
+    estimate_tokens,
+)
+
+
+@pytest.fixture(autouse=True)
+def short_window(monkeypatch):
+    # Минутное окно в тестах сокращено до 0.2 с
+    monkeypatch.setattr(openai_scheduler, "WINDOW", 0.2)
+
+
+def rate_limit_error(headers=None, body=None):
+    response = httpx.Response(429, headers=headers or {}, request=httpx.Request("POST", "http://openai.test"))
+    return openai.RateLimitError("Rate limit reached", response=response, body=body)
+
+
+def test_estimate_tokens():
+    short = estimate_tokens("system", "user", completion_tokens=0)
+    long = estimate_tokens("system", "user " * 300, completion_tokens=0)
+    assert 0 < short < long
+    assert estimate_tokens("a", completion_tokens=100) > 100
+
+
+def test_rpm_budget_delays_excess_requests():
+    scheduler = OpenAIScheduler(rpm=2, tpm=0)
+    started = time.monotonic()
+    for _ in range(3):
+        scheduler.acquire(10)
+    assert time.monotonic() - started >= 0.15
+    assert scheduler.get_stats()["admitted"] == 3
+
+
+def test_tpm_budget_uses_actual_tokens():
+    scheduler = OpenAIScheduler(rpm=0, tpm=100)
+    entry = scheduler.acquire(90)
+    # Фактически запрос потратил меньше оценки — следующий помещается сразу
+    scheduler.settle(entry, 30)
+    started = time.monotonic()
+    scheduler.acquire(60)
+    assert time.monotonic() - started < 0.1
+
+    scheduler.acquire(60)
+    assert time.monotonic() - started >= 0.15
+
+
+def test_acquire_gives_up_at_deadline():
+    scheduler = OpenAIScheduler(rpm=1, tpm=0)
+    scheduler.acquire(10)
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(10, expires=started + 0.05)
+
+    assert time.monotonic() - started < 0.15
+    stats = scheduler.get_stats()
+    assert stats["queued"] == 0
+    assert stats["expired"] == 1
+    # Снятый с очереди запрос не мешает следующим
+    scheduler.acquire(10)
+
+
+def test_run_does_not_call_func_after_deadline():
+    scheduler = OpenAIScheduler(rpm=1, tpm=0)
+    scheduler.acquire(10)
+    calls = []
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.run(lambda: calls.append(1), estimated_tokens=10, expires=time.monotonic() + 0.05)
+
+    assert calls == []
+
+
+def test_oversized_request_admitted_when_window_empty():
+    scheduler = OpenAIScheduler(rpm=0, tpm=100)
+    started = time.monotonic()
+    scheduler.acquire(500)
+    assert time.monotonic() - started < 0.1
+
+
+def test_realtime_requests_overtake_backfill():
+    scheduler = OpenAIScheduler(rpm=1, tpm=0)
+    scheduler.acquire(10)
+    order = []
+
+    def request(name, priority):
+        scheduler.acquire(10, priority)
+        order.append(name)
+
+    backfill = threading.Thread(target=request, args=("backfill", PRIORITY_BACKFILL))
+    backfill.start()
+    time.sleep(0.05)
+    realtime = threading.Thread(target=request, args=("realtime", PRIORITY_REALTIME))
+    realtime.start()
+    backfill.join()
+    realtime.join()
+
+    assert order == ["realtime", "backfill"]
+    queue_wait = scheduler.get_stats()["queue_wait"]
+    assert queue_wait["backfill"]["max_wait"] > queue_wait["realtime"]["max_wait"] > 0
+
+
+def test_run_retries_after_rate_limit():
+    scheduler = OpenAIScheduler(rpm=0, tpm=0, backoff=0)
+    errors = [rate_limit_error(headers={"retry-after-ms": "50"})]
+
+    def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    started = time.monotonic()
+    assert scheduler.run(call, estimated_tokens=10) == "ok"
+    assert time.monotonic() - started >= 0.05
+    stats = scheduler.get_stats()
+    assert stats["rate_limited"] == 1
+    assert stats["retries"] == 1
+
+
+def test_run_gives_up_on_insufficient_quota():
+    scheduler = OpenAIScheduler(rpm=0, tpm=0, backoff=0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise rate_limit_error(body={"code": "insufficient_quota"})
+
+    with pytest.raises(openai.RateLimitError):
+        scheduler.run(call, estimated_tokens=10)
+    assert len(calls) == 1
+
+
+def test_run_stops_after_max_retries():
+    scheduler = OpenAIScheduler(rpm=0, tpm=0, max_retries=2, backoff=0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise rate_limit_error()
+
+    with pytest.raises(openai.RateLimitError):
+        scheduler.run(call, estimated_tokens=10)
+    assert len(calls) == 3
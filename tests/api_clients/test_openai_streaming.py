@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from src.api_clients import openai_api, openai_streaming
+from src.api_clients.llm_backends import FakeBackend
+from src.api_clients.llm_resilience import ResilientBackend
+from src.api_clients.openai_api import TIER_PRIMARY
+from src.api_clients.openai_streaming import FieldParser, get_streaming_stats, stream_gpt
+from src.model.target_stage import TargetStage
+
+
+@pytest.fixture(autouse=True)
+def clean_streaming_stats():
+    openai_streaming.reset_streaming_stats()
+    yield
+    openai_streaming.reset_streaming_stats()
+
+
+def test_field_parser_returns_value_once_complete():
+    parser = FieldParser("target_stage")
+    chunks = ['{"tar', 'get_stage": "ре', 'зе', 'рв", "comm', 'ent": "..."}']
+
+    results = [parser.feed(chunk) for chunk in chunks]
+
+    assert results == [None, None, None, "резерв", None]
+
+
+def test_field_parser_handles_escapes():
+    parser = FieldParser("comment")
+    assert parser.feed('{"comment": "say \\"hi\\"') is None
+    assert parser.feed('"}') == 'say "hi"'
+
+
+def test_stream_gpt_reports_decision_before_completion(openai_stub):
+    openai_stub.stream_chunk_size = 4
+    openai_stub.stream_delay = 0.02
+    decisions = []
+
+    started = time.monotonic()
+    answer = stream_gpt("system", "user", lambda stage: decisions.append((stage, time.monotonic() - started)))
+    elapsed = time.monotonic() - started
+
+    assert answer.target_stage == TargetStage.RESERVE
+    assert answer.comment == "Заглушка"
+    assert [stage for stage, _ in decisions] == [TargetStage.RESERVE]
+    assert decisions[0][1] < elapsed
+
+    stats = get_streaming_stats()
+    assert stats["streams"] == 1
+    assert stats["early_decisions"] == 1
+    assert stats["avg_time_to_decision"] < stats["avg_time_to_complete"]
+
+
+def test_stream_gpt_uses_primary_backend(monkeypatch):
+    backend = FakeBackend("primary", "fake-model")
+    monkeypatch.setitem(openai_api._backends, TIER_PRIMARY, ResilientBackend(backend, hedge=False))
+    decisions = []
+
+    answer = stream_gpt("system", "user", decisions.append)
+
+    assert decisions == [TargetStage.RESERVE]
+    assert answer.answered_by == "fake-model"
+    assert backend.calls == [("system", "user")]
+    assert get_streaming_stats()["early_decisions"] == 1
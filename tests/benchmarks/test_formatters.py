@@ -0,0 +1,75 @@
+import inspect
+from html import unescape
+
+import pytest
+
+from benchmarks import formatters, reference_formatters
+from benchmarks.corpus import make_resumes, make_vacancies
+from src.service.formatting.html_cleaner import clean_html
+from src.service.formatting.resume_formatter import format_education, format_experience, format_resume
+from src.service.formatting.token_budget import extract_terms
+from src.service.formatting.vacancy_formatter import format_vacancy
+
+RESUMES = make_resumes(10, experience=10) + [
+    {},
+    {"experience": [{}], "education": {"higher": [{}]}},
+    {"position": "QA", "experience": [{"description": None, "date_to": None}], "skill_set": ["Python"]},
+]
+VACANCIES = make_vacancies(5, paragraphs=15) + [{}]
+
+
+@pytest.mark.parametrize("token_budget", [0, 3000, 800, 200, 10])
+def test_format_resume_matches_reference(token_budget):
+    for resume in RESUMES:
+        terms = extract_terms(" ".join(resume.get("skill_set", [])))
+        expected = reference_formatters.format_resume(resume, token_budget, terms)
+        assert format_resume(resume, token_budget=token_budget, relevance_terms=terms) == expected
+
+
+def test_format_experience_and_education_match_reference():
+    for resume in RESUMES:
+        assert format_experience(resume.get("experience", [])) == \
+            reference_formatters.format_experience(resume.get("experience", []))
+        assert format_education(resume.get("education", {})) == \
+            reference_formatters.format_education(resume.get("education", {}))
+
+
+@pytest.mark.parametrize("token_budget", [0, 2000, 300])
+def test_format_vacancy_matches_reference(token_budget):
+    for vacancy in VACANCIES:
+        assert format_vacancy(vacancy, token_budget=token_budget) == \
+            reference_formatters.format_vacancy(vacancy, token_budget, clean=clean_html)
+
+
+def test_clean_html_keeps_reference_words():
+    # Конвертер меняет только раскладку текста: сущности, пробелы, абзацы и маркеры списков
+    for vacancy in VACANCIES:
+        for field in ("body", "requirements", "conditions"):
+            html = vacancy.get(field, "")
+            words = [word for word in clean_html(html).split() if word != "-"]
+            assert words == unescape(reference_formatters.clean_html(html)).split()
+
+
+def test_benchmark_reports_every_formatter():
+    cases = formatters.build_cases(make_resumes(2, experience=3), make_vacancies(2, paragraphs=2))
+
+    results = formatters.run(cases, number=1, repeat=1)
+
+    assert set(results) == {"format_resume", "format_experience", "format_education", "format_vacancy",
+                            "clean_html"}
+    for result in results.values():
+        assert result["current"]["ops_per_sec"] > 0
+        assert result["reference"]["peak_kib_per_call"] >= 0
+
+
+def test_benchmark_rejects_diverging_implementation():
+    case = formatters.Case("clean_html", reference_formatters.clean_html, lambda html: html, ["<p>text</p>"])
+
+    with pytest.raises(AssertionError):
+        formatters.verify(case)
+
+
+def test_benchmark_measures_undecorated_formatters():
+    cases = {case.name: case for case in formatters.build_cases([], [])}
+
+    assert cases["format_resume"].current is inspect.unwrap(format_resume)
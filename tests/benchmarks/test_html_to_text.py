@@ -0,0 +1,23 @@
+import json
+
+from benchmarks import html_to_text
+from benchmarks.corpus import make_vacancies
+
+
+def test_converter_decodes_entities_and_saves_tokens():
+    result = html_to_text.measure(make_vacancies(3, paragraphs=4), number=1, repeat=1)
+
+    assert result["regex"]["entities"] > 0
+    assert result["converter"]["entities"] == 0
+    assert result["converter"]["tokens"] < result["regex"]["tokens"]
+    assert result["converter"]["ops_per_sec"] > 0
+
+
+def test_benchmark_writes_json(tmp_path):
+    path = tmp_path / "html_to_text.json"
+
+    results = html_to_text.main(["--vacancies", "2", "--paragraphs", "2", "10", "--number", "1", "--repeat", "1",
+                                 "--json", str(path)])
+
+    assert set(results) == {2, 10}
+    assert json.loads(path.read_text(encoding="utf-8"))["10"]["speedup"] > 0
@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import requests
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_servers import FakeHuntflow, FaultProfile
+from benchmarks.webhooks import applicant_status_webhook
+from src.app import app
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_signed_webhook_is_accepted(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "load-test-secret")
+    monkeypatch.setattr("src.service.applicant_handler.from_stage_name", "Отклики")
+    body, headers = applicant_status_webhook("load-test-secret", 456, 123, "Отклики", log_id=1)
+
+    response = TestClient(app).post("/huntflow/webhook/applicant", content=body, headers=headers)
+
+    assert response.status_code == 202
+
+
+def test_fake_huntflow_serves_applicant_flow():
+    with FakeHuntflow() as huntflow:
+        applicant = requests.get(f"{huntflow.url}/accounts/1/applicants/7").json()
+        resume = requests.get(f"{huntflow.url}/accounts/1/applicants/7/externals/{applicant['external'][0]['id']}").json()
+        statuses = requests.get(f"{huntflow.url}/accounts/1/vacancies/statuses").json()
+        requests.put(f"{huntflow.url}/accounts/1/applicants/7/vacancy", json={"status": 2, "vacancy": 1})
+
+    assert resume["resume"]["experience"]
+    assert {"новые", "резерв", "Отклики"} <= {status["name"] for status in statuses["items"]}
+    assert list(huntflow.moved) == [7]
+    assert huntflow.calls["GET /accounts/{id}/applicants/{id}/externals/{id}"] == 1
+
+
+def test_fake_huntflow_injects_throttling():
+    with FakeHuntflow(FaultProfile(throttle_rate=1.0, retry_after=2)) as huntflow:
+        response = requests.get(f"{huntflow.url}/accounts/1/vacancies/1")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert huntflow.faults[429] == 1
+
+
+def test_load_test_smoke(tmp_path):
+    report_path = tmp_path / "report.json"
+    # Отдельный процесс: настройки приложения читаются из окружения при импорте модулей
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.load_test", "--rate", "10", "--duration", "1",
+         "--huntflow-latency", "0", "--openai-latency", "0", "--drain-timeout", "20", "--json", str(report_path)],
+        cwd=ROOT, check=True, capture_output=True, timeout=60,
+    )
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["webhooks"]["statuses"] == {"202": 10}
+    assert report["evaluations"]["completed"] == 10
+    assert report["upstream"]["huntflow_calls_per_evaluation"] >= 3
+    assert report["evaluations"]["latency"]["p99_ms"] is not None
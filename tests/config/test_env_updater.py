@@ -20,3 +20,13 @@ def test_update_env_file_file_not_exist(tmp_path, monkeypatch, caplog):
     with caplog.at_level(logging.ERROR):
         env_updater.update_and_reload_env("KEY2", "value2")
     assert ".env not found:" in caplog.text
+
+
+def test_write_env_atomic_replaces_and_appends(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("# comment\nKEY1=old_value\nOTHER=keep\n")
+
+    env_updater.write_env_atomic(env_file, {"KEY1": "new_value", "KEY2": "added"})
+
+    assert env_file.read_text() == "# comment\nKEY1='new_value'\nOTHER=keep\nKEY2='added'\n"
+    assert [path.name for path in tmp_path.iterdir()] == [".env"]
@@ -1,6 +1,12 @@
 import pytest
 
+from src.api_clients import huntflow_api
+from src.api_clients.huntflow_credentials import CredentialManager
+from src.api_clients import openai_api, openai_scheduler
+from src.api_clients.huntflow_limits import RateLimiter, RequestStats, RetryPolicy
 from src.app import app as flask_app
+from src.service import batch_evaluation, dedup_store, job_queue
+from src.service.caching import evaluation_cache
 
 
 @pytest.fixture(autouse=True)
@@ -14,6 +20,14 @@ def set_test_env(monkeypatch):
     yield
 
 
+@pytest.fixture(autouse=True)
+def memory_job_queue(monkeypatch):
+    queue = job_queue.JobQueue(":memory:")
+    monkeypatch.setattr(job_queue, "_queue", queue)
+    yield queue
+    queue.close()
+
+
 @pytest.fixture
 def app():
     flask_app.config.update({
@@ -26,3 +40,66 @@ def app():
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def memory_dedup_store(monkeypatch):
+    store = dedup_store.DedupStore()
+    monkeypatch.setattr(dedup_store, "_store", store)
+    yield store
+
+
+@pytest.fixture(autouse=True)
+def memory_evaluation_cache(monkeypatch):
+    cache = evaluation_cache.EvaluationCache(":memory:")
+    monkeypatch.setattr(evaluation_cache, "_cache", cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def memory_batch_evaluator(monkeypatch):
+    evaluator = batch_evaluation.BatchEvaluator(":memory:")
+    monkeypatch.setattr(batch_evaluation, "_evaluator", evaluator)
+    yield evaluator
+    evaluator.close()
+
+
+@pytest.fixture
+def openai_stub(monkeypatch):
+    from openai import OpenAI
+
+    from src.api_clients import openai_api
+    from tests.stubs.openai_stub import OpenAIStub
+
+    with OpenAIStub() as stub:
+        monkeypatch.setattr(openai_api, "_client", OpenAI(api_key="test", base_url=stub.url, max_retries=0))
+        yield stub
+
+
+@pytest.fixture(autouse=True)
+def memory_credentials(monkeypatch):
+    credentials = CredentialManager("test_api_token", "test_refresh_token")
+    monkeypatch.setattr(huntflow_api, "credentials", credentials)
+    yield credentials
+
+
+@pytest.fixture(autouse=True)
+def huntflow_limits(monkeypatch):
+    # В тестах запросы не ограничиваются по скорости, а повторы выполняются без задержки
+    monkeypatch.setattr(huntflow_api, "rate_limiter", RateLimiter(rate=0))
+    monkeypatch.setattr(huntflow_api, "retry_policy", RetryPolicy(backoff=0))
+    monkeypatch.setattr(huntflow_api, "request_stats", RequestStats())
+
+
+@pytest.fixture(autouse=True)
+def openai_scheduler_instance(monkeypatch):
+    scheduler = openai_scheduler.OpenAIScheduler(backoff=0)
+    monkeypatch.setattr(openai_scheduler, "_scheduler", scheduler)
+    yield scheduler
+
+
+@pytest.fixture(autouse=True)
+def llm_backends(monkeypatch):
+    # Бэкенды (и накопленные ими задержки для дублирующих запросов) не переходят между тестами
+    monkeypatch.setattr(openai_api, "_backends", {})
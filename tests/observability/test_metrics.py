@@ -0,0 +1,77 @@
+import pytest
+
+from src.observability.metrics import Counter, Histogram, Registry, render_gauge_values, timed
+
+
+def render(*metrics):
+    registry = Registry()
+    for metric in metrics:
+        registry.register(metric)
+    return registry.render()
+
+
+def test_counter_exposition():
+    requests = Counter("requests", "Запросы", ("endpoint",))
+    requests.labels("GET /vacancies").inc()
+    requests.labels("GET /vacancies").inc(2)
+
+    text = render(requests)
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="GET /vacancies"} 3' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    lines = render(latency).splitlines()
+
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 3.65" in lines
+    assert "latency_seconds_count 4" in lines
+
+
+def test_timed_records_failures_too():
+    latency = Histogram("call_seconds", "Вызов")
+
+    @timed(latency)
+    def failing():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        failing()
+    assert "call_seconds_count 1" in render(latency)
+
+
+def test_label_values_are_escaped_and_checked():
+    errors = Counter("errors", "Ошибки", ("component",))
+    errors.labels('huntflow "api"').inc()
+
+    assert 'errors_total{component="huntflow \\"api\\""} 1' in render(errors)
+    with pytest.raises(ValueError):
+        errors.labels("a", "b")
+
+
+def test_registry_returns_existing_metric():
+    registry = Registry()
+    first = registry.register(Counter("jobs", "Задачи"))
+
+    assert registry.register(Counter("jobs", "Задачи")) is first
+    with pytest.raises(ValueError):
+        registry.register(Histogram("jobs", "Задачи"))
+
+
+def test_stats_are_exported_as_gauges():
+    text = render_gauge_values("app_stat", "Статистика", {
+        "job_queue": {"depth": 3, "oldest": None, "workers": {"busy": 2}, "healthy": True, "mode": "realtime"},
+    })
+
+    assert 'app_stat{provider="job_queue",key="depth"} 3' in text
+    assert 'app_stat{provider="job_queue",key="workers.busy"} 2' in text
+    assert 'app_stat{provider="job_queue",key="healthy"} 1' in text
+    assert "oldest" not in text
+    assert "mode" not in text
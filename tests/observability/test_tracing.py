@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.api_clients import huntflow_api, openai_api
+from src.api_clients.llm_backends import FakeBackend
+from src.observability.tracing import (InMemoryExporter, JsonLinesExporter, add_exporter, bind_context,
+                                       critical_path, current_trace_id, get_trace_context, remove_exporter,
+                                       start_span, start_trace, traced)
+from src.service.job_worker import JobWorkerPool
+from src.service.pipeline import Pipeline
+
+
+@pytest.fixture
+def exporter():
+    exporter = add_exporter(InMemoryExporter())
+    yield exporter
+    remove_exporter(exporter)
+
+
+def by_name(spans):
+    return {span.name: span for span in spans}
+
+
+def test_nested_spans_share_trace(exporter):
+    @traced()
+    def inner():
+        return current_trace_id()
+
+    with start_trace("webhook", event="APPLICANT") as root:
+        with start_span("child"):
+            trace_id = inner()
+
+    spans = by_name(exporter.spans)
+    assert trace_id == root.trace_id
+    assert spans["child"].parent_id == root.span_id
+    assert spans["inner"].parent_id == spans["child"].span_id
+    assert spans["webhook"].attributes == {"event": "APPLICANT"}
+    assert spans["webhook"].duration >= spans["child"].duration
+
+
+def test_start_trace_opens_new_root(exporter):
+    with start_trace("outer") as outer:
+        with start_trace("inner") as inner:
+            pass
+
+    assert inner.parent_id is None
+    assert inner.trace_id != outer.trace_id
+
+
+def test_span_records_error(exporter):
+    with pytest.raises(ValueError):
+        with start_span("failing"):
+            raise ValueError("boom")
+
+    assert exporter.spans[0].error == "ValueError: boom"
+
+
+def test_bind_context_propagates_to_threads(exporter):
+    def work():
+        with start_span("worker"):
+            pass
+
+    with start_trace("root") as root:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(bind_context(work)).result()
+        thread = threading.Thread(target=bind_context(work))
+        thread.start()
+        thread.join()
+
+    workers = [span for span in exporter.spans if span.name == "worker"]
+    assert len(workers) == 2
+    assert all(span.trace_id == root.trace_id and span.parent_id == root.span_id for span in workers)
+
+
+def test_pipeline_stages_are_children_of_caller(exporter):
+    with start_trace("root") as root:
+        Pipeline("evaluation").add_stage("resume", lambda: 1).add_stage("vacancy", lambda: 2).run()
+
+    spans = by_name(exporter.spans)
+    for stage in ("resume", "vacancy"):
+        assert spans[stage].trace_id == root.trace_id
+        assert spans[stage].parent_id == root.span_id
+        assert spans[stage].attributes == {"pipeline": "evaluation"}
+
+
+@pytest.mark.asyncio
+async def test_job_continues_trace_across_queue(exporter, memory_job_queue):
+    with start_trace("webhook") as root:
+        memory_job_queue.enqueue({"applicant_id": 1, "trace": get_trace_context()})
+
+    seen = []
+    pool = JobWorkerPool(memory_job_queue, lambda payload: seen.append(current_trace_id()), workers=1,
+                         poll_interval=0.01)
+    await pool.start()
+    deadline = time.perf_counter() + 2
+    while not seen and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    await pool.stop()
+
+    job = by_name(exporter.spans)["job"]
+    assert seen == [root.trace_id]
+    assert job.trace_id == root.trace_id
+    assert job.parent_id == root.span_id
+
+
+def test_huntflow_and_llm_calls_join_trace(monkeypatch, exporter):
+    class DummyResponse:
+        status_code = 200
+        headers = {}
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(huntflow_api.session, "request", lambda method, url, **kwargs: DummyResponse())
+    openai_api.set_backend(openai_api.TIER_PRIMARY, FakeBackend())
+
+    with start_trace("webhook") as root:
+        huntflow_api.send_request("GET", "https://api.huntflow.ru/v2/accounts/1/vacancies/2")
+        openai_api.ask_gpt("system", "user")
+
+    spans = by_name(exporter.spans)
+    assert spans["huntflow"].parent_id == root.span_id
+    assert spans["huntflow"].attributes["status_code"] == 200
+    assert spans["llm"].parent_id == root.span_id
+    assert spans["llm.attempt"].trace_id == root.trace_id
+    assert spans["llm.attempt"].attributes["backend"] == "fake"
+
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = add_exporter(JsonLinesExporter(str(path)))
+    try:
+        with start_trace("root"):
+            with start_span("child", applicant_id=7):
+                pass
+    finally:
+        remove_exporter(exporter)
+
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [span["name"] for span in spans] == ["child", "root"]
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
+    assert spans[0]["attributes"] == {"applicant_id": 7}
+
+
+def test_critical_path_follows_latest_child(exporter):
+    with start_trace("root"):
+        with start_span("fast"):
+            pass
+        with start_span("slow"):
+            with start_span("llm"):
+                time.sleep(0.01)
+
+    path = critical_path(exporter.spans)
+
+    assert [span.name for span in path] == ["root", "slow", "llm"]
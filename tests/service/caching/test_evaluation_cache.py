@@ -0,0 +1,110 @@
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.service.caching import evaluation_cache as evaluation_cache_module
+from src.service.caching.evaluation_cache import EvaluationCache, make_evaluation_key
+from src.service.stats import collect_stats
+
+ANSWER = CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Хороший кандидат")
+
+
+def test_make_evaluation_key_depends_on_all_parts():
+    key = make_evaluation_key("resume", "vacancy", "1", "gpt-4o")
+    assert key == make_evaluation_key("resume", "vacancy", "1", "gpt-4o")
+    assert key != make_evaluation_key("resume2", "vacancy", "1", "gpt-4o")
+    assert key != make_evaluation_key("resume", "vacancy2", "1", "gpt-4o")
+    assert key != make_evaluation_key("resume", "vacancy", "2", "gpt-4o")
+    assert key != make_evaluation_key("resume", "vacancy", "1", "gpt-4o-mini")
+    # Границы частей не должны смешиваться
+    assert make_evaluation_key("ab", "c", "1", "m") != make_evaluation_key("a", "bc", "1", "m")
+
+
+def test_cache_get_and_set():
+    cache = EvaluationCache(":memory:")
+    assert cache.get("key") is None
+    cache.set("key", ANSWER)
+    assert cache.get("key") == ANSWER
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["size"] == 1
+
+
+def test_cache_entry_expires(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(evaluation_cache_module.time, "time", lambda: now["value"])
+    cache = EvaluationCache(":memory:", ttl=60)
+    cache.set("key", ANSWER)
+
+    now["value"] += 61
+    assert cache.get("key") is None
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(evaluation_cache_module.time, "time", lambda: now["value"])
+    cache = EvaluationCache(":memory:", max_entries=2)
+
+    cache.set("a", ANSWER)
+    now["value"] += 1
+    cache.set("b", ANSWER)
+    now["value"] += 1
+    cache.get("a")
+    now["value"] += 1
+    cache.set("c", ANSWER)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ANSWER
+    assert cache.get("c") == ANSWER
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_cache_persists_between_instances(tmp_path):
+    path = str(tmp_path / "evaluations.sqlite3")
+    cache = EvaluationCache(path)
+    cache.set("key", ANSWER)
+    cache.close()
+
+    reopened = EvaluationCache(path)
+    assert reopened.get("key") == ANSWER
+    reopened.close()
+
+
+def test_stats_registered():
+    assert "hit_rate" in collect_stats()["evaluation_cache"]
+
+
+def test_expired_entries_are_evicted_periodically(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(evaluation_cache_module.time, "time", lambda: now["value"])
+    cache = EvaluationCache(":memory:", ttl=60, evict_interval=3)
+
+    cache.set("old", ANSWER)
+    now["value"] += 61
+    cache.set("new", ANSWER)
+    assert cache.get_stats()["size"] == 2
+
+    cache.set("new", ANSWER)
+    stats = cache.get_stats()
+    assert stats["size"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_overwriting_key_does_not_evict():
+    cache = EvaluationCache(":memory:", max_entries=2)
+
+    cache.set("a", ANSWER)
+    cache.set("b", ANSWER)
+    cache.set("b", ANSWER)
+
+    assert cache.get("a") == ANSWER
+    assert cache.get_stats()["evictions"] == 0
+
+
+def test_created_at_is_indexed():
+    cache = EvaluationCache(":memory:")
+    plan = cache._conn.execute(
+        "EXPLAIN QUERY PLAN DELETE FROM evaluations WHERE created_at < ?", (0,)
+    ).fetchall()
+    assert any("evaluations_created_at" in row[-1] for row in plan)
@@ -0,0 +1,96 @@
+from src.service.caching import status_cache as status_cache_module
+from src.service.caching.status_cache import StatusCache
+from src.service.stats import collect_stats
+
+STATUSES = [
+    {"id": 1, "name": "Отклики"},
+    {"id": 2, "name": "Новые"},
+    {"id": 3, "name": "Резерв"},
+]
+
+
+class CountingLoader:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.results[min(self.calls, len(self.results)) - 1]
+
+
+def test_status_cache_hit_uses_single_load():
+    loader = CountingLoader(STATUSES)
+    cache = StatusCache(loader, ttl=60)
+
+    assert cache.get_id_by_name("новые") == 2
+    assert cache.get_ids_by_names(["Резерв", "ОТКЛИКИ"]) == {"Резерв": 3, "ОТКЛИКИ": 1}
+    assert loader.calls == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 0
+    assert stats["size"] == 3
+
+
+def test_status_cache_expires_after_ttl(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(status_cache_module.time, "monotonic", lambda: now["value"])
+    loader = CountingLoader(STATUSES)
+    cache = StatusCache(loader, ttl=60)
+
+    cache.get_id_by_name("новые")
+    now["value"] += 59
+    cache.get_id_by_name("новые")
+    assert loader.calls == 1
+
+    now["value"] += 2
+    cache.get_id_by_name("новые")
+    assert loader.calls == 2
+
+
+def test_status_cache_miss_reloads_list(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(status_cache_module.time, "monotonic", lambda: now["value"])
+    renamed = STATUSES + [{"id": 4, "name": "Приоритет"}]
+    loader = CountingLoader(STATUSES, renamed)
+    cache = StatusCache(loader, ttl=3600, miss_reload_interval=30)
+
+    cache.get_statuses()
+    now["value"] += 31
+    assert cache.get_id_by_name("приоритет") == 4
+    assert loader.calls == 2
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_status_cache_miss_reload_is_rate_limited():
+    loader = CountingLoader(STATUSES)
+    cache = StatusCache(loader, ttl=3600, miss_reload_interval=30)
+
+    assert cache.get_id_by_name("неизвестный") is None
+    assert cache.get_id_by_name("неизвестный") is None
+    assert loader.calls == 1
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_status_cache_does_not_store_empty_list():
+    loader = CountingLoader([], STATUSES)
+    cache = StatusCache(loader, ttl=3600)
+
+    assert cache.get_statuses() == []
+    assert cache.get_statuses() == STATUSES
+    assert loader.calls == 2
+
+
+def test_status_cache_invalidate():
+    loader = CountingLoader(STATUSES)
+    cache = StatusCache(loader, ttl=3600)
+
+    cache.get_statuses()
+    cache.invalidate()
+    cache.get_statuses()
+    assert loader.calls == 2
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_status_cache_stats_registered():
+    assert "status_cache" in collect_stats()
@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+from src.service.caching import vacancy_cache as vacancy_cache_module
+from src.service.caching.vacancy_cache import VacancyCache
+
+
+class CountingLoader:
+    def __init__(self, revision="2024-01-01T00:00:00", delay=0.0):
+        self.revision = revision
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, vacancy_id):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"id": vacancy_id, "position": f"Вакансия {vacancy_id}", "updated": self.revision}
+
+
+class CountingFormatter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, vacancy):
+        self.calls += 1
+        return f"{vacancy['position']} ({vacancy['updated']})"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(vacancy_cache_module.time, "monotonic", lambda: now["value"])
+    return now
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_vacancy_cache_hit_skips_loader_and_formatter():
+    loader, formatter = CountingLoader(), CountingFormatter()
+    cache = VacancyCache(loader, formatter)
+
+    first = cache.get(1)
+    second = cache.get(1)
+
+    assert first == second == "Вакансия 1 (2024-01-01T00:00:00)"
+    assert loader.calls == 1
+    assert formatter.calls == 1
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+
+def test_vacancy_cache_keeps_money_field():
+    cache = VacancyCache(
+        lambda vacancy_id: {"id": vacancy_id, "position": "Python developer", "updated": "1", "money": "до 150 тыс. руб."},
+        CountingFormatter(),
+    )
+
+    vacancy = cache.get_vacancy(1)
+
+    assert vacancy.text == "Python developer (1)"
+    assert vacancy.money == "до 150 тыс. руб."
+    assert cache.get_vacancy(1) == vacancy
+
+
+def test_vacancy_cache_lru_eviction():
+    loader, formatter = CountingLoader(), CountingFormatter()
+    cache = VacancyCache(loader, formatter, max_size=2)
+
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+
+    stats = cache.get_stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    cache.get(1)
+    assert loader.calls == 3
+    cache.get(2)
+    assert loader.calls == 4
+
+
+def test_vacancy_cache_stale_entry_refreshed_in_background(clock):
+    loader, formatter = CountingLoader(), CountingFormatter()
+    cache = VacancyCache(loader, formatter, refresh_interval=60, max_age=3600)
+
+    cache.get(1)
+    clock["value"] += 120
+    loader.revision = "2024-02-01T00:00:00"
+
+    # Устаревшая запись отдаётся сразу, обновление идёт в фоне
+    assert cache.get(1) == "Вакансия 1 (2024-01-01T00:00:00)"
+    assert wait_for(lambda: formatter.calls == 2)
+    assert cache.get(1) == "Вакансия 1 (2024-02-01T00:00:00)"
+    assert cache.get_stats()["stale_hits"] == 1
+
+
+def test_vacancy_cache_same_revision_not_reformatted(clock):
+    loader, formatter = CountingLoader(), CountingFormatter()
+    cache = VacancyCache(loader, formatter, refresh_interval=60, max_age=3600)
+
+    cache.get(1)
+    clock["value"] += 120
+    cache.get(1)
+
+    assert wait_for(lambda: loader.calls == 2)
+    time.sleep(0.05)
+    assert formatter.calls == 1
+
+
+def test_vacancy_cache_expired_entry_loaded_synchronously(clock):
+    loader, formatter = CountingLoader(), CountingFormatter()
+    cache = VacancyCache(loader, formatter, refresh_interval=60, max_age=600)
+
+    cache.get(1)
+    clock["value"] += 601
+    loader.revision = "2024-02-01T00:00:00"
+
+    assert cache.get(1) == "Вакансия 1 (2024-02-01T00:00:00)"
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_vacancy_cache_concurrent_misses_share_single_load():
+    loader, formatter = CountingLoader(delay=0.1), CountingFormatter()
+    cache = VacancyCache(loader, formatter)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get(1))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 5
+    assert loader.calls == 1
+
+
+def test_vacancy_cache_load_error_not_cached():
+    calls = {"count": 0}
+
+    def failing_loader(vacancy_id):
+        calls["count"] += 1
+        return []
+
+    cache = VacancyCache(failing_loader, CountingFormatter())
+    with pytest.raises(ValueError):
+        cache.get(1)
+    with pytest.raises(ValueError):
+        cache.get(1)
+    assert calls["count"] == 2
+    assert cache.get_stats()["load_errors"] == 2
@@ -26,3 +26,54 @@ def test_clean_html_with_attributes():
     raw_html = '<a href="http://example.com" title="Example">Example Link</a>'
     expected = "Example Link"
     assert clean_html(raw_html) == expected
+
+
+def test_clean_html_decodes_entities():
+    raw_html = "<p>ООО&nbsp;&laquo;Ромашка&raquo; &mdash; офис в&nbsp;Перми &lt;b&gt; &#171;x&#xBB;</p>"
+    expected = "ООО «Ромашка» — офис в Перми <b> «x»"
+    assert clean_html(raw_html) == expected
+
+
+def test_clean_html_keeps_paragraphs_and_line_breaks():
+    raw_html = "<p>Первый абзац.</p>\n<p>Второй<br>строка<br/><br />после пустой</p>"
+    expected = "Первый абзац.\n\nВторой\nстрока\n\nпосле пустой"
+    assert clean_html(raw_html) == expected
+
+
+def test_clean_html_renders_list_items_as_bullets():
+    raw_html = "<p>Требования:</p>\n<ul>\n  <li>Python;</li>\n  <li> SQL </li>\n</ul>\n<p>Плюсом</p>"
+    expected = "Требования:\n\n- Python;\n- SQL\n\nПлюсом"
+    assert clean_html(raw_html) == expected
+
+
+def test_clean_html_collapses_whitespace():
+    raw_html = "<p>  много\n   пробелов\tи&nbsp; переносов </p>\n\n\n<p>Hello, <b> world</b></p>"
+    expected = "много пробелов и переносов\n\nHello, world"
+    assert clean_html(raw_html) == expected
+
+
+def test_clean_html_handles_tags_spanning_lines():
+    raw_html = '<a\n  href="http://example.com"\n  title="Example">Example</a> Link'
+    assert clean_html(raw_html) == "Example Link"
+
+
+def test_clean_html_drops_script_style_and_comments():
+    raw_html = (
+        "<style>p { color: red; }</style><p>Текст<script>if (a<b) { x = '</p>'; }</script> вакансии</p>"
+        "<!-- комментарий с > внутри --><SCRIPT>незакрытый"
+    )
+    assert clean_html(raw_html) == "Текст вакансии"
+
+
+def test_clean_html_keeps_angle_brackets_in_text():
+    assert clean_html("a < b и c > d") == "a < b и c > d"
+
+
+def test_clean_html_separates_table_cells():
+    raw_html = "<table><tr><td>Оклад</td><td>150000</td></tr><tr><td>Премия</td><td>20%</td></tr></table>"
+    assert clean_html(raw_html) == "Оклад 150000\nПремия 20%"
+
+
+def test_clean_html_keeps_list_items_around_hidden_content():
+    raw_html = "<ul><li>Python</li><!-- --><li>SQL</li>\n<script>x = '<li>'</script><li>Docker</li></ul>"
+    assert clean_html(raw_html) == "- Python\n- SQL\n- Docker"
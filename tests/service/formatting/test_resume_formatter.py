@@ -1,6 +1,14 @@
 import pytest
 
-from src.service.formatting.resume_formatter import format_date, format_education, format_experience, format_resume
+from src.service.formatting import token_budget
+from src.service.formatting.resume_formatter import (
+    format_date,
+    format_education,
+    format_experience,
+    format_resume,
+    rank_experience,
+)
+from src.service.formatting.token_budget import count_tokens
 
 
 # Тесты для format_date
@@ -135,3 +143,53 @@ def test_format_resume():
 def test_format_resume_none():
     # Если входные данные отсутствуют, функция должна вернуть пустую строку
     assert format_resume(None) == ""
+
+
+def make_experience(year, company, description):
+    return {
+        "date_from": {"year": year, "precision": "year"},
+        "date_to": {"year": year + 1, "precision": "year"},
+        "company": company,
+        "position": "Developer",
+        "description": description,
+    }
+
+
+def test_format_resume_fits_token_budget_trimming_oldest_first():
+    long_description = "Разрабатывал внутренние сервисы компании и поддерживал legacy код. " * 40
+    unified = {
+        "position": "Python developer",
+        "skill_set": ["Python"],
+        "experience": [
+            make_experience(2022, "Newest", long_description),
+            make_experience(2012, "Oldest", long_description),
+            make_experience(2017, "Middle", long_description),
+        ],
+    }
+    full = format_resume(unified, token_budget=0)
+    budget = count_tokens(full) // 2
+
+    result = format_resume(unified, token_budget=budget)
+    assert count_tokens(result) <= budget
+    # Все места работы остаются в резюме, урезаются описания — начиная со старых
+    assert all(company in result for company in ("Newest", "Middle", "Oldest"))
+    assert result.count(long_description.strip()) == 1
+    assert result.index("Newest") < result.index(long_description.strip()) < result.index("Oldest")
+
+
+def test_rank_experience_prefers_relevant_entries():
+    exp_list = [
+        make_experience(2020, "Recent", "Вёрстка лендингов"),
+        make_experience(2015, "Relevant", "Python Django PostgreSQL"),
+    ]
+    assert rank_experience(exp_list) == [1, 0]
+    assert rank_experience(exp_list, relevance_terms={"python", "django", "postgresql"}) == [0, 1]
+
+
+def test_format_resume_records_budget_metrics():
+    token_budget.reset_stats()
+    unified = {"experience": [make_experience(2020, "A", "Описание. " * 500)]}
+    format_resume(unified, token_budget=100)
+    stats = token_budget.get_stats()["resume"]
+    assert stats["trimmed"] == 1
+    assert stats["tokens_after"] <= 100 < stats["tokens_before"]
@@ -0,0 +1,31 @@
+from src.service.formatting import token_budget
+from src.service.formatting.token_budget import count_tokens, extract_terms, record_budget, truncate_to_tokens
+
+
+def test_count_tokens_grows_with_text():
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("Python разработчик") < count_tokens("Python разработчик " * 10)
+
+
+def test_truncate_to_tokens_keeps_short_text():
+    assert truncate_to_tokens("Короткий текст.", 100) == "Короткий текст."
+
+
+def test_truncate_to_tokens_cuts_on_sentence_boundary():
+    text = "Первое предложение про Python. Второе предложение про Django. " * 20
+    truncated = truncate_to_tokens(text, 30)
+    assert count_tokens(truncated) <= 32
+    assert truncated.endswith(". …")
+    assert text.startswith(truncated[:-len(token_budget.TRUNCATION_MARK)])
+
+
+def test_extract_terms():
+    assert extract_terms("Опыт с Python, SQL и C# от 3 лет") == {"опыт", "python", "sql", "лет"}
+
+
+def test_record_budget_stats():
+    token_budget.reset_stats()
+    record_budget("resume", 100, 100)
+    record_budget("resume", 500, 300)
+    stats = token_budget.get_stats()["resume"]
+    assert stats == {"count": 2, "trimmed": 1, "tokens_before": 600, "tokens_after": 400}
@@ -1,3 +1,4 @@
+from src.service.formatting.token_budget import count_tokens
 from src.service.formatting.vacancy_formatter import format_vacancy
 
 
@@ -31,7 +32,7 @@ def test_format_vacancy_with_html():
         "Описание вакансии:\n"
         "Develop and maintain applications.\n\n"
         "Требования:\n"
-        "PythonFlask\n\n"
+        "- Python\n- Flask\n\n"
         "Условия работы:\n"
         "Full-time, Remote\n"
     )
@@ -56,3 +57,20 @@ def test_format_vacancy_missing_fields():
     )
     result = format_vacancy(vacancy)
     assert result == expected
+
+
+def test_format_vacancy_fits_token_budget_keeping_requirements():
+    requirements = "<p>Python, Django, PostgreSQL, Docker.</p>"
+    vacancy = {
+        "position": "Python developer",
+        "body": "<p>" + "Мы растущая компания с дружной командой. " * 100 + "</p>",
+        "requirements": requirements,
+        "conditions": "<p>" + "Удалёнка, ДМС, гибкий график. " * 100 + "</p>",
+    }
+    result = format_vacancy(vacancy, token_budget=200)
+
+    assert count_tokens(result) <= 200
+    assert "Python, Django, PostgreSQL, Docker." in result
+    assert "Мы растущая компания" in result
+    assert result == format_vacancy(vacancy, token_budget=200)
+    assert len(format_vacancy(vacancy, token_budget=0)) > len(result)
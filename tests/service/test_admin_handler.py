@@ -0,0 +1,39 @@
+import json
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from src.service import admin_handler
+
+
+class DummyRequest:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+@pytest.mark.asyncio
+async def test_invalidate_statuses_disabled_without_admin_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    response: JSONResponse = await admin_handler.handle_invalidate_statuses(DummyRequest({}))
+    assert response.status_code == 403
+    assert "ADMIN_TOKEN не задан" in json.loads(response.body)["error"]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_statuses_invalid_token(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "admin_secret")
+    response: JSONResponse = await admin_handler.handle_invalidate_statuses(DummyRequest({"X-Admin-Token": "wrong"}))
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_invalidate_statuses_success(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "admin_secret")
+    calls = {"count": 0}
+    monkeypatch.setattr(admin_handler.status_cache, "invalidate", lambda: calls.update(count=calls["count"] + 1))
+
+    response: JSONResponse = await admin_handler.handle_invalidate_statuses(
+        DummyRequest({"X-Admin-Token": "admin_secret"})
+    )
+    assert response.status_code == 200
+    assert calls["count"] == 1
@@ -1,8 +1,23 @@
-from src.service.ai_evaluation import evaluate_candidate, get_formatted_vacancy
+import time
+
+import pytest
+
+from src.api_clients.llm_backends import FakeBackend
+from src.api_clients.llm_resilience import CircuitBreaker, ResilientBackend
+from src.api_clients import openai_api
+from src.api_clients.openai_api import TIER_PRIMARY
+from src.service.ai_evaluation import evaluate_candidate, get_formatted_vacancy, vacancy_cache
 from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
 from src.model.target_stage import TargetStage
 
 
+@pytest.fixture(autouse=True)
+def clear_vacancy_cache():
+    vacancy_cache.clear()
+    yield
+    vacancy_cache.clear()
+
+
 # Фиктивные реализации для зависимостей
 
 # 1. Сценарий: кандидат без резюме (external пустой)
@@ -57,7 +72,7 @@ def dummy_get_vacancy_desc(vacancy_id: int):
 
 
 # Фиктивная реализация ask_gpt, возвращающая заранее заданный результат
-def dummy_ask_gpt(system_prompt: str, user_prompt: str):
+def dummy_ask_gpt(system_prompt: str, user_prompt: str, priority: int = 0):
     return CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Хороший кандидат")
 
 
@@ -66,13 +81,14 @@ def dummy_get_vacancy_desc_exception(vacancy_id: int):
     raise Exception("get_vacancy_desc не должен вызываться")
 
 
-def dummy_ask_gpt_exception(system_prompt: str, user_prompt: str):
+def dummy_ask_gpt_exception(system_prompt: str, user_prompt: str, priority: int = 0):
     raise Exception("ask_gpt не должен вызываться")
 
 
 # Тест: Кандидат без резюме
 def test_evaluate_candidate_no_resume(monkeypatch):
     monkeypatch.setattr("src.service.ai_evaluation.get_applicant", dummy_get_applicant_no_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", dummy_get_vacancy_desc)
     result = evaluate_candidate(1, 1)
     assert result.comment == "Нет резюме"
     assert result.target_stage == TargetStage.RESERVE
@@ -110,3 +126,144 @@ def test_get_formatted_vacancy(monkeypatch):
     # Проверяем, что отформатированное описание вакансии содержит основные элементы
     assert "Вакансия:" in formatted
     assert "Ограничения по зп:" in formatted
+
+
+# Тест: вакансия запрашивается параллельно с цепочкой кандидат → резюме
+def test_evaluate_candidate_fetches_vacancy_concurrently(monkeypatch):
+    delay = 0.2
+
+    def slow_get_applicant(applicant_id: int):
+        time.sleep(delay)
+        return dummy_get_applicant_with_resume(applicant_id)
+
+    def slow_get_resume(applicant_id: int, resume_id: str):
+        time.sleep(delay)
+        return dummy_get_resume_ready(applicant_id, resume_id)
+
+    def slow_get_vacancy_desc(vacancy_id: int):
+        time.sleep(delay * 2)
+        return dummy_get_vacancy_desc(vacancy_id)
+
+    monkeypatch.setattr("src.service.ai_evaluation.get_applicant", slow_get_applicant)
+    monkeypatch.setattr("src.service.ai_evaluation.get_resume", slow_get_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", slow_get_vacancy_desc)
+    monkeypatch.setattr("src.service.ai_evaluation.ask_gpt", dummy_ask_gpt)
+
+    started = time.perf_counter()
+    result = evaluate_candidate(1, 4343)
+    elapsed = time.perf_counter() - started
+
+    assert result.target_stage == TargetStage.NEW
+    assert elapsed < delay * 3
+
+
+# Тест: кандидат, отсеянный по резюме, не ждёт ответа по вакансии
+def test_rejected_candidate_does_not_wait_for_vacancy(monkeypatch):
+    delay = 0.3
+
+    def slow_get_vacancy_desc(vacancy_id: int):
+        time.sleep(delay)
+        return dummy_get_vacancy_desc(vacancy_id)
+
+    monkeypatch.setattr("src.service.ai_evaluation.get_applicant", dummy_get_applicant_with_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_resume", dummy_get_resume_not_ready)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", slow_get_vacancy_desc)
+    monkeypatch.setattr("src.service.ai_evaluation.ask_gpt", dummy_ask_gpt_exception)
+
+    started = time.perf_counter()
+    result = evaluate_candidate(1, 4344)
+
+    assert result.comment == "Не готов к переезду в Пермь"
+    assert time.perf_counter() - started < delay
+
+
+# Тест: вакансия запрашивается один раз — правила отбора и промпт используют одно описание
+def test_evaluate_candidate_loads_vacancy_once(monkeypatch):
+    calls = {"count": 0}
+
+    def counting_get_vacancy_desc(vacancy_id: int):
+        calls["count"] += 1
+        return dummy_get_vacancy_desc(vacancy_id)
+
+    monkeypatch.setattr("src.service.ai_evaluation.get_applicant", dummy_get_applicant_with_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_resume", dummy_get_resume_ready)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", counting_get_vacancy_desc)
+    monkeypatch.setattr("src.service.ai_evaluation.ask_gpt", dummy_ask_gpt)
+
+    result = evaluate_candidate(1, 4242)
+
+    assert result.target_stage == TargetStage.NEW
+    assert calls["count"] == 1
+
+
+# Тест: повторное получение вакансии берётся из кэша
+def test_get_formatted_vacancy_cached(monkeypatch):
+    calls = {"count": 0}
+
+    def counting_get_vacancy_desc(vacancy_id: int):
+        calls["count"] += 1
+        return dummy_get_vacancy_desc(vacancy_id)
+
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", counting_get_vacancy_desc)
+    first = get_formatted_vacancy(123)
+    second = get_formatted_vacancy(123)
+    assert first == second
+    assert calls["count"] == 1
+
+
+# Тест: повторная оценка того же резюме на ту же вакансию берётся из кэша, rescore его обходит
+def test_evaluate_candidate_uses_evaluation_cache(monkeypatch, memory_evaluation_cache):
+    calls = {"count": 0}
+
+    def counting_ask_gpt(system_prompt: str, user_prompt: str, priority: int = 0):
+        calls["count"] += 1
+        return dummy_ask_gpt(system_prompt, user_prompt)
+
+    monkeypatch.setattr("src.service.ai_evaluation.get_applicant", dummy_get_applicant_with_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_resume", dummy_get_resume_ready)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", dummy_get_vacancy_desc)
+    monkeypatch.setattr("src.service.ai_evaluation.ask_gpt", counting_ask_gpt)
+
+    first = evaluate_candidate(1, 2)
+    second = evaluate_candidate(1, 2)
+    assert first == second
+    assert calls["count"] == 1
+
+    evaluate_candidate(1, 2, rescore=True)
+    assert calls["count"] == 2
+    stats = memory_evaluation_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["bypasses"] == 1
+
+
+# Тест: ответ резервной модели при разомкнутой цепи не кэшируется под ключом основной
+def test_fallback_answer_is_not_cached(monkeypatch, memory_evaluation_cache):
+    primary = ResilientBackend(
+        FakeBackend("primary", "gpt-4o"),
+        fallback=lambda: FakeBackend("fallback", "gpt-4o-mini"),
+        hedge=False,
+        breaker=CircuitBreaker(min_calls=1, reset_timeout=60),
+    )
+    primary.breaker.record(False)
+    monkeypatch.setitem(openai_api._backends, TIER_PRIMARY, primary)
+    monkeypatch.setattr("src.service.ai_evaluation.get_applicant", dummy_get_applicant_with_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_resume", dummy_get_resume_ready)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", dummy_get_vacancy_desc)
+    monkeypatch.setattr("src.service.ai_evaluation.screen_with_model", lambda *args, **kwargs: None)
+
+    answer = evaluate_candidate(1, 2)
+
+    assert answer.answered_by == "gpt-4o-mini"
+    assert memory_evaluation_cache.get_stats()["stores"] == 0
+
+
+# Тест: отказ предварительной модели не кэшируется под ключом основной
+def test_prescreen_answer_is_not_cached(monkeypatch, memory_evaluation_cache):
+    rejection = CandidateEvaluationAnswer(target_stage=TargetStage.RESERVE, comment="Нет нужных навыков")
+    monkeypatch.setattr("src.service.ai_evaluation.get_applicant", dummy_get_applicant_with_resume)
+    monkeypatch.setattr("src.service.ai_evaluation.get_resume", dummy_get_resume_ready)
+    monkeypatch.setattr("src.service.ai_evaluation.get_vacancy_desc", dummy_get_vacancy_desc)
+    monkeypatch.setattr("src.service.ai_evaluation.screen_with_model", lambda *args, **kwargs: rejection)
+
+    assert evaluate_candidate(1, 2) == rejection
+    assert memory_evaluation_cache.get_stats()["stores"] == 0
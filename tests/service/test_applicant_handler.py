@@ -8,11 +8,11 @@ from src.model.target_stage import TargetStage
 from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
 
 # Фиктивные реализации зависимостей для успешного сценария
-def dummy_evaluate_candidate(candidate_id, vacancy_id):
+def dummy_evaluate_candidate(candidate_id, vacancy_id, rescore=False, priority=0):
     return CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Test comment")
 
-def dummy_get_status_id_by_name(status_name):
-    return 1
+def dummy_get_status_ids_by_names(status_names):
+    return {status_name: 1 for status_name in status_names}
 
 def dummy_update_candidate_status(candidate_id, target_status_id, vacancy_id, comment):
     return {"dummy": True}
@@ -86,12 +86,7 @@ async def test_handle_applicant_missing_vacancy_id():
     assert "ID вакансии не найден" in result["error"]
 
 @pytest.mark.asyncio
-async def test_handle_applicant_success(monkeypatch):
-    # Подменяем зависимости
-    monkeypatch.setattr(applicant_handler, "evaluate_candidate", dummy_evaluate_candidate)
-    monkeypatch.setattr(applicant_handler, "get_status_id_by_name", dummy_get_status_id_by_name)
-    monkeypatch.setattr(applicant_handler, "update_applicant_status", dummy_update_candidate_status)
-
+async def test_handle_applicant_success(memory_job_queue):
     data = {
         "event": {
             "applicant_log": {
@@ -103,9 +98,13 @@ async def test_handle_applicant_success(monkeypatch):
         }
     }
     response: JSONResponse = await applicant_handler.handle_applicant(data)
-    assert response.status_code == 200
+    assert response.status_code == 202
     result = json.loads(response.body)
-    assert result.get("success") == "Данные обработаны"
+    assert result.get("success") == "Задача поставлена в очередь"
+
+    job = memory_job_queue.claim()
+    assert job.id == result["job_id"]
+    assert job.payload == {"applicant_id": 456, "vacancy_id": 123, "mode": "realtime"}
 
 @pytest.mark.asyncio
 async def test_handle_applicant_missing_event():
@@ -114,3 +113,120 @@ async def test_handle_applicant_missing_event():
     assert response.status_code == 400
     result = json.loads(response.body)
     assert "Обработка только для 'STATUS'" in result["error"]
+
+def test_process_applicant_success(monkeypatch):
+    updates = []
+    monkeypatch.setattr(applicant_handler, "evaluate_candidate", dummy_evaluate_candidate)
+    monkeypatch.setattr(applicant_handler, "get_status_ids_by_names", dummy_get_status_ids_by_names)
+    monkeypatch.setattr(applicant_handler, "update_applicant_status",
+                        lambda *args: updates.append(args) or {"dummy": True})
+
+    answer = applicant_handler.process_applicant(456, 123)
+    assert answer.target_stage == TargetStage.NEW
+    assert updates == [(456, 1, 123, "Оценка от ИИ: \n\n Test comment")]
+
+
+def test_process_applicant_update_failure_raises(monkeypatch):
+    monkeypatch.setattr(applicant_handler, "evaluate_candidate", dummy_evaluate_candidate)
+    monkeypatch.setattr(applicant_handler, "get_status_ids_by_names", dummy_get_status_ids_by_names)
+    monkeypatch.setattr(applicant_handler, "update_applicant_status", lambda *args: None)
+
+    with pytest.raises(RuntimeError):
+        applicant_handler.process_applicant(456, 123)
+
+
+def test_process_applicant_unknown_stage_raises(monkeypatch):
+    monkeypatch.setattr(applicant_handler, "evaluate_candidate", dummy_evaluate_candidate)
+    monkeypatch.setattr(applicant_handler, "get_status_ids_by_names",
+                        lambda status_names: {status_name: None for status_name in status_names})
+    monkeypatch.setattr(applicant_handler, "update_applicant_status", dummy_update_candidate_status)
+
+    with pytest.raises(RuntimeError):
+        applicant_handler.process_applicant(456, 123)
+
+
+
+def test_process_applicant_streaming_moves_before_comment(monkeypatch):
+    events = []
+
+    def dummy_evaluate_streaming(applicant_id, vacancy_id, on_decision, rescore=False, priority=0):
+        on_decision(TargetStage.NEW)
+        events.append("decision")
+        return CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Test comment")
+
+    monkeypatch.setattr(applicant_handler, "evaluate_candidate_streaming", dummy_evaluate_streaming)
+    monkeypatch.setattr(applicant_handler, "get_status_ids_by_names", dummy_get_status_ids_by_names)
+    monkeypatch.setattr(applicant_handler, "update_applicant_status",
+                        lambda *args: events.append(("status", args[1])) or {"dummy": True})
+    monkeypatch.setattr(applicant_handler, "add_comment",
+                        lambda *args: events.append(("comment", args[3])) or {"dummy": True})
+
+    applicant_handler.process_applicant_streaming(456, 123)
+
+    assert events == [("status", 1), "decision", ("comment", "Оценка от ИИ: \n\n Test comment")]
+
+
+def test_process_applicant_streaming_without_early_decision(monkeypatch):
+    # Ответ из кэша или фильтра: решение и комментарий известны сразу
+    updates = []
+    monkeypatch.setattr(applicant_handler, "evaluate_candidate_streaming",
+                        lambda applicant_id, vacancy_id, on_decision, rescore=False, priority=0:
+                        dummy_evaluate_candidate(applicant_id, vacancy_id))
+    monkeypatch.setattr(applicant_handler, "get_status_ids_by_names", dummy_get_status_ids_by_names)
+    monkeypatch.setattr(applicant_handler, "update_applicant_status",
+                        lambda *args: updates.append(args) or {"dummy": True})
+    monkeypatch.setattr(applicant_handler, "add_comment", lambda *args: pytest.fail("Комментарий не нужен"))
+
+    applicant_handler.process_applicant_streaming(456, 123)
+
+    assert updates == [(456, 1, 123, "Оценка от ИИ: \n\n Test comment")]
+
+def make_status_event(applicant_id, vacancy_id, applicant_log_id):
+    return {
+        "event": {
+            "applicant_log": {
+                "id": applicant_log_id,
+                "type": "STATUS",
+                "status": {"name": "Отклики"},
+                "vacancy": {"id": vacancy_id}
+            },
+            "applicant": {"id": applicant_id}
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_handle_applicant_redelivery_is_deduplicated(memory_job_queue):
+    first = await applicant_handler.handle_applicant(make_status_event(456, 123, 1))
+    second = await applicant_handler.handle_applicant(make_status_event(456, 123, 1))
+
+    assert json.loads(second.body)["job_id"] == json.loads(first.body)["job_id"]
+    assert "Повторный вебхук" in json.loads(second.body)["success"]
+    assert memory_job_queue.get_stats()["enqueued"] == 1
+
+
+@pytest.mark.asyncio
+async def test_handle_applicant_collapses_onto_pending_job(memory_job_queue):
+    first = await applicant_handler.handle_applicant(make_status_event(456, 123, 1))
+    # Рекрутер вернул кандидата на этап ещё раз, пока первая оценка не выполнена
+    second = await applicant_handler.handle_applicant(make_status_event(456, 123, 2))
+
+    assert json.loads(second.body)["job_id"] == json.loads(first.body)["job_id"]
+    assert memory_job_queue.get_stats()["enqueued"] == 1
+
+
+@pytest.mark.asyncio
+async def test_handle_applicant_new_event_after_completion_is_enqueued(memory_job_queue):
+    first = await applicant_handler.handle_applicant(make_status_event(456, 123, 1))
+    memory_job_queue.complete(memory_job_queue.claim().id)
+    second = await applicant_handler.handle_applicant(make_status_event(456, 123, 2))
+
+    assert json.loads(second.body)["job_id"] != json.loads(first.body)["job_id"]
+    assert memory_job_queue.get_stats()["enqueued"] == 2
+
+
+@pytest.mark.asyncio
+async def test_handle_applicant_other_vacancy_not_deduplicated(memory_job_queue):
+    await applicant_handler.handle_applicant(make_status_event(456, 123, 1))
+    await applicant_handler.handle_applicant(make_status_event(456, 124, 2))
+    assert memory_job_queue.get_stats()["enqueued"] == 2
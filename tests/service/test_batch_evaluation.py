@@ -0,0 +1,116 @@
+import pytest
+
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.service import batch_evaluation
+from src.service.ai_evaluation import EvaluationRequest
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    applied = []
+    monkeypatch.setattr(batch_evaluation, "apply_evaluation",
+                        lambda applicant_id, vacancy_id, answer: applied.append((applicant_id, vacancy_id, answer)))
+    return applied
+
+
+def dummy_prepare_evaluation(applicant_id, vacancy_id, rescore=False):
+    return EvaluationRequest(applicant_id, vacancy_id, system_prompt="system",
+                             user_prompt=f"user {applicant_id}", cache_key=f"key-{applicant_id}")
+
+
+def test_add_applies_answer_without_model(monkeypatch, applied, memory_batch_evaluator):
+    answer = CandidateEvaluationAnswer(target_stage=TargetStage.RESERVE, comment="Нет резюме")
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation",
+                        lambda a, v, rescore=False: EvaluationRequest(a, v, answer=answer))
+
+    assert memory_batch_evaluator.add(1, 10) == answer
+    assert applied == [(1, 10, answer)]
+    assert memory_batch_evaluator.get_stats()["pending"] == 0
+
+
+def test_batch_round_trip(monkeypatch, applied, openai_stub, memory_batch_evaluator, memory_evaluation_cache):
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+
+    assert memory_batch_evaluator.add(1, 10) is None
+    assert memory_batch_evaluator.add(2, 10) is None
+    assert memory_batch_evaluator.get_stats()["pending"] == 2
+
+    assert memory_batch_evaluator.run_once() == 2
+    assert sorted((a, v) for a, v, _ in applied) == [(1, 10), (2, 10)]
+    assert memory_batch_evaluator.get_stats() == {"pending": 0, "submitted": 0, "done": 2, "failed": 0}
+    # Результаты batch попадают в кэш оценок
+    assert memory_evaluation_cache.get("key-1").target_stage == TargetStage.RESERVE
+
+
+def test_in_progress_batch_is_polled_later(monkeypatch, applied, openai_stub, memory_batch_evaluator):
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+    openai_stub.batch_status = "in_progress"
+
+    memory_batch_evaluator.add(1, 10)
+    assert memory_batch_evaluator.run_once() == 0
+    assert memory_batch_evaluator.get_stats()["submitted"] == 1
+
+    openai_stub.batch_status = "completed"
+    assert memory_batch_evaluator.poll() == 1
+    assert len(applied) == 1
+
+
+def test_expired_batch_requeues_items(monkeypatch, applied, openai_stub, memory_batch_evaluator):
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+    openai_stub.batch_status = "expired"
+
+    memory_batch_evaluator.add(1, 10)
+    assert memory_batch_evaluator.run_once() == 0
+    assert memory_batch_evaluator.get_stats()["pending"] == 1
+
+    openai_stub.batch_status = "completed"
+    assert memory_batch_evaluator.run_once() == 1
+    assert len(openai_stub.batches) == 2
+
+
+def test_apply_error_marks_item_failed(monkeypatch, openai_stub, memory_batch_evaluator):
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+
+    def failing_apply(*args):
+        raise RuntimeError("Huntflow недоступен")
+
+    monkeypatch.setattr(batch_evaluation, "apply_evaluation", failing_apply)
+    memory_batch_evaluator.add(1, 10)
+    assert memory_batch_evaluator.run_once() == 0
+    assert memory_batch_evaluator.get_stats()["failed"] == 1
+
+
+def test_expired_batch_gives_up_after_max_attempts(monkeypatch, applied, openai_stub):
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+    openai_stub.batch_status = "expired"
+    evaluator = batch_evaluation.BatchEvaluator(":memory:", max_attempts=2)
+
+    evaluator.add(1, 10)
+    assert evaluator.run_once() == 0
+    assert evaluator.get_stats()["pending"] == 1
+    assert evaluator.run_once() == 0
+    assert evaluator.get_stats() == {"pending": 0, "submitted": 0, "done": 0, "failed": 1}
+
+    # Неудавшийся запрос больше не отправляется
+    assert evaluator.run_once() == 0
+    assert len(openai_stub.batches) == 2
+    error = evaluator._conn.execute("SELECT error FROM batch_items").fetchone()[0]
+    assert "expired" in error
+    evaluator.close()
+
+
+def test_error_file_marks_items_failed(monkeypatch, applied, openai_stub, memory_batch_evaluator):
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+    openai_stub.batch_error = lambda custom_id: "Invalid request" if custom_id.startswith("2-") else None
+
+    memory_batch_evaluator.add(1, 10)
+    memory_batch_evaluator.add(2, 10)
+
+    assert memory_batch_evaluator.run_once() == 1
+    assert [a for a, _, _ in applied] == [1]
+    assert memory_batch_evaluator.get_stats() == {"pending": 0, "submitted": 0, "done": 1, "failed": 1}
+    error = memory_batch_evaluator._conn.execute(
+        "SELECT error FROM batch_items WHERE applicant_id = 2").fetchone()[0]
+    assert "Invalid request" in error
+
@@ -0,0 +1,82 @@
+import pytest
+
+from src.service import dedup_store as dedup_store_module
+from src.service.dedup_store import DedupStore
+from src.service.stats import collect_stats
+
+
+def test_remember_returns_existing_value_for_duplicate():
+    store = DedupStore(window=60)
+    assert store.remember("key", 1) is None
+    assert store.remember("key", 2) == 1
+    assert store.get("key") == 1
+    stats = store.get_stats()
+    assert stats["accepted"] == 1
+    assert stats["duplicates"] == 1
+
+
+def test_key_expires_after_window(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(dedup_store_module.time, "time", lambda: now["value"])
+    store = DedupStore(window=60)
+
+    store.remember("key", 1)
+    now["value"] += 61
+    assert store.get("key") is None
+    assert store.remember("key", 2) is None
+    assert store.get("key") == 2
+
+
+def test_store_is_bounded():
+    store = DedupStore(window=60, max_size=2)
+    store.remember("a", 1)
+    store.remember("b", 2)
+    store.remember("c", 3)
+
+    assert store.get("a") is None
+    assert store.get("c") == 3
+    assert store.get_stats()["evictions"] == 1
+
+
+def test_remember_rejects_none():
+    with pytest.raises(ValueError):
+        DedupStore().remember("key", None)
+
+
+def test_forget():
+    store = DedupStore(window=60)
+    store.remember("key", 1)
+    store.forget("key")
+    assert store.get("key") is None
+
+
+def test_sqlite_persistence_survives_restart(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    store = DedupStore(window=60, path=path)
+    store.remember("key", 42)
+    store.remember("other", "job")
+    store.close()
+
+    restored = DedupStore(window=60, path=path)
+    assert restored.get("key") == 42
+    assert restored.remember("other", "new") == "job"
+    assert restored.get_stats()["persistent"] is True
+    restored.close()
+
+
+def test_sqlite_persistence_skips_expired_keys(tmp_path, monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(dedup_store_module.time, "time", lambda: now["value"])
+    path = str(tmp_path / "dedup.sqlite3")
+    store = DedupStore(window=60, path=path)
+    store.remember("key", 42)
+    store.close()
+
+    now["value"] += 61
+    restored = DedupStore(window=60, path=path)
+    assert restored.get("key") is None
+    restored.close()
+
+
+def test_stats_registered():
+    assert "duplicates" in collect_stats()["dedup"]
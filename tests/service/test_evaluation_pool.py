@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.service import evaluation_pool
+from src.service.stats import collect_stats
+
+
+@pytest.mark.asyncio
+async def test_run_in_pool_returns_result():
+    result = await evaluation_pool.run_in_pool(lambda a, b: a + b, 2, 3)
+    assert result == 5
+
+
+@pytest.mark.asyncio
+async def test_run_in_pool_does_not_block_event_loop():
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return "done"
+
+    task = asyncio.create_task(evaluation_pool.run_in_pool(slow))
+    # Пока выполняется блокирующая функция, event loop продолжает обслуживать другие корутины
+    await asyncio.sleep(0.05)
+    assert started.is_set()
+    assert not task.done()
+    assert evaluation_pool.get_stats()["in_flight"] == 1
+    assert await task == "done"
+    assert evaluation_pool.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_in_pool_counts_failures():
+    def failing():
+        raise RuntimeError("boom")
+
+    failed_before = evaluation_pool.get_stats()["failed"]
+    with pytest.raises(RuntimeError):
+        await evaluation_pool.run_in_pool(failing)
+    assert evaluation_pool.get_stats()["failed"] == failed_before + 1
+
+
+def test_stats_registered():
+    stats = collect_stats()
+    assert "evaluations" in stats
+    assert stats["evaluations"]["concurrency"] == evaluation_pool.EVALUATION_CONCURRENCY
@@ -0,0 +1,50 @@
+import os
+from datetime import date
+
+from src.api_clients import openai_api
+from src.service import evaluation_prompt
+from src.service.evaluation_prompt import build_evaluation_prompt, build_group_evaluation_prompt, get_prompt_cache_stats
+
+
+def test_prompt_prefix_is_stable_across_days_and_candidates():
+    first = build_evaluation_prompt("Python developer", "Резюме 1", today=date(2024, 1, 1))
+    second = build_evaluation_prompt("Python developer", "Резюме 2", today=date(2024, 1, 2))
+
+    assert first.system_prompt == second.system_prompt == evaluation_prompt.EVALUATION_INSTRUCTIONS
+    assert "2024" not in first.system_prompt
+    common_prefix = os.path.commonprefix([first.user_prompt, second.user_prompt])
+    assert "Python developer" in common_prefix
+
+
+def test_prompt_orders_vacancy_candidate_date():
+    prompt = build_evaluation_prompt("Описание", "Резюме", today=date(2024, 5, 6))
+    vacancy = prompt.user_prompt.index("Описание")
+    resume = prompt.user_prompt.index("Резюме кандидата")
+    assert vacancy < resume < prompt.user_prompt.index("2024-05-06")
+    assert prompt.user_prompt.endswith("Дата оценки: 2024-05-06")
+
+
+def test_group_prompt_lists_candidates_once_per_vacancy():
+    prompt = build_group_evaluation_prompt("Python developer", {1: "Резюме 1", 2: "Резюме 2"}, today=date(2024, 1, 1))
+
+    assert prompt.system_prompt.startswith(evaluation_prompt.EVALUATION_INSTRUCTIONS)
+    assert prompt.user_prompt.count("Python developer") == 1
+    assert prompt.user_prompt.index("Кандидат ID 1:\nРезюме 1") < prompt.user_prompt.index("Кандидат ID 2:\nРезюме 2")
+    assert prompt.user_prompt.endswith("Дата оценки: 2024-01-01")
+
+
+def test_prompt_cache_stats(monkeypatch):
+    monkeypatch.setattr(openai_api, "_usage", dict.fromkeys(openai_api._usage, 0))
+    assert get_prompt_cache_stats()["cached_ratio"] is None
+
+    class Usage:
+        prompt_tokens = 2000
+        completion_tokens = 20
+        total_tokens = 2020
+        prompt_tokens_details = {"cached_tokens": 1536}
+
+    openai_api.record_usage(Usage())
+    stats = get_prompt_cache_stats()
+    assert stats["cached_tokens"] == 1536
+    assert stats["cached_ratio"] == 0.768
+    assert stats["prompt_version"] == evaluation_prompt.PROMPT_VERSION
@@ -0,0 +1,176 @@
+import threading
+
+import pytest
+
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.group_evaluation_answer import ApplicantEvaluationAnswer, GroupEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.service import group_evaluation
+from src.service.ai_evaluation import EvaluationRequest
+from src.service.group_evaluation import GroupEvaluator
+
+VACANCY = "Вакансия: Python developer\n" + "Требования: Python, FastAPI. " * 50
+
+
+def dummy_prepare_evaluation(applicant_id, vacancy_id, rescore=False):
+    resume = f"Резюме кандидата {applicant_id}"
+    return EvaluationRequest(
+        applicant_id,
+        vacancy_id,
+        system_prompt="Инструкции " * 100,
+        user_prompt=f"{VACANCY}\n{resume}",
+        cache_key=f"key-{applicant_id}",
+        resume=resume,
+        vacancy_description=VACANCY,
+    )
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"group": [], "single": []}
+
+    def dummy_ask_gpt(system_prompt, user_prompt, priority=0, model=None):
+        calls["single"].append(user_prompt)
+        return CandidateEvaluationAnswer(target_stage=TargetStage.RESERVE, comment="По одному")
+
+    monkeypatch.setattr(group_evaluation, "prepare_evaluation", dummy_prepare_evaluation)
+    monkeypatch.setattr(group_evaluation, "ask_gpt", dummy_ask_gpt)
+    return calls
+
+
+def evaluate_concurrently(evaluator, applicant_ids, vacancy_id=7):
+    results = {}
+
+    def run(applicant_id):
+        results[applicant_id] = evaluator.evaluate(applicant_id, vacancy_id)
+
+    threads = [threading.Thread(target=run, args=(applicant_id,)) for applicant_id in applicant_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def group_answer(*applicant_ids):
+    return GroupEvaluationAnswer(evaluations=[
+        ApplicantEvaluationAnswer(applicant_id=applicant_id, target_stage=TargetStage.NEW, comment=f"Кандидат {applicant_id}")
+        for applicant_id in applicant_ids
+    ])
+
+
+def test_group_is_sent_in_one_request(monkeypatch, calls, memory_evaluation_cache):
+    def dummy_ask_gpt_group(system_prompt, user_prompt, group_size, priority=0):
+        calls["group"].append(user_prompt)
+        return group_answer(1, 2, 3)
+
+    monkeypatch.setattr(group_evaluation, "ask_gpt_group", dummy_ask_gpt_group)
+    evaluator = GroupEvaluator(window=5, max_size=3)
+
+    results = evaluate_concurrently(evaluator, [1, 2, 3])
+
+    assert len(calls["group"]) == 1
+    assert calls["group"][0].count(VACANCY) == 1
+    assert calls["single"] == []
+    assert {applicant_id: answer.comment for applicant_id, answer in results.items()} == {
+        1: "Кандидат 1", 2: "Кандидат 2", 3: "Кандидат 3",
+    }
+    assert memory_evaluation_cache.get("key-2").comment == "Кандидат 2"
+
+    stats = evaluator.get_stats()
+    assert stats["groups"] == 1
+    assert stats["grouped_candidates"] == 3
+    assert stats["tokens_saved_per_candidate"] > 0
+
+
+def test_window_flushes_partial_group(monkeypatch, calls):
+    monkeypatch.setattr(group_evaluation, "ask_gpt_group",
+                        lambda system_prompt, user_prompt, group_size, priority=0: group_answer(1, 2))
+    evaluator = GroupEvaluator(window=0.05, max_size=5)
+
+    results = evaluate_concurrently(evaluator, [1, 2])
+
+    assert results[1].target_stage == TargetStage.NEW
+    assert evaluator.get_stats()["waiting"] == 0
+
+
+def test_single_candidate_uses_regular_call(calls):
+    evaluator = GroupEvaluator(window=0.01, max_size=5)
+
+    assert evaluator.evaluate(1, 7).comment == "По одному"
+    assert len(calls["single"]) == 1
+    assert evaluator.get_stats()["groups"] == 0
+
+
+def test_missing_answers_fall_back_to_single_calls(monkeypatch, calls):
+    # Модель вернула оценку только для одного кандидата и ещё одну — для постороннего
+    monkeypatch.setattr(group_evaluation, "ask_gpt_group",
+                        lambda system_prompt, user_prompt, group_size, priority=0: group_answer(1, 99))
+    evaluator = GroupEvaluator(window=5, max_size=2)
+
+    results = evaluate_concurrently(evaluator, [1, 2])
+
+    assert results[1].comment == "Кандидат 1"
+    assert results[2].comment == "По одному"
+    stats = evaluator.get_stats()
+    assert stats["fallback_candidates"] == 1
+    assert stats["single_calls"] == 1
+
+
+def test_invalid_group_response_falls_back(monkeypatch, calls):
+    def invalid_response(system_prompt, user_prompt, group_size, priority=0):
+        GroupEvaluationAnswer.model_validate({"evaluations": [{"applicant_id": "не число"}]})
+
+    monkeypatch.setattr(group_evaluation, "ask_gpt_group", invalid_response)
+    evaluator = GroupEvaluator(window=5, max_size=2)
+
+    results = evaluate_concurrently(evaluator, [1, 2])
+
+    assert [results[1].comment, results[2].comment] == ["По одному", "По одному"]
+    assert evaluator.get_stats()["fallbacks"] == 1
+
+
+def test_group_error_is_raised_to_every_caller(monkeypatch, calls):
+    def failing(system_prompt, user_prompt, group_size, priority=0):
+        raise ConnectionError("OpenAI недоступен")
+
+    monkeypatch.setattr(group_evaluation, "ask_gpt_group", failing)
+    evaluator = GroupEvaluator(window=5, max_size=2)
+    errors = []
+
+    def run(applicant_id):
+        with pytest.raises(ConnectionError):
+            evaluator.evaluate(applicant_id, 7)
+        errors.append(applicant_id)
+
+    threads = [threading.Thread(target=run, args=(applicant_id,)) for applicant_id in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert sorted(errors) == [1, 2]
+
+
+def test_max_size_above_concurrency_is_rejected():
+    with pytest.raises(ValueError):
+        GroupEvaluator(max_size=9, concurrency=8)
+
+
+def test_default_max_size_fits_concurrency():
+    assert group_evaluation.GROUP_EVALUATION_MAX_SIZE <= group_evaluation.GROUP_EVALUATION_CONCURRENCY
+    assert GroupEvaluator().max_size == group_evaluation.GROUP_EVALUATION_MAX_SIZE
+
+
+def test_prescreened_candidate_is_not_grouped(monkeypatch, calls):
+    rejected = CandidateEvaluationAnswer(target_stage=TargetStage.RESERVE, comment="Предварительная оценка: нет опыта")
+    monkeypatch.setattr(group_evaluation, "screen_with_model",
+                        lambda system_prompt, user_prompt, priority: rejected if "кандидата 1" in user_prompt else None)
+    monkeypatch.setattr(group_evaluation, "ask_gpt_group", lambda *args, **kwargs: pytest.fail("Группа из одного"))
+    evaluator = GroupEvaluator(window=0.05, max_size=2)
+
+    results = evaluate_concurrently(evaluator, [1, 2])
+
+    assert results[1] == rejected
+    assert results[2].comment == "По одному"
+    assert len(calls["single"]) == 1
+    assert evaluator.get_stats()["groups"] == 0
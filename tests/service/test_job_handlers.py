@@ -0,0 +1,46 @@
+import pytest
+
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.service import job_handlers
+
+
+def test_process_job_realtime_by_default(monkeypatch):
+    calls = []
+    monkeypatch.setattr(job_handlers, "process_applicant",
+                        lambda applicant_id, vacancy_id, rescore=False, priority=0:
+                        calls.append((applicant_id, vacancy_id, rescore, priority)))
+
+    job_handlers.process_job({"applicant_id": 1, "vacancy_id": 2})
+    job_handlers.process_job({"applicant_id": 1, "vacancy_id": 2, "mode": "realtime", "rescore": True, "priority": 10})
+    assert calls == [(1, 2, False, 0), (1, 2, True, 10)]
+
+
+def test_process_job_batch_mode(monkeypatch, memory_batch_evaluator):
+    calls = []
+    monkeypatch.setattr(memory_batch_evaluator, "add",
+                        lambda applicant_id, vacancy_id, rescore=False: calls.append((applicant_id, vacancy_id)))
+
+    job_handlers.process_job({"applicant_id": 1, "vacancy_id": 2, "mode": "batch"})
+    assert calls == [(1, 2)]
+
+
+def test_process_job_unknown_mode():
+    with pytest.raises(ValueError):
+        job_handlers.process_job({"applicant_id": 1, "vacancy_id": 2, "mode": "offline"})
+
+
+def test_process_job_group_mode(monkeypatch):
+    answer = CandidateEvaluationAnswer(target_stage=TargetStage.NEW, comment="Подходит")
+    applied = []
+
+    class DummyGroupEvaluator:
+        def evaluate(self, applicant_id, vacancy_id, rescore=False, priority=0):
+            return answer
+
+    monkeypatch.setattr(job_handlers, "get_group_evaluator", lambda: DummyGroupEvaluator())
+    monkeypatch.setattr(job_handlers, "apply_evaluation",
+                        lambda applicant_id, vacancy_id, result: applied.append((applicant_id, vacancy_id, result)))
+
+    assert job_handlers.process_job({"applicant_id": 1, "vacancy_id": 2, "mode": "group"}) == answer
+    assert applied == [(1, 2, answer)]
@@ -0,0 +1,115 @@
+import pytest
+
+from src.service import job_queue as job_queue_module
+from src.service.job_queue import JobQueue
+from src.service.stats import collect_stats
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=3, retry_backoff=10, retry_backoff_max=60)
+    yield queue
+    queue.close()
+
+
+def test_enqueue_and_claim(queue):
+    job_id = queue.enqueue({"applicant_id": 1, "vacancy_id": 2})
+    job = queue.claim()
+    assert job.id == job_id
+    assert job.payload == {"applicant_id": 1, "vacancy_id": 2}
+    assert job.attempts == 1
+    # Задача уже в работе и повторно не выдаётся
+    assert queue.claim() is None
+
+
+def test_jobs_claimed_in_fifo_order(queue):
+    first = queue.enqueue({"n": 1})
+    second = queue.enqueue({"n": 2})
+    assert queue.claim().id == first
+    assert queue.claim().id == second
+
+
+def test_complete_removes_job(queue):
+    queue.enqueue({"n": 1})
+    job = queue.claim()
+    queue.complete(job.id)
+    stats = queue.get_stats()
+    assert stats["depth"] == 0
+    assert stats["completed"] == 1
+
+
+def test_fail_schedules_retry_with_backoff(queue, monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(job_queue_module.time, "time", lambda: now["value"])
+    queue.enqueue({"n": 1})
+    job = queue.claim()
+    queue.fail(job.id, "boom")
+
+    assert queue.claim() is None
+    now["value"] += 13
+    retried = queue.claim()
+    assert retried.id == job.id
+    assert retried.attempts == 2
+    assert queue.get_stats()["retried"] == 1
+
+
+def test_fail_moves_job_to_dead_letters(queue, monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(job_queue_module.time, "time", lambda: now["value"])
+    queue.enqueue({"n": 1})
+    for _ in range(3):
+        job = queue.claim()
+        queue.fail(job.id, "boom")
+        now["value"] += 1000
+
+    assert queue.claim() is None
+    dead_letters = queue.get_dead_letters()
+    assert len(dead_letters) == 1
+    assert dead_letters[0]["payload"] == {"n": 1}
+    assert dead_letters[0]["attempts"] == 3
+    assert dead_letters[0]["last_error"] == "boom"
+    stats = queue.get_stats()
+    assert stats["dead_letters"] == 1
+    assert stats["depth"] == 0
+
+
+def test_stale_running_job_is_reclaimed(queue, monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(job_queue_module.time, "time", lambda: now["value"])
+    queue.enqueue({"n": 1})
+    job = queue.claim()
+
+    now["value"] += queue.visibility_timeout + 1
+    reclaimed = queue.claim()
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+
+
+def test_queue_survives_reopen(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path)
+    job_id = queue.enqueue({"n": 1})
+    queue.close()
+
+    reopened = JobQueue(path)
+    assert reopened.claim().id == job_id
+    reopened.close()
+
+
+def test_stats_report_depth_and_age(queue, monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(job_queue_module.time, "time", lambda: now["value"])
+    queue.enqueue({"n": 1})
+    queue.enqueue({"n": 2})
+    queue.claim()
+    now["value"] += 30
+
+    stats = queue.get_stats()
+    assert stats["depth"] == 2
+    assert stats["pending"] == 1
+    assert stats["running"] == 1
+    assert stats["oldest_job_age"] == 30
+
+
+def test_stats_registered():
+    assert "depth" in collect_stats()["job_queue"]
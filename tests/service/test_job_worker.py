@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from src.service.job_queue import JobQueue
+from src.service.job_worker import JobWorkerPool
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_processes_jobs_concurrently(memory_job_queue):
+    delay = 0.3
+    jobs_count = 5
+    processed = []
+
+    def slow_handler(payload):
+        time.sleep(delay)
+        processed.append(payload["n"])
+
+    for n in range(jobs_count):
+        memory_job_queue.enqueue({"n": n})
+
+    pool = JobWorkerPool(memory_job_queue, slow_handler, workers=jobs_count, poll_interval=0.01)
+    started = time.perf_counter()
+    await pool.start()
+    assert await wait_for(lambda: memory_job_queue.get_stats()["completed"] == jobs_count)
+    elapsed = time.perf_counter() - started
+    await pool.stop()
+
+    assert sorted(processed) == list(range(jobs_count))
+    # N одновременных задач обрабатываются примерно за время одной
+    assert elapsed < delay * 2
+    assert memory_job_queue.get_stats()["depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_retries_failed_job():
+    queue = JobQueue(":memory:", max_attempts=2, retry_backoff=0.01, retry_backoff_max=0.01)
+    attempts = {"count": 0}
+
+    def flaky_handler(payload):
+        attempts["count"] += 1
+        if attempts["count"] == 1:
+            raise RuntimeError("temporary error")
+
+    queue.enqueue({"n": 1})
+    pool = JobWorkerPool(queue, flaky_handler, workers=1, poll_interval=0.01)
+    await pool.start()
+    assert await wait_for(lambda: queue.get_stats()["completed"] == 1)
+    await pool.stop()
+
+    stats = queue.get_stats()
+    assert stats["retried"] == 1
+    assert stats["dead_letters"] == 0
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_dead_letters_after_max_attempts():
+    queue = JobQueue(":memory:", max_attempts=2, retry_backoff=0.01, retry_backoff_max=0.01)
+
+    def failing_handler(payload):
+        raise RuntimeError("permanent error")
+
+    queue.enqueue({"n": 1})
+    pool = JobWorkerPool(queue, failing_handler, workers=1, poll_interval=0.01)
+    await pool.start()
+    assert await wait_for(lambda: queue.get_stats()["dead_letters"] == 1)
+    await pool.stop()
+
+    assert "permanent error" in queue.get_dead_letters()[0]["last_error"]
+    queue.close()
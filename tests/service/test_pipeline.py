@@ -0,0 +1,97 @@
+import logging
+import time
+
+import pytest
+
+from src.service.pipeline import Pipeline
+
+
+def test_pipeline_passes_dependency_results():
+    stages = (
+        Pipeline("test")
+        .add_stage("a", lambda: 2)
+        .add_stage("b", lambda x: x * 10, 3)
+        .add_stage("c", lambda a, b: a + b, depends_on=("a", "b"))
+        .run()
+    )
+    assert stages["a"] == 2
+    assert stages["b"] == 30
+    assert stages["c"] == 32
+
+
+def test_pipeline_runs_independent_stages_concurrently():
+    delay = 0.2
+
+    def slow(value):
+        time.sleep(delay)
+        return value
+
+    started = time.perf_counter()
+    stages = (
+        Pipeline("test")
+        .add_stage("first", slow, 1)
+        .add_stage("second", slow, 2)
+        .add_stage("third", slow, 3)
+        .run()
+    )
+    elapsed = time.perf_counter() - started
+
+    assert [stages["first"], stages["second"], stages["third"]] == [1, 2, 3]
+    assert elapsed < delay * 2
+    assert set(stages.timings) == {"first", "second", "third"}
+
+
+def test_pipeline_error_raised_on_access_and_propagated_to_dependents():
+    def failing():
+        raise RuntimeError("boom")
+
+    stages = (
+        Pipeline("test")
+        .add_stage("failing", failing)
+        .add_stage("dependent", lambda value: value, depends_on=("failing",))
+        .add_stage("independent", lambda: "ok")
+        .run()
+    )
+    assert stages["independent"] == "ok"
+    with pytest.raises(RuntimeError):
+        stages["failing"]
+    with pytest.raises(RuntimeError):
+        stages["dependent"]
+
+
+def test_pipeline_unknown_dependency():
+    with pytest.raises(ValueError):
+        Pipeline("test").add_stage("a", lambda value: value, depends_on=("missing",))
+
+
+def test_pipeline_logs_timings(caplog):
+    with caplog.at_level(logging.INFO):
+        Pipeline("logged").add_stage("a", lambda: None).run()
+    assert "Пайплайн 'logged' выполнен" in caplog.text
+    assert "a=" in caplog.text
+
+
+def test_pipeline_does_not_wait_for_background_stage():
+    delay = 0.2
+
+    def slow():
+        time.sleep(delay)
+        return "vacancy"
+
+    started = time.perf_counter()
+    stages = (
+        Pipeline("test")
+        .add_stage("slow", slow, background=True)
+        .add_stage("fast", lambda: 1)
+        .run()
+    )
+
+    assert stages["fast"] == 1
+    assert time.perf_counter() - started < delay
+    assert stages["slow"] == "vacancy"
+    assert time.perf_counter() - started >= delay
+
+
+def test_pipeline_background_stage_cannot_have_dependencies():
+    with pytest.raises(ValueError):
+        Pipeline("test").add_stage("a", lambda: 1).add_stage("b", lambda a: a, depends_on=("a",), background=True)
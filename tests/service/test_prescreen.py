@@ -0,0 +1,193 @@
+from datetime import date
+from typing import Optional
+
+import pytest
+
+from src.api_clients import openai_api
+from src.api_clients.llm_backends import FakeBackend
+from src.api_clients.openai_api import TIER_PRESCREEN
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+from src.service.caching.vacancy_cache import CachedVacancy
+from src.service.prescreen import (
+    PrescreenContext,
+    Prescreener,
+    experience_rule,
+    parse_salary_range,
+    prescreener,
+    relocation_rule,
+    resume_experience_months,
+    salary_rule,
+    screen_with_model,
+    skills_rule,
+)
+
+VACANCY_TEXT = (
+    "Вакансия: Python developer\n"
+    "Ограничения по зп: 100 000 - 150 000 RUB\n"
+    "Описание вакансии:\nРазработка сервисов на Python и FastAPI\n\n"
+    "Требования:\nОпыт коммерческой разработки от 3 лет\n\n"
+    "Условия работы:\nОфис\n"
+)
+
+
+VACANCY_MONEY = "100 000 - 150 000 RUB"
+
+
+def make_context(resume: dict, vacancy_text: str = VACANCY_TEXT, money: Optional[str] = VACANCY_MONEY) -> PrescreenContext:
+    return PrescreenContext(1, 2, resume, lambda: CachedVacancy(vacancy_text, money))
+
+
+def test_relocation_rule_does_not_load_vacancy():
+    def failing_loader():
+        raise AssertionError("Вакансия не должна запрашиваться")
+
+    context = PrescreenContext(1, 2, {
+        "area": {"city": {"name": "Москва"}},
+        "relocation": {"type": {"name": "Не готов к переезду"}},
+    }, failing_loader)
+
+    answer = Prescreener([("relocation", relocation_rule), ("skills", skills_rule)]).screen(context)
+
+    assert answer.target_stage == TargetStage.RESERVE
+    assert answer.comment == "Не готов к переезду в Пермь"
+
+
+def test_salary_rule():
+    assert salary_rule(make_context({"wanted_salary": {"amount": 200000, "currency": "RUB"}})) is None
+
+    answer = salary_rule(make_context({"wanted_salary": {"amount": 300000, "currency": "RUB"}}))
+    assert answer.target_stage == TargetStage.RESERVE
+
+    # Вилка не указана или в другой валюте — правило не срабатывает
+    assert salary_rule(make_context({"wanted_salary": {"amount": 300000}}, money=None)) is None
+    assert salary_rule(make_context({"wanted_salary": {"amount": 300000, "currency": "USD"}})) is None
+
+
+def test_salary_rule_reads_money_field_not_vacancy_text():
+    # Строка о зарплате в тексте описания не считается вилкой, если поле money не заполнено
+    vacancy = VACANCY_TEXT + "Ограничения по зп: до 100 000 RUB\n"
+
+    assert salary_rule(make_context({"wanted_salary": {"amount": 300000, "currency": "RUB"}}, vacancy, None)) is None
+
+
+@pytest.mark.parametrize("money, expected", [
+    ("до 150 тыс. руб.", [150000]),
+    ("150k RUB", [150000]),
+    ("200к", [200000]),
+    ("1,5 млн", [1500000]),
+    ("от 1.5 до 2 млн руб.", [1500000, 2000000]),
+    ("100-150 тыс.", [100000, 150000]),
+    ("от 150 тысяч", [150000]),
+    ("от 120 000 до 180 000 RUB", [120000, 180000]),
+    ("150,000 USD", [150000]),
+    # Единицы не распознаны — такую вилку не с чем сравнивать
+    ("до 150", []),
+])
+def test_parse_salary_range(money, expected):
+    assert parse_salary_range(money) == expected
+
+
+@pytest.mark.parametrize("money", ["до 150 тыс. руб.", "150k RUB", "1,5 млн", "до 150"])
+def test_salary_rule_reads_common_formats(money):
+    assert salary_rule(make_context({"wanted_salary": {"amount": 200000, "currency": "RUB"}}, money=money)) is None
+
+
+def test_salary_rule_rejects_with_thousands_multiplier():
+    answer = salary_rule(make_context({"wanted_salary": {"amount": 400000, "currency": "RUB"}}, money="до 150 тыс. руб."))
+
+    assert answer.target_stage == TargetStage.RESERVE
+
+
+def test_skills_rule():
+    assert skills_rule(make_context({"skill_set": ["Java", "Spring"]})) is None
+    assert skills_rule(make_context({"skill_set": ["Java", "Spring", "python"]})) is None
+
+    answer = skills_rule(make_context({"skill_set": ["Java", "Spring", "Kotlin"]}))
+    assert answer.target_stage == TargetStage.RESERVE
+
+
+def test_skills_rule_matches_whole_words():
+    vacancy = "Вакансия: Backend developer\nОпыт с PostgreSQL и C++, хороший English (good level), работа в Google"
+    # Короткие навыки не находятся внутри чужих слов
+    assert skills_rule(make_context({"skill_set": ["Go", "C", "R"]}, vacancy)).target_stage == TargetStage.RESERVE
+    # Разное написание одного навыка
+    assert skills_rule(make_context({"skill_set": ["Postgres", "Java", "Kotlin"]}, vacancy)) is None
+    assert skills_rule(make_context({"skill_set": ["c++", "Java", "Kotlin"]}, vacancy)) is None
+
+
+def test_experience_rule():
+    junior = {"total_experience": {"months": 12}}
+    assert experience_rule(make_context(junior)).target_stage == TargetStage.RESERVE
+    assert experience_rule(make_context({"total_experience": {"months": 24}})) is None
+    # Требования к стажу не указаны
+    assert experience_rule(make_context(junior, "Вакансия: Python developer")) is None
+
+
+def test_resume_experience_months_from_dates():
+    resume = {"experience": [
+        {"date_from": {"year": 2020, "month": 1}, "date_to": {"year": 2020, "month": 12}},
+        {"date_from": {"year": 2024, "month": 1}, "date_to": {}},
+    ]}
+    assert resume_experience_months(resume, today=date(2024, 6, 1)) == 18
+
+
+def test_prescreener_stats():
+    screener = Prescreener([("relocation", relocation_rule)])
+    screener.screen(make_context({"relocation": {"type": {"name": "cannot move"}}}))
+    screener.screen(make_context({}))
+
+    assert screener.get_stats() == {"screened": 2, "escalated": 1, "model_errors": 0, "rules": {"relocation": 1}}
+
+
+@pytest.fixture
+def prescreen_backend(monkeypatch):
+    def set_prescreen_backend(backend):
+        monkeypatch.setitem(openai_api._backends, TIER_PRESCREEN, backend)
+        return backend
+
+    return set_prescreen_backend
+
+
+@pytest.mark.parametrize("stage, expected", [
+    (TargetStage.RESERVE, TargetStage.RESERVE),
+    (TargetStage.NEW, None),
+])
+def test_screen_with_model(prescreen_backend, stage, expected):
+    backend = prescreen_backend(FakeBackend(
+        "prescreen", "local-model",
+        responder=lambda system_prompt, user_prompt, response_format:
+        CandidateEvaluationAnswer(target_stage=stage, comment="Мало опыта"),
+    ))
+
+    answer = screen_with_model("system", "user")
+
+    assert backend.calls == [("system", "user")]
+    if expected is None:
+        assert answer is None
+    else:
+        assert answer.target_stage == expected
+        assert answer.comment == "Предварительная оценка: Мало опыта"
+
+
+def test_screen_with_model_disabled(prescreen_backend):
+    prescreen_backend(None)
+    assert screen_with_model("system", "user") is None
+
+
+def test_screen_with_model_escalates_on_error(prescreen_backend):
+    def failing_responder(system_prompt, user_prompt, response_format):
+        raise TimeoutError("модель не ответила")
+
+    prescreen_backend(FakeBackend("prescreen", responder=failing_responder))
+
+    assert screen_with_model("system", "user") is None
+    assert prescreener.get_stats()["model_errors"] >= 1
+
+
+def test_screen_with_model_skips_unhealthy_backend(prescreen_backend):
+    backend = prescreen_backend(FakeBackend("prescreen", healthy=False))
+    backend.health_check()
+
+    assert screen_with_model("system", "user") is None
+    assert backend.calls == []
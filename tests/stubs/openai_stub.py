@@ -0,0 +1,212 @@
+import itertools
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def default_responder(body: dict) -> dict:
+    """
+    Ответ chat.completions по умолчанию: кандидат отправляется в резерв.
+    """
+    content = json.dumps({"target_stage": "резерв", "comment": "Заглушка"}, ensure_ascii=False)
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content, "refusal": None},
+        }],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+    }
+
+
+class OpenAIStub:
+    """
+    Минимальная заглушка OpenAI API на локальном HTTP-сервере: chat.completions, models, files и batches.
+    Batch считается выполненным при первом же запросе его статуса (если batch_status не переопределён).
+    Запросы, для которых batch_error(custom_id) возвращает сообщение, попадают в файл ошибок batch.
+    Запросы с stream=true получают ответ в виде SSE по stream_chunk_size символов с паузой stream_delay.
+    Задержка ответа chat.completions берётся из очереди latencies, а когда она пуста — из latency.
+    """
+
+    def __init__(self, responder: Callable[[dict], dict] = default_responder):
+        self.responder = responder
+        self.batch_status = "completed"
+        self.batch_error: Callable[[str], Optional[str]] = lambda custom_id: None
+        self.stream_chunk_size = 8
+        self.stream_delay = 0.0
+        self.latency = 0.0
+        self.latencies: List[float] = []
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, dict] = {}
+        self.requests = []
+        self._ids = itertools.count(1)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "OpenAIStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._dispatch(self, "GET")
+
+            def do_POST(self):
+                stub._dispatch(self, "POST")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw = handler.rfile.read(length) if length else b""
+        path = handler.path.split("?")[0]
+        self.requests.append((method, path))
+        parts = path.strip("/").split("/")[1:]  # без префикса v1
+
+        if method == "POST" and parts == ["chat", "completions"]:
+            body = json.loads(raw)
+            time.sleep(self.latencies.pop(0) if self.latencies else self.latency)
+            if body.get("stream"):
+                return self._send_stream(handler, self.responder(body))
+            return self._send_json(handler, self.responder(body))
+        if method == "GET" and parts == ["models"]:
+            return self._send_json(handler, {"object": "list", "data": [
+                {"id": "stub", "object": "model", "created": 0, "owned_by": "stub"},
+            ]})
+        if method == "POST" and parts == ["files"]:
+            return self._send_json(handler, self._create_file(handler.headers["Content-Type"], raw))
+        if method == "GET" and len(parts) == 3 and parts[0] == "files" and parts[2] == "content":
+            return self._send_bytes(handler, self.files[parts[1]])
+        if method == "POST" and parts == ["batches"]:
+            return self._send_json(handler, self._create_batch(json.loads(raw)))
+        if method == "GET" and len(parts) == 2 and parts[0] == "batches":
+            return self._send_json(handler, self._get_batch(parts[1]))
+        self._send_json(handler, {"error": {"message": f"Unknown route {method} {path}"}}, status=404)
+
+    def _create_file(self, content_type: str, raw: bytes) -> dict:
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + raw
+        )
+        content = b""
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+        file_id = f"file-{next(self._ids)}"
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+                "filename": "evaluations.jsonl", "purpose": "batch", "status": "processed"}
+
+    def _create_batch(self, body: dict) -> dict:
+        batch_id = f"batch-{next(self._ids)}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "completion_window": body["completion_window"],
+            "input_file_id": body["input_file_id"],
+            "output_file_id": None,
+            "error_file_id": None,
+            "status": "in_progress",
+            "created_at": 0,
+        }
+        return self.batches[batch_id]
+
+    def _get_batch(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        if batch["status"] == "in_progress" and self.batch_status != "in_progress":
+            batch["status"] = self.batch_status
+            if self.batch_status == "completed":
+                batch["output_file_id"], batch["error_file_id"] = self._run_batch(batch["input_file_id"])
+        return batch
+
+    def _run_batch(self, input_file_id: str) -> Tuple[Optional[str], Optional[str]]:
+        outputs, errors = [], []
+        for line in self.files[input_file_id].decode("utf-8").splitlines():
+            request = json.loads(line)
+            error = self.batch_error(request["custom_id"])
+            if error is None:
+                response = {"status_code": 200, "body": self.responder(request["body"])}
+            else:
+                response = {"status_code": 400, "body": {"error": {"message": error}}}
+            (outputs if error is None else errors).append(json.dumps({
+                "id": f"batch-req-{next(self._ids)}",
+                "custom_id": request["custom_id"],
+                "response": response,
+                "error": None,
+            }, ensure_ascii=False))
+        return self._store_lines(outputs), self._store_lines(errors)
+
+    def _store_lines(self, lines: List[str]) -> Optional[str]:
+        if not lines:
+            return None
+        file_id = f"file-{next(self._ids)}"
+        self.files[file_id] = "\n".join(lines).encode("utf-8")
+        return file_id
+
+    def _send_stream(self, handler: BaseHTTPRequestHandler, completion: dict) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.end_headers()
+
+        choice = completion["choices"][0]
+        content = choice["message"]["content"]
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+
+        def send(chunk: dict) -> None:
+            handler.wfile.write(f"data: {json.dumps({**base, **chunk}, ensure_ascii=False)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+
+        for start in range(0, len(content), self.stream_chunk_size):
+            delta = {"content": content[start:start + self.stream_chunk_size]}
+            if start == 0:
+                delta["role"] = "assistant"
+            send({"choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            time.sleep(self.stream_delay)
+        send({"choices": [{"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]}]})
+        send({"choices": [], "usage": completion["usage"]})
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, payload: dict, status: int = 200) -> None:
+        handler.send_response(status)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    @staticmethod
+    def _send_bytes(handler: BaseHTTPRequestHandler, body: bytes) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/octet-stream")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
@@ -2,6 +2,7 @@ import os
 import json
 import hmac
 import hashlib
+import time
 from fastapi.testclient import TestClient
 from src.app import app
 
@@ -133,3 +134,56 @@ def test_new_action_unknown_event(monkeypatch):
     assert response.status_code == 400
     result = response.json()
     assert "Неизвестное событие" in result.get("error", "")
+
+def test_stats_endpoint():
+    response = client.get("/huntflow/stats")
+    assert response.status_code == 200
+    result = response.json()
+    assert "in_flight" in result["evaluations"]
+    assert "depth" in result["job_queue"]
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "test_secret")
+    client.post("/huntflow/webhook/applicant", content="{}", headers={"X-Huntflow-Signature": "wrong"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE webhook_signature_verification_seconds histogram" in text
+    assert 'errors_total{component="webhook_signature"}' in text
+    assert 'app_stat{provider="job_queue",key="depth"}' in text
+
+def test_invalidate_statuses_endpoint(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "admin_secret")
+    response = client.post("/huntflow/admin/cache/statuses/invalidate", headers={"X-Admin-Token": "admin_secret"})
+    assert response.status_code == 200
+    assert "status_cache" in client.get("/huntflow/stats").json()
+
+def test_applicant_webhook_enqueued_and_processed_by_workers(monkeypatch, memory_job_queue):
+    monkeypatch.setenv("SECRET_KEY", "test_secret")
+    processed = []
+    monkeypatch.setattr("src.app.process_job", lambda payload: processed.append(payload))
+    monkeypatch.setattr("src.service.applicant_handler.from_stage_name", "Отклики")
+
+    payload = json.dumps({
+        "event": {
+            "applicant_log": {"type": "STATUS", "status": {"name": "Отклики"}, "vacancy": {"id": 123}},
+            "applicant": {"id": 456}
+        }
+    })
+    headers = {
+        "X-Huntflow-Signature": compute_signature("test_secret", payload.encode('utf-8')),
+        "x-huntflow-event": "APPLICANT",
+        "Content-Type": "application/json"
+    }
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.post("/huntflow/webhook/applicant", content=payload, headers=headers)
+        assert response.status_code == 202
+        deadline = time.perf_counter() + 2
+        while not processed and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+    trace = processed[0].pop("trace")
+    assert processed == [{"applicant_id": 456, "vacancy_id": 123, "mode": "realtime"}]
+    assert set(trace) == {"trace_id", "span_id"}
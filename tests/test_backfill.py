@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+import pytest
+
+from src import backfill
+from src.model.candidate_evaluation_answer import CandidateEvaluationAnswer
+from src.model.target_stage import TargetStage
+
+
+@pytest.fixture
+def huntflow(monkeypatch):
+    applicants = {
+        10: [{"id": 1}, {"id": 2}, {"id": 3}],
+        20: [{"id": 4}],
+    }
+    processed = []
+    lock = threading.Lock()
+
+    def dummy_process_applicant(applicant_id, vacancy_id, rescore=False, priority=0):
+        with lock:
+            processed.append((applicant_id, vacancy_id))
+        stage = TargetStage.NEW if applicant_id % 2 else TargetStage.RESERVE
+        return CandidateEvaluationAnswer(target_stage=stage, comment="ok")
+
+    monkeypatch.setattr(backfill.status_cache, "get_id_by_name", lambda name: 100 if name == "Отклики" else None)
+    monkeypatch.setattr(backfill, "get_applicants", lambda vacancy_id, status_id: applicants[vacancy_id])
+    monkeypatch.setattr(backfill, "process_applicant", dummy_process_applicant)
+    return processed
+
+
+def test_run_backfill_evaluates_all_candidates(huntflow, tmp_path):
+    report = backfill.run_backfill([10, 20], "Отклики", concurrency=2, rate_per_minute=0,
+                                   checkpoint_path=tmp_path / "checkpoint.jsonl")
+
+    assert sorted(huntflow) == [(1, 10), (2, 10), (3, 10), (4, 20)]
+    assert report.total == 4
+    assert report.processed == 4
+    assert report.failed == 0
+    assert report.decisions == {"новые": 2, "резерв": 2}
+    assert "кандидатов/мин" in report.format()
+
+
+def test_run_backfill_resumes_from_checkpoint(huntflow, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+    checkpoint_path.write_text(
+        json.dumps({"applicant_id": 1, "vacancy_id": 10, "target_stage": "новые"}) + "\n", encoding="utf-8"
+    )
+
+    report = backfill.run_backfill([10, 20], "Отклики", rate_per_minute=0, checkpoint_path=checkpoint_path)
+
+    assert (1, 10) not in huntflow
+    assert report.skipped == 1
+    assert report.processed == 3
+    assert len(checkpoint_path.read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_run_backfill_failed_candidates_not_checkpointed(huntflow, monkeypatch, tmp_path):
+    def failing_process_applicant(applicant_id, vacancy_id, rescore=False, priority=0):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(backfill, "process_applicant", failing_process_applicant)
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+    report = backfill.run_backfill([20], "Отклики", rate_per_minute=0, checkpoint_path=checkpoint_path)
+
+    assert report.failed == 1
+    assert not checkpoint_path.exists()
+
+
+def test_run_backfill_batch_mode(huntflow, monkeypatch, tmp_path, openai_stub, memory_batch_evaluator):
+    from src.service import batch_evaluation
+    from src.service.ai_evaluation import EvaluationRequest
+
+    monkeypatch.setattr(batch_evaluation, "prepare_evaluation",
+                        lambda a, v, rescore=False: EvaluationRequest(a, v, system_prompt="s", user_prompt="u"))
+
+    report = backfill.run_backfill([10, 20], "Отклики", rate_per_minute=0,
+                                   checkpoint_path=tmp_path / "checkpoint.jsonl", batch=True)
+
+    assert huntflow == []
+    assert report.deferred == 4
+    assert report.processed == 0
+    assert memory_batch_evaluator.get_stats()["submitted"] == 4
+    assert len(openai_stub.batches) == 1
+
+
+def test_run_backfill_all_open_vacancies(huntflow, monkeypatch, tmp_path):
+    monkeypatch.setattr(backfill, "get_vacancies", lambda state, count, page: [{"id": 10}, {"id": 20}] if page == 1 else [])
+
+    report = backfill.run_backfill(None, "Отклики", rate_per_minute=0, checkpoint_path=tmp_path / "c.jsonl")
+    assert report.processed == 4
+
+
+def test_get_open_vacancy_ids_pages(monkeypatch):
+    pages = {1: [{"id": 1}, {"id": 2}], 2: [{"id": 3}]}
+    monkeypatch.setattr(backfill, "get_vacancies", lambda state, count, page: pages[page])
+    assert backfill.get_open_vacancy_ids(count=2) == [1, 2, 3]
+
+
+def test_run_backfill_unknown_stage(huntflow, tmp_path):
+    with pytest.raises(ValueError):
+        backfill.run_backfill([10], "Неизвестный", checkpoint_path=tmp_path / "c.jsonl")
+
+
+def test_throttle_limits_rate():
+    throttle = backfill.Throttle(rate_per_minute=600)
+    started = time.perf_counter()
+    for _ in range(4):
+        throttle.wait()
+    # Между запусками не меньше 0.1 с
+    assert time.perf_counter() - started >= 0.3
+
+
+def test_main_reports_throughput(huntflow, tmp_path):
+    report = backfill.main(["--vacancy", "10", "--stage", "Отклики", "--rate", "0",
+                            "--checkpoint", str(tmp_path / "checkpoint.jsonl")])
+    assert report.processed == 3
+    assert report.candidates_per_minute > 0